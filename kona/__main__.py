@@ -0,0 +1,48 @@
+"""Command line of kona
+
+    kona serve --uri file://./db --store-type rocksdb --socket ./kona.sock --option create_if_missing=true
+"""
+
+import argparse
+import json
+import sys
+from typing import List, Tuple
+
+from kona.server import DEFAULT_MAX_WORKERS, serve
+
+
+def _option(value: str) -> Tuple[str, object]:
+    name, sep, raw = value.partition("=")
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"An option must be name=value. option={value}")
+    try:
+        return name, json.loads(raw)
+    except ValueError:
+        return name, raw
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="kona", description="kona key-value store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="serve a store over a Unix domain socket")
+    serve_parser.add_argument("--uri", required=True, help="URI of the served store (ex. file://./db)")
+    serve_parser.add_argument("--store-type", help="store type. settings.DEFAULT_KEY_VALUE_STORE_TYPE if omitted")
+    serve_parser.add_argument("--socket", required=True, help="path of the Unix domain socket")
+    serve_parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS)
+    serve_parser.add_argument(
+        "--option",
+        type=_option,
+        action="append",
+        default=[],
+        help="name=value option of KeyValueStore.new(). A value is parsed as JSON, or taken as a string.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        serve(args.uri, args.store_type, args.socket, max_workers=args.max_workers, **dict(args.option))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,435 @@
+"""Workload-driven benchmark of the store types
+
+Workloads A-F follow YCSB core workloads. "batch" and "cancelable_batch" measure the WriteBatch and
+CancelableWriteBatch paths. "multi_get" and "get_loop" compare one multi_get() of batch_size keys with as many get()
+calls. "seek" and "reverse_seek" read scan_length rows after a seek, and "scan" and "reverse_scan" read scan_length
+rows per operation from an iterator over all records, so the in-memory dict store can be compared with the engines. Every run opens a fresh store, loads records outside the timed region and reports
+ops/s and latency percentiles of the run phase. Results can be written to JSON and compared with a baseline.
+
+Usage:
+    $ python -m kona.benchmark --store-types dict,lmdb --workloads A,C,E --value-sizes 16,1024 --output result.json
+    $ python -m kona.benchmark --baseline result.json
+"""
+
+import argparse
+import bisect
+import json
+import math
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from kona.__about__ import __version__
+from kona.key_value_store import KeyValueStore
+
+STORE_TYPES = [KeyValueStore.STORE_TYPE_DICT, KeyValueStore.STORE_TYPE_ROCKSDB, KeyValueStore.STORE_TYPE_LMDB]
+VALUE_SIZES = [16, 256, 4096, 65536, 1024 * 1024]
+KEY_ORDERS = ["sequential", "random"]
+
+# Operation proportions and request distribution of each workload
+WORKLOADS = {
+    "A": {"operations": {"read": 0.5, "update": 0.5}, "distribution": "zipfian"},
+    "B": {"operations": {"read": 0.95, "update": 0.05}, "distribution": "zipfian"},
+    "C": {"operations": {"read": 1.0}, "distribution": "zipfian"},
+    "D": {"operations": {"read": 0.95, "insert": 0.05}, "distribution": "latest"},
+    "E": {"operations": {"scan": 0.95, "insert": 0.05}, "distribution": "zipfian"},
+    "F": {"operations": {"read": 0.5, "read_modify_write": 0.5}, "distribution": "zipfian"},
+    "batch": {"operations": {"batch": 1.0}, "distribution": "uniform"},
+    "cancelable_batch": {"operations": {"cancelable_batch": 1.0}, "distribution": "uniform"},
+    "multi_get": {"operations": {"multi_get": 1.0}, "distribution": "uniform"},
+    "get_loop": {"operations": {"get_loop": 1.0}, "distribution": "uniform"},
+    "seek": {"operations": {"seek": 1.0}, "distribution": "uniform"},
+    "reverse_seek": {"operations": {"reverse_seek": 1.0}, "distribution": "uniform"},
+    "scan": {"operations": {"scan": 1.0}, "distribution": "uniform"},
+    "reverse_scan": {"operations": {"reverse_scan": 1.0}, "distribution": "uniform"},
+}
+
+_FNV_OFFSET_BASIS_64 = 0xCBF29CE484222325
+_FNV_PRIME_64 = 0x100000001B3
+
+
+def _fnv_hash64(value: int) -> int:
+    hash_value = _FNV_OFFSET_BASIS_64
+    for _ in range(8):
+        hash_value ^= value & 0xFF
+        hash_value = (hash_value * _FNV_PRIME_64) & 0xFFFFFFFFFFFFFFFF
+        value >>= 8
+    return hash_value
+
+
+def make_key(index: int, key_order: str) -> bytes:
+    """Return the key of a record index. Random order hashes the index, so inserts are scattered over the key space"""
+    if key_order == "sequential":
+        return f"user{index:020}".encode()
+    if key_order == "random":
+        return f"user{_fnv_hash64(index):020}".encode()
+    raise ValueError(f"Unknown key_order. key_order={key_order}")
+
+
+class _ZipfianGenerator:
+    """Zipfian generator over [0, item_count) of Gray et al., as used by YCSB"""
+
+    def __init__(self, item_count: int, rand: random.Random, theta: float = 0.99):
+        self._rand = rand
+        self._item_count = item_count
+        self._theta = theta
+        self._alpha = 1.0 / (1.0 - theta)
+        self._zeta_n = self._zeta(item_count)
+        zeta_2 = self._zeta(2)
+        self._eta = (1 - (2.0 / item_count) ** (1 - theta)) / (1 - zeta_2 / self._zeta_n)
+
+    def _zeta(self, n: int) -> float:
+        return sum(1.0 / (i**self._theta) for i in range(1, n + 1))
+
+    def next(self) -> int:
+        u = self._rand.random()
+        uz = u * self._zeta_n
+        if uz < 1.0:
+            return 0
+        if uz < 1.0 + 0.5**self._theta:
+            return 1
+        return min(int(self._item_count * ((self._eta * u - self._eta + 1) ** self._alpha)), self._item_count - 1)
+
+
+class _KeyChooser:
+    def __init__(self, distribution: str, record_count: int, rand: random.Random):
+        self._distribution = distribution
+        self._rand = rand
+        self._zipfian = _ZipfianGenerator(record_count, rand) if distribution in ("zipfian", "latest") else None
+        self._record_count = record_count
+
+    def next(self, insert_count: int) -> int:
+        if self._distribution == "uniform":
+            return self._rand.randrange(insert_count)
+        if self._distribution == "latest":
+            return max(insert_count - 1 - self._zipfian.next(), 0)
+        # Scatter popular items over the key space like YCSB's scrambled zipfian
+        return _fnv_hash64(self._zipfian.next()) % insert_count
+
+
+def percentile(sorted_latencies: List[float], ratio: float) -> float:
+    """Return the nearest-rank percentile of ascending latencies"""
+    if not sorted_latencies:
+        return 0.0
+    rank = max(math.ceil(ratio * len(sorted_latencies)), 1)
+    return sorted_latencies[rank - 1]
+
+
+def _summarize(latencies: List[float], elapsed: float) -> dict:
+    latencies.sort()
+    count = len(latencies)
+    return {
+        "operations": count,
+        "elapsed": elapsed,
+        "ops_per_sec": count / elapsed if elapsed > 0 else 0.0,
+        "mean_us": sum(latencies) / count * 1e6 if count else 0.0,
+        "p50_us": percentile(latencies, 0.50) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+        "p999_us": percentile(latencies, 0.999) * 1e6,
+        "max_us": latencies[-1] * 1e6 if count else 0.0,
+    }
+
+
+def run_benchmark(
+    store_type: str,
+    workload: str,
+    *,
+    value_size: int = 100,
+    key_order: str = "sequential",
+    record_count: int = 10000,
+    operation_count: int = 10000,
+    scan_length: int = 100,
+    batch_size: int = 100,
+    uri: str = "file://./key_value_store_benchmark",
+    seed: int = 0,
+) -> dict:
+    """Run one workload against a fresh store and return its result
+
+    :param store_type: one of KeyValueStore.STORE_TYPE_XXX
+    :param workload: a key of WORKLOADS
+    :param value_size: bytes of each value
+    :param key_order: "sequential" or "random"
+    :param record_count: records loaded before the run phase
+    :param operation_count: operations of the run phase. A batch operation writes batch_size records
+    :param scan_length: maximum rows of a scan operation. Seek and full scan operations read this many rows
+    :param batch_size: records of a batch operation, and keys of a multi_get operation
+    :param uri: a file path URI of the store. The store is destroyed after the run
+    :param seed: random seed of keys and operations
+    """
+    if workload not in WORKLOADS:
+        raise ValueError(f"Unknown workload. workload={workload}")
+
+    rand = random.Random(seed)
+    value = bytes(rand.getrandbits(8) for _ in range(min(value_size, 256))) * (value_size // 256 + 1)
+    value = value[:value_size]
+
+    store = KeyValueStore.new(uri, store_type=store_type, create_if_missing=True)
+    try:
+        load_start = time.perf_counter()
+        store.bulk_load(((make_key(i, key_order), value) for i in range(record_count)), chunk_size=1000)
+        load_elapsed = time.perf_counter() - load_start
+
+        spec = WORKLOADS[workload]
+        operations = list(spec["operations"].items())
+        cumulative = []
+        total = 0.0
+        for _, proportion in operations:
+            total += proportion
+            cumulative.append(total)
+
+        chooser = _KeyChooser(spec["distribution"], record_count, rand)
+        state = {"insert_count": record_count, "iterators": {}}
+        handlers = _operation_handlers(store, value, key_order, scan_length, batch_size, chooser, rand, state)
+
+        latencies = []
+        counts: Dict[str, int] = {name: 0 for name, _ in operations}
+        try:
+            run_start = time.perf_counter()
+            for _ in range(operation_count):
+                name = operations[min(bisect.bisect(cumulative, rand.random() * total), len(operations) - 1)][0]
+                start = time.perf_counter()
+                handlers[name]()
+                latencies.append(time.perf_counter() - start)
+                counts[name] += 1
+            run_elapsed = time.perf_counter() - run_start
+        finally:
+            for it in state["iterators"].values():
+                it.close()
+    finally:
+        store.destroy_store()
+
+    result = {
+        "store_type": store_type,
+        "workload": workload,
+        "value_size": value_size,
+        "key_order": key_order,
+        "record_count": record_count,
+        "load_elapsed": load_elapsed,
+        "load_ops_per_sec": record_count / load_elapsed if load_elapsed > 0 else 0.0,
+        "operation_counts": counts,
+    }
+    result.update(_summarize(latencies, run_elapsed))
+    return result
+
+
+def _operation_handlers(
+    store: KeyValueStore,
+    value: bytes,
+    key_order: str,
+    scan_length: int,
+    batch_size: int,
+    chooser: _KeyChooser,
+    rand: random.Random,
+    state: dict,
+) -> Dict[str, Callable[[], None]]:
+    def _read():
+        store.get(make_key(chooser.next(state["insert_count"]), key_order), default=None)
+
+    def _update():
+        store.put(make_key(chooser.next(state["insert_count"]), key_order), value)
+
+    def _insert():
+        store.put(make_key(state["insert_count"], key_order), value)
+        state["insert_count"] += 1
+
+    def _scan():
+        with store.Iterator(start_key=make_key(chooser.next(state["insert_count"]), key_order)) as it:
+            it.next_n(rand.randint(1, scan_length))
+
+    def _read_modify_write():
+        key = make_key(chooser.next(state["insert_count"]), key_order)
+        store.get(key, default=None)
+        store.put(key, value)
+
+    def _batch():
+        batch = store.WriteBatch()
+        for _ in range(batch_size):
+            batch.put(make_key(chooser.next(state["insert_count"]), key_order), value)
+        batch.write()
+
+    def _cancelable_batch():
+        batch = store.CancelableWriteBatch()
+        for _ in range(batch_size):
+            batch.put(make_key(chooser.next(state["insert_count"]), key_order), value)
+        batch.write()
+        batch.cancel()
+        batch.close()
+
+    def _multi_get():
+        store.multi_get([make_key(chooser.next(state["insert_count"]), key_order) for _ in range(batch_size)])
+
+    def _get_loop():
+        for key in [make_key(chooser.next(state["insert_count"]), key_order) for _ in range(batch_size)]:
+            store.get(key, default=None)
+
+    def _seek():
+        with store.Iterator(start_key=make_key(chooser.next(state["insert_count"]), key_order)) as it:
+            it.next_n(scan_length)
+
+    def _reverse_seek():
+        with store.Iterator(stop_key=make_key(chooser.next(state["insert_count"]), key_order), reverse=True) as it:
+            it.next_n(scan_length)
+
+    def _full_scan(reverse: bool):
+        # Rows are read from one iterator over all records, which is opened again at the end.
+        it = state["iterators"].get(reverse)
+        rows = it.next_n(scan_length) if it is not None else []
+        if len(rows) < scan_length:
+            if it is not None:
+                it.close()
+            it = state["iterators"][reverse] = store.Iterator(reverse=reverse)
+            it.next_n(scan_length - len(rows))
+
+    return {
+        "read": _read,
+        "update": _update,
+        "insert": _insert,
+        "scan": _scan,
+        "read_modify_write": _read_modify_write,
+        "batch": _batch,
+        "cancelable_batch": _cancelable_batch,
+        "multi_get": _multi_get,
+        "get_loop": _get_loop,
+        "seek": _seek,
+        "reverse_seek": _reverse_seek,
+        "scan": lambda: _full_scan(False),
+        "reverse_scan": lambda: _full_scan(True),
+    }
+
+
+def run_benchmarks(
+    store_types: Iterable[str] = STORE_TYPES,
+    workloads: Iterable[str] = WORKLOADS,
+    value_sizes: Iterable[int] = (16, 1024),
+    key_orders: Iterable[str] = KEY_ORDERS,
+    *,
+    max_data_size: int = 256 * 1024 * 1024,
+    record_count: int = 10000,
+    progress: Optional[Callable[[dict], None]] = None,
+    **kwargs,
+) -> dict:
+    """Run every combination of the arguments and return a JSON serializable report
+
+    :param max_data_size: record_count is reduced so that loaded values do not exceed this bytes
+    :param progress: called with each result as soon as it is available
+    :param kwargs: other arguments of run_benchmark()
+    """
+    results = []
+    for store_type in store_types:
+        for value_size in value_sizes:
+            for key_order in key_orders:
+                for workload in workloads:
+                    count = max(min(record_count, max_data_size // value_size), 1)
+                    result = run_benchmark(
+                        store_type, workload, value_size=value_size, key_order=key_order, record_count=count, **kwargs
+                    )
+                    results.append(result)
+                    if progress:
+                        progress(result)
+
+    return {
+        "meta": {
+            "kona_version": __version__,
+            "python_version": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.time(),
+        },
+        "results": results,
+    }
+
+
+def _result_id(result: dict) -> tuple:
+    return result["store_type"], result["workload"], result["value_size"], result["key_order"]
+
+
+def compare_reports(baseline: dict, report: dict, threshold: float = 0.1) -> List[dict]:
+    """Return results whose ops/s dropped or p99 latency rose by more than threshold against the baseline"""
+    baseline_results = {_result_id(result): result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        base = baseline_results.get(_result_id(result))
+        if base is None:
+            continue
+
+        ops_change = (result["ops_per_sec"] - base["ops_per_sec"]) / base["ops_per_sec"] if base["ops_per_sec"] else 0
+        p99_change = (result["p99_us"] - base["p99_us"]) / base["p99_us"] if base["p99_us"] else 0
+        if ops_change < -threshold or p99_change > threshold:
+            regressions.append(
+                {
+                    "store_type": result["store_type"],
+                    "workload": result["workload"],
+                    "value_size": result["value_size"],
+                    "key_order": result["key_order"],
+                    "ops_per_sec_change": ops_change,
+                    "p99_change": p99_change,
+                }
+            )
+    return regressions
+
+
+def _format_result(result: dict) -> str:
+    return (
+        f"{result['store_type']:>7} {result['workload']:>16} {result['value_size']:>8}B {result['key_order']:>10} "
+        f"{result['ops_per_sec']:>12.1f} ops/s  p50={result['p50_us']:.1f}us  p99={result['p99_us']:.1f}us  "
+        f"p999={result['p999_us']:.1f}us"
+    )
+
+
+def _split(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmark", description="Benchmark kona store types")
+    parser.add_argument("--store-types", type=_split, default=STORE_TYPES, help="comma separated store types")
+    parser.add_argument("--workloads", type=_split, default=list(WORKLOADS), help="comma separated workloads")
+    parser.add_argument(
+        "--value-sizes", type=lambda value: [int(size) for size in _split(value)], default=[16, 1024], help="bytes"
+    )
+    parser.add_argument("--key-orders", type=_split, default=KEY_ORDERS, help="sequential,random")
+    parser.add_argument("--record-count", type=int, default=10000)
+    parser.add_argument("--operation-count", type=int, default=10000)
+    parser.add_argument("--max-data-size", type=int, default=256 * 1024 * 1024, help="bytes of loaded values")
+    parser.add_argument("--scan-length", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--uri", default="file://./key_value_store_benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the report to this JSON file")
+    parser.add_argument("--baseline", help="compare with a report JSON file and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed regression ratio against the baseline")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        args.store_types,
+        args.workloads,
+        args.value_sizes,
+        args.key_orders,
+        max_data_size=args.max_data_size,
+        record_count=args.record_count,
+        operation_count=args.operation_count,
+        scan_length=args.scan_length,
+        batch_size=args.batch_size,
+        uri=args.uri,
+        seed=args.seed,
+        progress=lambda result: print(_format_result(result), flush=True),
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
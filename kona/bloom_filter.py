@@ -0,0 +1,98 @@
+"""BloomFilter answers whether a key may have been added. It has false positives but no false negatives.
+
+Keys can't be removed, so a removed key stays a false positive until the filter is rebuilt.
+"""
+
+import hashlib
+import math
+import struct
+from typing import Iterable
+
+_HEADER = struct.Struct("<4sQBQQ")
+_MAGIC = b"KBF1"
+
+
+class BloomFilter:
+    """Bloom filter with double hashing of a blake2b digest
+
+    :param capacity: the number of keys the filter is sized for
+    :param bits_per_key: bits of the filter per key. 10 bits per key make about 1% false positives.
+    """
+
+    def __init__(self, capacity: int, bits_per_key: int = 10):
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive. capacity={capacity}")
+        if bits_per_key <= 0:
+            raise ValueError(f"bits_per_key must be positive. bits_per_key={bits_per_key}")
+
+        self._capacity = capacity
+        self._bits_per_key = bits_per_key
+        self._num_bits = max(capacity * bits_per_key, 64)
+        self._num_hashes = max(1, min(30, round(bits_per_key * math.log(2))))
+        self._bits = bytearray((self._num_bits + 7) // 8)
+        self._count = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def bits_per_key(self) -> int:
+        return self._bits_per_key
+
+    @property
+    def count(self) -> int:
+        """The number of add() calls. Adding the same key twice counts twice."""
+        return self._count
+
+    def _positions(self, key: bytes):
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self._num_bits for i in range(self._num_hashes))
+
+    def add(self, key: bytes):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def update(self, keys: Iterable[bytes]):
+        for key in keys:
+            self.add(key)
+
+    def may_contain(self, key: bytes) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def __contains__(self, key: bytes) -> bool:
+        return self.may_contain(key)
+
+    def info(self) -> dict:
+        """Return the capacity, the number of added keys, the size and the estimated false positive rate"""
+        fill = 1 - math.exp(-self._num_hashes * self._count / self._num_bits)
+        return {
+            "capacity": self._capacity,
+            "count": self._count,
+            "bits_per_key": self._bits_per_key,
+            "num_hashes": self._num_hashes,
+            "size": len(self._bits),
+            "false_positive_rate": fill**self._num_hashes,
+        }
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(_MAGIC, self._capacity, self._bits_per_key, self._num_bits, self._count) + bytes(self._bits)
+
+    @staticmethod
+    def from_bytes(data: bytes) -> "BloomFilter":
+        """Restore a filter made by to_bytes(). ValueError is raised if data is not a filter."""
+        if len(data) < _HEADER.size:
+            raise ValueError("data is too short for a BloomFilter")
+        magic, capacity, bits_per_key, num_bits, count = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("data is not a BloomFilter")
+        bloom_filter = BloomFilter(capacity, bits_per_key)
+        if bloom_filter._num_bits != num_bits or len(data) != _HEADER.size + len(bloom_filter._bits):
+            raise ValueError("data of the BloomFilter is broken")
+        bloom_filter._bits = bytearray(data[_HEADER.size :])
+        bloom_filter._count = count
+        return bloom_filter
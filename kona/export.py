@@ -0,0 +1,117 @@
+"""Streaming format of KeyValueStore.export() and KeyValueStore.import_()
+
+The stream can be written to a pipe and read back without seeking:
+
+    magic (8 bytes)
+    block*: payload length (u32), record count (u32), crc32 of the payload (u32), payload
+        payload: (key length (u32), value length (u32), key, value)*
+    end block: 0 (u32), 0 (u32), 0 (u32), the total record count (u64)
+
+All integers are little endian. Streams of the first version (KONAEXP1) end with the total count in the u32 of
+the end block, and are still read. A truncated stream is detected by the missing end block,
+and a corrupted block by its checksum.
+"""
+
+import struct
+import zlib
+from typing import BinaryIO, Iterable, Iterator, Tuple
+
+from kona.key_value_store import KeyValueStoreError
+
+MAGIC = b"KONAEXP2"
+_MAGIC_V1 = b"KONAEXP1"
+
+# Records are flushed as a block when the payload reaches this size (bytes).
+BLOCK_SIZE = 64 * 1024
+
+_BLOCK_HEADER = struct.Struct("<III")
+_RECORD_HEADER = struct.Struct("<II")
+_TOTAL_COUNT = struct.Struct("<Q")
+
+
+class ExportFormatError(KeyValueStoreError):
+    pass
+
+
+def write_records(fileobj: BinaryIO, rows: Iterable[Tuple[bytes, bytes]], block_size: int = BLOCK_SIZE) -> dict:
+    """Write (key, value) rows to a binary file object
+
+    :return: statistics (count, bytes written)
+    """
+    stats = {"count": 0, "bytes": len(MAGIC)}
+    fileobj.write(MAGIC)
+
+    block, block_count = [], 0
+    block_bytes = 0
+    for key, value in rows:
+        block.append(_RECORD_HEADER.pack(len(key), len(value)))
+        block.append(key)
+        block.append(value)
+        block_count += 1
+        block_bytes += _RECORD_HEADER.size + len(key) + len(value)
+        if block_bytes >= block_size:
+            stats["bytes"] += _write_block(fileobj, b"".join(block), block_count)
+            stats["count"] += block_count
+            block, block_count, block_bytes = [], 0, 0
+
+    if block:
+        stats["bytes"] += _write_block(fileobj, b"".join(block), block_count)
+        stats["count"] += block_count
+    fileobj.write(_BLOCK_HEADER.pack(0, 0, 0))
+    fileobj.write(_TOTAL_COUNT.pack(stats["count"]))
+    stats["bytes"] += _BLOCK_HEADER.size + _TOTAL_COUNT.size
+    return stats
+
+
+def _write_block(fileobj: BinaryIO, payload: bytes, count: int) -> int:
+    fileobj.write(_BLOCK_HEADER.pack(len(payload), count, zlib.crc32(payload)))
+    fileobj.write(payload)
+    return _BLOCK_HEADER.size + len(payload)
+
+
+def _read_exactly(fileobj: BinaryIO, size: int) -> bytes:
+    chunks = []
+    while size > 0:
+        chunk = fileobj.read(size)
+        if not chunk:
+            raise ExportFormatError("The export stream is truncated")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_records(fileobj: BinaryIO) -> Iterator[Tuple[bytes, bytes]]:
+    """Yield (key, value) rows of a stream made by write_records(). ExportFormatError is raised for a broken stream."""
+    magic = _read_exactly(fileobj, len(MAGIC))
+    if magic not in (MAGIC, _MAGIC_V1):
+        raise ExportFormatError("The stream is not made by export()")
+
+    total = 0
+    while True:
+        payload_size, count, crc = _BLOCK_HEADER.unpack(_read_exactly(fileobj, _BLOCK_HEADER.size))
+        if payload_size == 0:
+            if magic == MAGIC:
+                (count,) = _TOTAL_COUNT.unpack(_read_exactly(fileobj, _TOTAL_COUNT.size))
+            if count != total:
+                raise ExportFormatError(f"The export stream has {total} records, but {count} are expected")
+            return
+
+        payload = _read_exactly(fileobj, payload_size)
+        if zlib.crc32(payload) != crc:
+            raise ExportFormatError(f"Checksum mismatch of a block after {total} records")
+
+        rows, offset = [], 0
+        try:
+            for _ in range(count):
+                key_size, value_size = _RECORD_HEADER.unpack_from(payload, offset)
+                offset += _RECORD_HEADER.size
+                key = payload[offset : offset + key_size]
+                offset += key_size
+                rows.append((key, payload[offset : offset + value_size]))
+                offset += value_size
+        except struct.error:
+            offset = -1
+        if offset != payload_size:
+            raise ExportFormatError(f"A block has a wrong record count after {total} records")
+        yield from rows
+        total += count
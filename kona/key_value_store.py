@@ -1,6 +1,8 @@
 import abc
 import functools
-from typing import Any, Tuple, Union
+import itertools
+import time
+from typing import Any, BinaryIO, Callable, Iterable, List, Optional, Tuple, Union
 
 from kona.config import settings
 
@@ -29,6 +31,16 @@ class KeyValueStoreWriteBatch(abc.ABC):
         """
         raise NotImplementedError("delete() function is interface method")
 
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None):
+        """Delete records of the key range temporarily. The range is deleted in write() atomically with other operations.
+
+        Records put earlier in this batch are deleted too, and records put later are kept.
+
+        :param start_key: a start key (inclusive). The range starts from the first key if None
+        :param stop_key: a stop key (inclusive). The range ends at the last key if None
+        """
+        raise NotImplementedError("delete_range() function is interface method")
+
     @abc.abstractmethod
     def clear(self):
         """Clear batch operations."""
@@ -39,6 +51,26 @@ class KeyValueStoreWriteBatch(abc.ABC):
         """Write batch put and delete operations."""
         raise NotImplementedError("write() function is interface method")
 
+    @abc.abstractmethod
+    def count(self) -> int:
+        """Return the number of batched operations."""
+        raise NotImplementedError("count() function is interface method")
+
+    @abc.abstractmethod
+    def size(self) -> int:
+        """Return the size of batched keys and values (bytes)."""
+        raise NotImplementedError("size() function is interface method")
+
+    def namespace(self, name: str) -> "KeyValueStoreWriteBatch":
+        """Return a view of this batch which puts and deletes records of the namespace.
+
+        Operations of all views are written together in one atomic write() of any of them.
+        count() and size() of a view are those of the whole batch.
+
+        :param name: a namespace name. KeyValueStore.DEFAULT_NAMESPACE is the store itself
+        """
+        raise NotImplementedError("namespace() function is interface method")
+
     def __enter__(self):
         return self
 
@@ -47,29 +79,50 @@ class KeyValueStoreWriteBatch(abc.ABC):
             self.write()
 
 
-class KeyValueStoreCancelableWriteBatch(abc.ABC):
+class KeyValueStoreCancelableWriteBatch:
     """Cancelable batch put and delete operations.
 
     It can cancel operations after the operations has been written (called write() function).
-    However, It just recover key/value pairs to before KeyValueStoreCancelableWriteBatch instance was made.
+    However, It just recover key/value pairs to the values they had when the batch first wrote them.
+    Writes of others before that write() are kept, and those after it are overwritten.
 
     # Store: key1/value1, key2/value2
     batch = key_value_store_instance.CancelableWriteBatch()
     batch.put(key1, value1-1)
     batch.delete(key2)
+    # (O) key_value_store_instance.put(key2, value2-2) # will be recovered (key2/value2-2) after batch is canceled.
     batch.write()
     # Store: key1/value-1 (deleted key2)
 
     # (X) key_value_store_instance.put(key1, value1-2) # will be recovered (key1/value1) after batch is canceled.
     batch.cancel()
 
-    # Store: key1/value1, key2/value2
+    # Store: key1/value1, key2/value2-2
+
+    Savepoints undo a part of the operations, whether they have been written or not.
+
+    savepoint = batch.savepoint()
+    batch.put(key1, value1-3)
+    batch.write()
+    batch.rollback_to(savepoint)
+    # Store: key1/value1-1 (deleted key2)
+
+    Original values of the keys are read at once in write(), so a batch costs one read per write() call.
+    No snapshot or read transaction is held for the lifetime of a batch.
+    The operations are kept until clear(), cancel() or close() to roll back to any savepoint.
     """
 
     def __init__(self, store: "KeyValueStore", sync=False):
         self._store = store
         self._batch = self._store.WriteBatch(sync=sync)
         self._sync = sync
+        # Operations since the batch was made or cleared. The first self._written operations have been written.
+        self._operations: List[Tuple[bytes, Optional[bytes]]] = []
+        self._written = 0
+        self._size = 0
+        # Values of the written keys before the batch
+        self._original_items = {}
+        self._savepoints: List[int] = []
 
     def put(self, key: bytes, value: bytes):
         """Add or modify a value of the key temporarily.
@@ -78,7 +131,8 @@ class KeyValueStoreCancelableWriteBatch(abc.ABC):
         :param value:
         """
         self._batch.put(key, value)
-        self._touch(key)
+        self._operations.append((bytes(key), bytes(value)))
+        self._size += len(key) + len(value)
 
     def delete(self, key: bytes):
         """Delete a record of the key temporarily.
@@ -86,51 +140,380 @@ class KeyValueStoreCancelableWriteBatch(abc.ABC):
         :param key:
         """
         self._batch.delete(key)
-        self._touch(key)
+        self._operations.append((bytes(key), None))
+        self._size += len(key)
 
     def clear(self):
-        """Clear batch operations."""
+        """Clear batch operations. Written operations are not canceled by cancel() after this."""
         self._batch.clear()
+        self._operations.clear()
+        self._written = 0
+        self._size = 0
+        self._original_items.clear()
+        self._savepoints.clear()
 
     def write(self):
         """Write batch put and delete operations."""
+        keys = [key for key in dict.fromkeys(key for key, _ in self._pending()) if key not in self._original_items]
+        if keys:
+            self._original_items.update(zip(keys, self._read_original_items(keys)))
         self._batch.write()
+        self._batch.clear()
+        self._written = len(self._operations)
+
+    def count(self) -> int:
+        """Return the number of batched operations."""
+        return len(self._operations)
+
+    def size(self) -> int:
+        """Return the size of batched keys and values (bytes)."""
+        return self._size
 
     def cancel(self):
         """Cancel written operations."""
+        self._write_items(self._original_items.items())
+        del self._operations[: self._written]
+        self._written = 0
+        self._size = sum(len(key) + len(value or b"") for key, value in self._operations)
+        self._savepoints.clear()
+
+    def savepoint(self) -> int:
+        """Mark the current operations. Savepoints can be nested.
+
+        :return: a savepoint for rollback_to()
+        """
+        savepoint = len(self._operations)
+        if not self._savepoints or self._savepoints[-1] != savepoint:
+            self._savepoints.append(savepoint)
+        return savepoint
+
+    def rollback_to(self, savepoint: int):
+        """Undo operations after the savepoint. Written operations are undone in the store.
+
+        Savepoints made after the savepoint are released. The savepoint itself can be rolled back to again.
+
+        :param savepoint: a return value of savepoint()
+        """
+        if savepoint not in self._savepoints:
+            raise KeyValueStoreError(f"Unknown savepoint. savepoint={savepoint}")
+        del self._savepoints[self._savepoints.index(savepoint) + 1 :]
+
+        if savepoint < self._written:
+            undone_keys = {key for key, _ in self._operations[savepoint : self._written]}
+            items = {key: self._original_items[key] for key in undone_keys}
+            for key, value in self._operations[:savepoint]:
+                if key in items:
+                    items[key] = value
+            self._write_items(items.items())
+            self._written = savepoint
+
+        del self._operations[savepoint:]
+        self._size = sum(len(key) + len(value or b"") for key, value in self._operations)
+        self._batch.clear()
+        for key, value in self._pending():
+            if value is None:
+                self._batch.delete(key)
+            else:
+                self._batch.put(key, value)
+
+    def close(self):
+        """Close explicitly.
+
+        Will be closed automatically when this instance is deleted.
+        """
+        self._operations = []
+        self._original_items = {}
+        self._savepoints = []
+
+    def _pending(self) -> List[Tuple[bytes, Optional[bytes]]]:
+        return self._operations[self._written :]
+
+    def _write_items(self, items: Iterable[Tuple[bytes, Optional[bytes]]]):
         batch = self._store.WriteBatch(sync=self._sync)
-        for key, value in self._get_original_touched_item():
+        for key, value in items:
             if value is None:
                 batch.delete(key)
             else:
                 batch.put(key, value)
         batch.write()
 
-    @abc.abstractmethod
+    def _read_original_items(self, keys: List[bytes]) -> List[Optional[bytes]]:
+        # Children can override this function to read a consistent view of the store.
+        return self._store.multi_get(keys)
+
+
+class KeyValueStoreIterator(abc.ABC):
+    """Iterate records of a key range in key order.
+
+    The range is [start_key, stop_key] by default. Both bounds are bytes compared, so they don't need to exist.
+    With reverse=True, the same range is iterated from stop_key down to start_key.
+
+    for key, value in store_instance.Iterator(start_key=b"a", stop_key=b"b"):
+        ...
+
+    # Paginated scan
+    it = store_instance.Iterator(prefix=b"block:")
+    rows = it.next_n(100)
+    token = it.resume_token
+    it.close()
+    it = store_instance.Iterator(prefix=b"block:", resume_token=token)  # continues after the last row
+    """
+
+    def __init__(
+        self,
+        start_key: bytes = None,
+        stop_key: bytes = None,
+        include_value: bool = True,
+        *,
+        prefix: bytes = None,
+        reverse: bool = False,
+        include_start: bool = True,
+        include_stop: bool = True,
+        resume_token: bytes = None,
+    ):
+        for arg in (start_key, stop_key, prefix, resume_token):
+            if arg is not None:
+                _validate_args_bytes(arg)
+
+        self._include_value = include_value
+        self._reverse = reverse
+        self._lower, self._include_lower = start_key, include_start
+        self._upper, self._include_upper = stop_key, include_stop
+
+        if prefix:
+            if self._lower is None or self._lower < prefix:
+                self._lower, self._include_lower = prefix, True
+            prefix_end = _prefix_successor(prefix)
+            if prefix_end is not None and (self._upper is None or self._upper >= prefix_end):
+                self._upper, self._include_upper = prefix_end, False
+
+        if resume_token is not None:
+            if not reverse and (self._lower is None or self._lower <= resume_token):
+                self._lower, self._include_lower = resume_token, False
+            elif reverse and (self._upper is None or self._upper >= resume_token):
+                self._upper, self._include_upper = resume_token, False
+
+        self._last_key: Optional[bytes] = None
+        self._pending_row = None
+        self._started = False
+        self._closed = False
+
+    @property
+    def resume_token(self) -> Optional[bytes]:
+        """A token to make an iterator which continues after the last returned record (None if nothing returned)"""
+        return self._last_key
+
+    def seek(self, key: bytes):
+        """Move to the first record at or after the key (at or before the key if reverse)"""
+        _validate_args_bytes(key)
+        if self._closed:
+            return
+
+        self._pending_row = None
+        if not self._reverse:
+            if self._lower is not None and (key < self._lower or (key == self._lower and not self._include_lower)):
+                self._start()
+                return
+            self._seek_first(key)
+        else:
+            if self._upper is not None and (key > self._upper or (key == self._upper and not self._include_upper)):
+                self._start()
+                return
+            self._seek_last(key)
+        self._started = True
+
+    def next_n(self, n: int) -> list:
+        """Return at most n next records. Fewer than n records means the end of the range."""
+        rows = []
+        for row in self:
+            rows.append(row)
+            if len(rows) >= n:
+                break
+        return rows
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._closed:
+            raise StopIteration
+        if not self._started:
+            self._start()
+
+        if self._pending_row is not None:
+            row, self._pending_row = self._pending_row, None
+        else:
+            row = self._read_next()
+        if row is None or self._is_out_of_range(row[0]):
+            self.close()
+            raise StopIteration
+
+        self._last_key = row[0]
+        return row if self._include_value else row[0]
+
     def close(self):
-        """Close explicitly.
+        """Release resources of the iterator. It will be called automatically at the end of the range."""
+        if not self._closed:
+            self._closed = True
+            self._close()
 
-        Will be closed automatically when this instance is deleted.
-        """
-        raise NotImplementedError("close() function is interface method")
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _start(self):
+        self._started = True
+        if not self._reverse:
+            self._seek_first(self._lower)
+            if self._lower is not None and not self._include_lower:
+                self._skip_if_equal(self._lower)
+        else:
+            self._seek_last(self._upper)
+            if self._upper is not None and not self._include_upper:
+                self._skip_if_equal(self._upper)
+
+    def _skip_if_equal(self, key: bytes):
+        row = self._read_next()
+        if row is not None and row[0] != key:
+            self._pending_row = row
+
+    def _is_out_of_range(self, key: bytes) -> bool:
+        if not self._reverse:
+            if self._upper is None:
+                return False
+            return key > self._upper or (key == self._upper and not self._include_upper)
+        else:
+            if self._lower is None:
+                return False
+            return key < self._lower or (key == self._lower and not self._include_lower)
 
     @abc.abstractmethod
-    def _touch(self, key: bytes):
-        raise NotImplementedError("_touch() function is interface method")
+    def _seek_first(self, key: Optional[bytes]):
+        """Move to the first key at or after the key. (the first key of the store if key is None)"""
+        raise NotImplementedError("_seek_first() function is interface method")
 
     @abc.abstractmethod
-    def _get_original_touched_item(self):
-        # Children have to override function as generator. return key, value
-        raise NotImplementedError("_get_touched_item() function is interface method")
+    def _seek_last(self, key: Optional[bytes]):
+        """Move to the last key at or before the key. (the last key of the store if key is None)"""
+        raise NotImplementedError("_seek_last() function is interface method")
+
+    @abc.abstractmethod
+    def _read_next(self) -> Optional[Tuple[bytes, Optional[bytes]]]:
+        """Return (key, value) at the current position and move to the next position of the direction.
+
+        value may be None if include_value is False. Return None if there is no more record.
+        """
+        raise NotImplementedError("_read_next() function is interface method")
+
+    @abc.abstractmethod
+    def _close(self):
+        raise NotImplementedError("_close() function is interface method")
 
 
 class KeyValueStore(abc.ABC):
     STORE_TYPE_ROCKSDB = "rocksdb"
     STORE_TYPE_LMDB = "lmdb"
     STORE_TYPE_DICT = "dict"
+    STORE_TYPE_SHARDED = "sharded"
+    STORE_TYPE_CLIENT = "client"
+
+    DEFAULT_NAMESPACE = "default"
+
+    @staticmethod
+    def new(
+        uri: str,
+        store_type: str = None,
+        *,
+        cache_size: int = None,
+        group_commit_window: float = None,
+        metrics=None,
+        compaction_threshold: int = None,
+        shared: bool = True,
+        **kwargs,
+    ) -> "KeyValueStore":
+        """Make a KeyValueStore instance
+
+        A store is opened once per store type and path in a process. Every call returns a KeyValueStoreHandle of it,
+        and the last close() of the handles closes the store (see KeyValueStoreRegistry).
+        KeyValueStoreError is raised if the store is already open with other options than create_if_missing. A
+        read_only=True open of a writable store returns a read-only handle of it.
+
+        :param uri: a file path URI (ex. file:///xxx/xxx)
+        :param store_type: one of STORE_TYPE_XXX. settings.DEFAULT_KEY_VALUE_STORE_TYPE if None.
+            STORE_TYPE_SHARDED takes shards, shard_store_type and shard_uris options (see KeyValueStoreSharded.open)
+            STORE_TYPE_CLIENT connects to a kona server at a socket URI (ex. unix:///xxx/kona.sock)
+        :param cache_size: wrap the store with a read-through LRU cache of this byte budget if given
+        :param group_commit_window: merge concurrent put and delete calls into groups of this window (seconds) if given
+        :param metrics: record metrics of the store if True or a KeyValueStoreMetrics instance is given
+        :param compaction_threshold: compact the store in the background after this many deletes if given
+            (see KeyValueStoreCompaction). LMDB needs compactable=True.
+        :param shared: share the store with other calls of the same path. Dict stores are never shared.
+        :param kwargs: options of the store
+        """
+        if store_type is None:
+            store_type = settings.DEFAULT_KEY_VALUE_STORE_TYPE
+        options = dict(
+            cache_size=cache_size,
+            group_commit_window=group_commit_window,
+            metrics=metrics,
+            compaction_threshold=compaction_threshold,
+            **kwargs,
+        )
+        if not shared or store_type == KeyValueStore.STORE_TYPE_DICT:
+            return KeyValueStore._new_wrapped_store(uri, store_type, **options)
+
+        from kona.key_value_store_registry import registry, registry_key
+
+        return registry.open(
+            registry_key(uri, store_type, options.get("secondary_path")),
+            options,
+            lambda: KeyValueStore._new_wrapped_store(uri, store_type, **options),
+        )
 
     @staticmethod
-    def new(uri: str, store_type: str = None, **kwargs) -> "KeyValueStore":
+    def _new_wrapped_store(
+        uri: str,
+        store_type: str,
+        *,
+        cache_size: int = None,
+        group_commit_window: float = None,
+        metrics=None,
+        compaction_threshold: int = None,
+        **kwargs,
+    ) -> "KeyValueStore":
+        store = KeyValueStore._new_store(uri, store_type, **kwargs)
+
+        if compaction_threshold is not None:
+            from kona.key_value_store_compaction import KeyValueStoreCompaction
+
+            store = KeyValueStoreCompaction(store, delete_threshold=compaction_threshold)
+
+        if group_commit_window is not None:
+            from kona.key_value_store_group_commit import KeyValueStoreGroupCommit
+
+            store = KeyValueStoreGroupCommit(store, group_commit_window)
+
+        if cache_size:
+            from kona.key_value_store_cache import KeyValueStoreCache
+
+            store = KeyValueStoreCache(store, cache_size)
+
+        if metrics:
+            from kona.key_value_store_metrics import KeyValueStoreInstrumented
+
+            store = KeyValueStoreInstrumented(store, None if metrics is True else metrics)
+        return store
+
+    @staticmethod
+    def _new_store(uri: str, store_type: str = None, **kwargs) -> "KeyValueStore":
         if store_type is None:
             store_type = settings.DEFAULT_KEY_VALUE_STORE_TYPE
 
@@ -143,7 +526,17 @@ class KeyValueStore(abc.ABC):
 
             return KeyValueStoreLMDB(uri, **kwargs)
         elif store_type == KeyValueStore.STORE_TYPE_DICT:
-            raise ValueError("KeyValueStoreDict is just for development.")
+            from kona.key_value_store_dict import KeyValueStoreDict
+
+            return KeyValueStoreDict(uri, **kwargs)
+        elif store_type == KeyValueStore.STORE_TYPE_SHARDED:
+            from kona.key_value_store_sharded import KeyValueStoreSharded
+
+            return KeyValueStoreSharded.open(uri, **kwargs)
+        elif store_type == KeyValueStore.STORE_TYPE_CLIENT:
+            from kona.key_value_store_client import KeyValueStoreClient
+
+            return KeyValueStoreClient(uri, **kwargs)
         else:
             raise ValueError(f"store_name is invalid. store_type={store_type}")
 
@@ -158,6 +551,19 @@ class KeyValueStore(abc.ABC):
         """
         raise NotImplementedError("get() function is interface method")
 
+    @abc.abstractmethod
+    def multi_get(self, keys: Iterable[bytes], *, default=None, **kwargs) -> List[Optional[bytes]]:
+        """Get values of the keys at once
+
+        Unlike get(), a missing key does not raise KeyError. Its value is replaced with default.
+
+        :param keys: keys to look up
+        :param default: value for missing keys (bytes or None)
+        :param kwargs:
+        :return: values in the same order as keys
+        """
+        raise NotImplementedError("multi_get() function is interface method")
+
     @abc.abstractmethod
     def put(self, key: bytes, value: bytes, *, sync=False, **kwargs):
         """Add or modify a value of the key.
@@ -177,6 +583,42 @@ class KeyValueStore(abc.ABC):
         """
         raise NotImplementedError("delete() function is interface method")
 
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None, *, chunk_size: int = 10000) -> int:
+        """Delete records of the key range [start_key, stop_key].
+
+        Records are deleted in chunks, so other writers are not blocked for the whole range and
+        a failure can leave a part of the range deleted. Use delete_range() of WriteBatch for an atomic deletion.
+
+        :param start_key: a start key (inclusive). The range starts from the first key if None
+        :param stop_key: a stop key (inclusive). The range ends at the last key if None
+        :param chunk_size: the number of records deleted at once
+        :return: the number of deleted records
+        """
+        _validate_range_keys(start_key, stop_key)
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive. chunk_size={chunk_size}")
+
+        count, lower = 0, start_key
+        while True:
+            keys = self._delete_range_chunk(lower, stop_key, chunk_size)
+            count += len(keys)
+            if len(keys) < chunk_size:
+                break
+            # The last deleted key is the next lower bound, so deleted records are not scanned again.
+            lower = keys[-1]
+        return count
+
+    def _delete_range_chunk(self, start_key: Optional[bytes], stop_key: Optional[bytes], limit: int) -> List[bytes]:
+        # Children can override this function with a deletion in the engine. Return the deleted keys in key order.
+        with self.Iterator(start_key, stop_key, include_value=False) as it:
+            keys = it.next_n(limit)
+        if keys:
+            batch = self.WriteBatch()
+            for key in keys:
+                batch.delete(key)
+            batch.write()
+        return keys
+
     @abc.abstractmethod
     def close(self):
         """Close explicitly.
@@ -198,6 +640,224 @@ class KeyValueStore(abc.ABC):
         """If the key definitely does not exist in the database, then this method returns False, else True."""
         raise NotImplementedError("destroy_store() function is interface method")
 
+    def catch_up(self):
+        """Make the latest writes of other processes visible to this reader instance.
+
+        It does nothing for stores which always read the latest records.
+        """
+        pass
+
+    def namespace(self, name: str) -> "KeyValueStore":
+        """Return a view of a logical namespace of the store. It is made if it doesn't exist.
+
+        A namespace has the same API and shares the underlying engine (WAL, memtables, environment) with the store.
+        Closing the store closes its namespaces, close() of a namespace does nothing,
+        and destroy_store() of a namespace drops the namespace.
+
+        :param name: a namespace name. DEFAULT_NAMESPACE is the store itself
+        """
+        raise NotImplementedError("namespace() function is interface method")
+
+    def engine_stats(self) -> dict:
+        """Return statistics of the underlying engine.
+
+        Every store returns "engine", "estimated_num_keys" and "data_size" (bytes).
+        Numbers specific to the engine are under the key of the engine name.
+        """
+        raise NotImplementedError("engine_stats() function is interface method")
+
+    def compact_range(
+        self, start_key: bytes = None, stop_key: bytes = None, *, progress: Callable[[dict], None] = None
+    ) -> dict:
+        """Compact the key range to reclaim the space of deleted records and restore read performance.
+
+        The range is compacted in slices, and progress is called after every slice.
+        It does nothing for stores which need no compaction.
+
+        :param start_key: a start key (inclusive). The range starts from the first key if None
+        :param stop_key: a stop key (inclusive). The range ends at the last key if None
+        :param progress: a callback called after every slice with the progress statistics
+        :return: statistics (slices, compacted_slices, data_size_before, data_size_after, elapsed)
+        """
+        _validate_range_keys(start_key, stop_key)
+
+        slices = self._compaction_slices(start_key, stop_key)
+        stats = {
+            "slices": len(slices),
+            "compacted_slices": 0,
+            "data_size_before": self.engine_stats()["data_size"] if slices else None,
+            "data_size_after": None,
+            "elapsed": 0.0,
+        }
+        start = time.perf_counter()
+        for lower, upper in slices:
+            self._compact_slice(lower, upper)
+            stats["compacted_slices"] += 1
+            stats["elapsed"] = time.perf_counter() - start
+            if progress is not None:
+                progress(dict(stats))
+
+        if slices:
+            stats["data_size_after"] = self.engine_stats()["data_size"]
+        stats["elapsed"] = time.perf_counter() - start
+        return stats
+
+    def _compaction_slices(
+        self, start_key: Optional[bytes], stop_key: Optional[bytes]
+    ) -> List[Tuple[Optional[bytes], Optional[bytes]]]:
+        # Children which need compaction override this function and _compact_slice().
+        return []
+
+    def _compact_slice(self, start_key: Optional[bytes], stop_key: Optional[bytes]):
+        raise NotImplementedError("_compact_slice() function is interface method")
+
+    def checkpoint(self, path: str):
+        """Make a consistent copy of the store in path without stopping writes.
+
+        The copy can be opened as a store of the same type. path must not exist or must be an empty directory.
+
+        :param path: a directory path of the copy
+        """
+        raise NotImplementedError("checkpoint() function is interface method")
+
+    def export(self, fileobj: BinaryIO, start_key: bytes = None, stop_key: bytes = None) -> dict:
+        """Write records of the key range to a binary file object in the streaming format of kona.export.
+
+        Records are read from an iterator, so the export is a consistent view while writes go on.
+
+        :param fileobj: a writable binary file object. It can be a pipe.
+        :param start_key: a start key (inclusive)
+        :param stop_key: a stop key (inclusive)
+        :return: statistics (count, bytes)
+        """
+        from kona.export import write_records
+
+        with self.Iterator(start_key, stop_key) as it:
+            return write_records(fileobj, it)
+
+    def import_(self, fileobj: BinaryIO, *, chunk_size: int = 10000, progress: Callable[[dict], None] = None) -> dict:
+        """Load records written by export() with bulk_load().
+
+        ExportFormatError is raised for a truncated or corrupted stream. Records before the error have been loaded.
+
+        :param fileobj: a readable binary file object. It can be a pipe.
+        :param chunk_size: the number of records written at once
+        :param progress: a callback called after every chunk with the progress statistics
+        :return: statistics of bulk_load()
+        """
+        from kona.export import read_records
+
+        return self.bulk_load(read_records(fileobj), chunk_size=chunk_size, progress=progress)
+
+    def split_key_range(self, start_key: bytes = None, stop_key: bytes = None, parts: int = 2) -> List[bytes]:
+        """Return boundary keys which split the key range into parts of about the same size.
+
+        The sub-ranges are [start_key, keys[0]), [keys[0], keys[1]), ..., [keys[-1], stop_key].
+        Fewer than parts - 1 keys are returned if the range doesn't have enough records.
+        Stores override it with estimates of the engine. The default counts the keys of the range.
+
+        :param start_key: a start key (inclusive)
+        :param stop_key: a stop key (inclusive)
+        :param parts: the number of sub-ranges
+        """
+        if parts <= 0:
+            raise ValueError(f"parts must be positive. parts={parts}")
+        count = sum(1 for _ in self.Iterator(start_key, stop_key, include_value=False))
+        return self._nth_keys(start_key, stop_key, parts, count)
+
+    def _nth_keys(self, start_key: Optional[bytes], stop_key: Optional[bytes], parts: int, count: int) -> List[bytes]:
+        # Walk the range and pick the key at every count / parts position.
+        positions = sorted({count * i // parts for i in range(1, parts)} - {0})
+        keys = []
+        if not positions:
+            return keys
+        for i, key in enumerate(self.Iterator(start_key, stop_key, include_value=False)):
+            if i == positions[len(keys)]:
+                keys.append(key)
+                if len(keys) == len(positions):
+                    break
+        return keys
+
+    def bulk_load(
+        self,
+        items: Iterable[Tuple[bytes, bytes]],
+        *,
+        chunk_size: int = 10000,
+        progress: Callable[[dict], None] = None,
+    ) -> dict:
+        """Load many records fast.
+
+        Chunks sorted by key in ascending order take the fast path of each store.
+        Unsorted chunks fall back to batched writes. Existing keys are overwritten.
+
+        :param items: (key, value) pairs. Preferably sorted by key.
+        :param chunk_size: the number of records written at once
+        :param progress: a callback called after every chunk with the progress statistics
+        :return: statistics (count, bytes, sorted_count, elapsed, records_per_sec, bytes_per_sec)
+        """
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive. chunk_size={chunk_size}")
+
+        stats = {
+            "count": 0,
+            "bytes": 0,
+            "sorted_count": 0,
+            "elapsed": 0.0,
+            "records_per_sec": 0.0,
+            "bytes_per_sec": 0.0,
+        }
+        start = time.perf_counter()
+        min_key, max_key = None, None
+
+        items = iter(items)
+        while True:
+            chunk = list(itertools.islice(items, chunk_size))
+            if not chunk:
+                break
+
+            is_sorted, last_key = True, None
+            for key, value in chunk:
+                _validate_args_bytes(key)
+                _validate_args_bytes(value)
+                if last_key is not None and key <= last_key:
+                    is_sorted = False
+                if min_key is None or key < min_key:
+                    min_key = key
+                if max_key is None or key > max_key:
+                    max_key = key
+                last_key = key
+                stats["bytes"] += len(key) + len(value)
+
+            if is_sorted:
+                self._bulk_load_sorted_chunk(chunk)
+                stats["sorted_count"] += len(chunk)
+            else:
+                self._bulk_load_chunk(chunk)
+            stats["count"] += len(chunk)
+
+            _update_throughput(stats, start)
+            if progress is not None:
+                progress(dict(stats))
+
+        if stats["count"]:
+            self._bulk_load_finish(min_key, max_key)
+        _update_throughput(stats, start)
+        return stats
+
+    def _bulk_load_chunk(self, chunk: List[Tuple[bytes, bytes]]):
+        batch = self.WriteBatch()
+        for key, value in chunk:
+            batch.put(key, value)
+        batch.write()
+
+    def _bulk_load_sorted_chunk(self, chunk: List[Tuple[bytes, bytes]]):
+        # Children can override this function with the fast path for sorted records.
+        self._bulk_load_chunk(chunk)
+
+    def _bulk_load_finish(self, min_key: bytes, max_key: bytes):
+        # Children can override this function to persist the loaded records.
+        pass
+
     @abc.abstractmethod
     def WriteBatch(self, sync=False) -> KeyValueStoreWriteBatch:
         """Make a KeyValueStoreWriteBatch instance for this instance"""
@@ -209,15 +869,18 @@ class KeyValueStore(abc.ABC):
         raise NotImplementedError("CancelableWriteBatch constructor is not implemented in KeyValueStore class")
 
     @abc.abstractmethod
-    def Iterator(self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs):
+    def Iterator(
+        self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs
+    ) -> KeyValueStoreIterator:
         """Return iterator
 
-        :param start_key: a start key (inclusive)
-        :param stop_key: a stop key (inclusive)
+        :param start_key: a start key (inclusive unless include_start=False)
+        :param stop_key: a stop key (inclusive unless include_stop=False)
         :param include_value: include value (for key, value in store_instance.Iterator(include_value=True):)
-        :return: iterator
+            If False, iterator returns keys only (for key in store_instance.Iterator(include_value=False):)
+        :param kwargs: prefix, reverse, include_start, include_stop and resume_token of KeyValueStoreIterator
+        :return: KeyValueStoreIterator
         """
-        # TODO: make KeyValueStoreIterator class. Currently, Iterator can be used in for-loop.
         raise NotImplementedError("Iterator constructor is not implemented in KeyValueStore class")
 
     def __enter__(self):
@@ -227,11 +890,47 @@ class KeyValueStore(abc.ABC):
         self.close()
 
 
+def _update_throughput(stats: dict, start: float):
+    stats["elapsed"] = time.perf_counter() - start
+    if stats["elapsed"] > 0:
+        stats["records_per_sec"] = stats["count"] / stats["elapsed"]
+        stats["bytes_per_sec"] = stats["bytes"] / stats["elapsed"]
+
+
 def _validate_args_bytes(arg: Union[bytes, bytearray]):
     if not isinstance(arg, (bytes, bytearray)):
         raise ValueError(f"Argument type({type(arg)}) is not bytes. argument={arg}")
 
 
+def _validate_range_keys(start_key: Optional[bytes], stop_key: Optional[bytes]):
+    for key in (start_key, stop_key):
+        if key is not None:
+            _validate_args_bytes(key)
+
+
+def _key_in_range(key: bytes, start_key: Optional[bytes], stop_key: Optional[bytes]) -> bool:
+    """Whether the key is in [start_key, stop_key]. A bound of None is open."""
+    return (start_key is None or key >= start_key) and (stop_key is None or key <= stop_key)
+
+
+def _prefix_successor(prefix: bytes) -> Optional[bytes]:
+    """Return the smallest key which is greater than all keys starting with the prefix (None if there is no such key)"""
+    prefix = bytearray(prefix)
+    while prefix and prefix[-1] == 0xFF:
+        prefix.pop()
+    if not prefix:
+        return None
+    prefix[-1] += 1
+    return bytes(prefix)
+
+
+def _validate_keys_bytes(keys: Iterable[Union[bytes, bytearray]]) -> list:
+    keys = list(keys)
+    for key in keys:
+        _validate_args_bytes(key)
+    return keys
+
+
 def _validate_args_bytes_without_first(func):
     @functools.wraps(func)
     def _wrapper(*args, **kwargs):
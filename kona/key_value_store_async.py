@@ -0,0 +1,323 @@
+"""AsyncKeyValueStore is an awaitable front-end of KeyValueStore.
+
+Blocking calls of the wrapped store run in worker threads, so they don't block the event loop.
+It works on every event loop supported by anyio (asyncio and trio).
+"""
+
+import functools
+from typing import Any, BinaryIO, Iterable, List, NamedTuple, Optional, Tuple
+
+import anyio
+from anyio import to_thread
+
+from kona.key_value_store import (
+    KeyValueStore,
+    KeyValueStoreCancelableWriteBatch,
+    KeyValueStoreError,
+    _validate_args_bytes_without_first,
+    _validate_range_keys,
+)
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_ITERATOR_CHUNK_SIZE = 256
+
+
+class _RangeDeletion(NamedTuple):
+    start_key: Optional[bytes]
+    stop_key: Optional[bytes]
+
+
+class _AsyncKeyValueStoreWriteBatch:
+    """Buffer put and delete operations and write them to the store in a worker thread at once.
+
+    Operations are buffered in memory because LMDB write transactions must be used in the thread they began.
+    """
+
+    def __init__(self, store: "AsyncKeyValueStore", sync: bool):
+        self._store = store
+        self._sync = sync
+        self._batch_items = []
+
+    @_validate_args_bytes_without_first
+    def put(self, key: bytes, value: bytes):
+        self._batch_items.append((key, value))
+
+    @_validate_args_bytes_without_first
+    def delete(self, key: bytes):
+        self._batch_items.append((key, None))
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None):
+        _validate_range_keys(start_key, stop_key)
+        self._batch_items.append(_RangeDeletion(start_key, stop_key))
+
+    def clear(self):
+        self._batch_items.clear()
+
+    async def write(self):
+        await self._store._run(self._write, list(self._batch_items))
+
+    def _write(self, batch_items: list):
+        batch = self._store.store.WriteBatch(sync=self._sync)
+        _apply_batch_items(batch, batch_items)
+        batch.write()
+
+
+class _AsyncKeyValueStoreCancelableWriteBatch(_AsyncKeyValueStoreWriteBatch):
+    """Buffered operations are handed to a KeyValueStoreCancelableWriteBatch in write().
+
+    Savepoints of buffered operations are made in the batch when the operations are handed to it.
+    """
+
+    def __init__(self, store: "AsyncKeyValueStore", sync: bool):
+        super().__init__(store, sync)
+        self._batch: Optional[KeyValueStoreCancelableWriteBatch] = None
+        # The number of operations handed to self._batch, and savepoints of buffered operations
+        self._handed = 0
+        self._savepoints: List[int] = []
+
+    def clear(self):
+        """Clear buffered operations. Written operations are still canceled by cancel()."""
+        super().clear()
+        self._savepoints = [savepoint for savepoint in self._savepoints if savepoint <= self._handed]
+
+    async def write(self):
+        batch_items, savepoints = list(self._batch_items), list(self._savepoints)
+        await self._store._run(self._write, batch_items, savepoints)
+        self._batch_items.clear()
+        # A savepoint at the end of the written operations is rolled back to without the batch.
+        self._savepoints = [self._handed] if self._handed in savepoints else []
+
+    def _write(self, batch_items: list, savepoints: List[int]):
+        if self._batch is None:
+            self._batch = self._store.store.CancelableWriteBatch(sync=self._sync)
+        for i, item in enumerate(batch_items):
+            if self._handed + i in savepoints:
+                self._batch.savepoint()
+            _apply_batch_items(self._batch, [item])
+        self._handed += len(batch_items)
+        if self._handed in savepoints:
+            self._batch.savepoint()
+        self._batch.write()
+
+    def savepoint(self) -> int:
+        """Mark the current operations. See KeyValueStoreCancelableWriteBatch.savepoint()"""
+        savepoint = self._handed + len(self._batch_items)
+        if not self._savepoints or self._savepoints[-1] != savepoint:
+            self._savepoints.append(savepoint)
+        return savepoint
+
+    async def rollback_to(self, savepoint: int):
+        """Undo operations after the savepoint. Written operations are undone in the store in a worker thread."""
+        if savepoint in self._savepoints:
+            del self._savepoints[self._savepoints.index(savepoint) + 1 :]
+            del self._batch_items[savepoint - self._handed :]
+            return
+        if self._batch is None or savepoint > self._handed:
+            raise KeyValueStoreError(f"Unknown savepoint. savepoint={savepoint}")
+
+        await self._store._run(self._rollback_to, savepoint)
+        self._batch_items.clear()
+        self._savepoints.clear()
+
+    def _rollback_to(self, savepoint: int):
+        self._batch.rollback_to(savepoint)
+        self._handed = self._batch.count()
+
+    async def cancel(self):
+        """Cancel written operations."""
+        if self._batch is not None:
+            await self._store._run(self._cancel)
+        self._savepoints.clear()
+
+    def _cancel(self):
+        self._batch.cancel()
+        self._handed = self._batch.count()
+
+    async def close(self):
+        if self._batch is not None:
+            await self._store._run(self._batch.close)
+            self._batch = None
+        self._handed = 0
+        self._savepoints.clear()
+
+
+class _AsyncKeyValueStoreIterator:
+    """Async iterator over KeyValueStore.Iterator
+
+    Rows are fetched from the worker thread in chunks, so the event loop is not switched per row.
+    """
+
+    def __init__(self, store: "AsyncKeyValueStore", chunk_size: int, **kwargs):
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive. chunk_size={chunk_size}")
+
+        self._store = store
+        self._chunk_size = chunk_size
+        self._kwargs = kwargs
+        self._iterator = None
+        self._chunk = iter(())
+        self._exhausted = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._chunk)
+        except StopIteration:
+            pass
+
+        if self._exhausted:
+            raise StopAsyncIteration
+
+        chunk = await self._store._run(self._fetch_chunk)
+        if len(chunk) < self._chunk_size:
+            self._exhausted = True
+            await self.aclose()
+        if not chunk:
+            raise StopAsyncIteration
+
+        self._chunk = iter(chunk)
+        return next(self._chunk)
+
+    def _fetch_chunk(self) -> list:
+        if self._iterator is None:
+            self._iterator = self._store.store.Iterator(**self._kwargs)
+        return self._iterator.next_n(self._chunk_size)
+
+    async def aclose(self):
+        self._exhausted = True
+        self._chunk = iter(())
+        if self._iterator is not None:
+            await self._store._run(self._iterator.close)
+        self._iterator = None
+
+
+class AsyncKeyValueStore:
+    """Awaitable methods of KeyValueStore
+
+    :param store: a wrapped KeyValueStore instance
+    :param max_workers: the maximum number of worker threads running calls of this store at the same time
+    """
+
+    def __init__(self, store: KeyValueStore, max_workers: int = DEFAULT_MAX_WORKERS):
+        if max_workers <= 0:
+            raise ValueError(f"max_workers must be positive. max_workers={max_workers}")
+
+        self._store = store
+        self._max_workers = max_workers
+        self._limiter: Optional[anyio.CapacityLimiter] = None
+
+    @staticmethod
+    async def new(
+        uri: str, store_type: str = None, *, max_workers: int = DEFAULT_MAX_WORKERS, **kwargs
+    ) -> "AsyncKeyValueStore":
+        store = await to_thread.run_sync(functools.partial(KeyValueStore.new, uri, store_type, **kwargs))
+        return AsyncKeyValueStore(store, max_workers=max_workers)
+
+    @property
+    def store(self) -> KeyValueStore:
+        return self._store
+
+    async def _run(self, func, *args, **kwargs):
+        if self._limiter is None:
+            # CapacityLimiter has to be made in the running event loop.
+            self._limiter = anyio.CapacityLimiter(self._max_workers)
+        return await to_thread.run_sync(functools.partial(func, *args, **kwargs), limiter=self._limiter)
+
+    async def get(self, key: bytes, *, default=None, **kwargs) -> bytes:
+        return await self._run(self._store.get, key, default=default, **kwargs)
+
+    async def multi_get(self, keys: Iterable[bytes], *, default=None, **kwargs) -> List[Optional[bytes]]:
+        return await self._run(self._store.multi_get, list(keys), default=default, **kwargs)
+
+    async def put(self, key: bytes, value: bytes, *, sync=False, **kwargs):
+        await self._run(self._store.put, key, value, sync=sync, **kwargs)
+
+    async def delete(self, key: bytes, *, sync=False, **kwargs):
+        await self._run(self._store.delete, key, sync=sync, **kwargs)
+
+    async def delete_range(self, start_key: bytes = None, stop_key: bytes = None, **kwargs) -> int:
+        return await self._run(self._store.delete_range, start_key, stop_key, **kwargs)
+
+    async def bulk_load(self, items: Iterable[Tuple[bytes, bytes]], **kwargs) -> dict:
+        """Load records in a worker thread. The progress callback is called in the worker thread."""
+        return await self._run(self._store.bulk_load, items, **kwargs)
+
+    async def close(self):
+        await self._run(self._store.close)
+
+    async def destroy_store(self):
+        await self._run(self._store.destroy_store)
+
+    async def key_may_exist(self, key: bytes) -> Tuple[bool, Any]:
+        return await self._run(self._store.key_may_exist, key)
+
+    async def catch_up(self):
+        await self._run(self._store.catch_up)
+
+    async def engine_stats(self) -> dict:
+        return await self._run(self._store.engine_stats)
+
+    async def compact_range(self, start_key: bytes = None, stop_key: bytes = None, **kwargs) -> dict:
+        """Compact in a worker thread. The progress callback is called in the worker thread."""
+        return await self._run(self._store.compact_range, start_key, stop_key, **kwargs)
+
+    async def checkpoint(self, path: str):
+        await self._run(self._store.checkpoint, path)
+
+    async def export(self, fileobj: BinaryIO, start_key: bytes = None, stop_key: bytes = None) -> dict:
+        """Export records in a worker thread. fileobj is written in the worker thread."""
+        return await self._run(self._store.export, fileobj, start_key, stop_key)
+
+    async def import_(self, fileobj: BinaryIO, **kwargs) -> dict:
+        """Import records in a worker thread. fileobj is read in the worker thread."""
+        return await self._run(self._store.import_, fileobj, **kwargs)
+
+    async def split_key_range(self, start_key: bytes = None, stop_key: bytes = None, parts: int = 2) -> List[bytes]:
+        return await self._run(self._store.split_key_range, start_key, stop_key, parts)
+
+    def WriteBatch(self, sync=False) -> _AsyncKeyValueStoreWriteBatch:
+        return _AsyncKeyValueStoreWriteBatch(self, sync)
+
+    def CancelableWriteBatch(self, sync=False) -> _AsyncKeyValueStoreCancelableWriteBatch:
+        return _AsyncKeyValueStoreCancelableWriteBatch(self, sync)
+
+    def Iterator(
+        self,
+        start_key: bytes = None,
+        stop_key: bytes = None,
+        include_value: bool = True,
+        *,
+        chunk_size: int = DEFAULT_ITERATOR_CHUNK_SIZE,
+        **kwargs,
+    ) -> _AsyncKeyValueStoreIterator:
+        """Return async iterator
+
+        :param start_key: a start key (inclusive)
+        :param stop_key: a stop key (inclusive)
+        :param include_value: include value
+        :param chunk_size: the number of rows fetched from the worker thread at once
+        :return: async iterator (async for key, value in store.Iterator():)
+        """
+        return _AsyncKeyValueStoreIterator(
+            self, chunk_size, start_key=start_key, stop_key=stop_key, include_value=include_value, **kwargs
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+
+def _apply_batch_items(batch, batch_items: list):
+    for item in batch_items:
+        if isinstance(item, _RangeDeletion):
+            batch.delete_range(item.start_key, item.stop_key)
+            continue
+        key, value = item
+        if value is None:
+            batch.delete(key)
+        else:
+            batch.put(key, value)
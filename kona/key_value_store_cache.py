@@ -0,0 +1,332 @@
+"""KeyValueStoreCache wraps any KeyValueStore with a read-through LRU cache.
+
+Only operations made through the KeyValueStoreCache instance keep the cache coherent.
+Writes made by other processes or through the wrapped store directly are not visible to cached keys.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, List, Optional, Tuple
+
+from kona.key_value_store import (
+    KeyValueStore,
+    KeyValueStoreCancelableWriteBatch,
+    KeyValueStoreWriteBatch,
+    _key_in_range,
+    _validate_args_bytes,
+    _validate_args_bytes_without_first,
+    _validate_keys_bytes,
+    _validate_range_keys,
+)
+
+# Approximate bookkeeping cost of an entry (OrderedDict node and bytes object headers)
+_ENTRY_OVERHEAD = 96
+
+# Marker of cached negative lookups
+_MISSING = object()
+
+
+class _LRUCache:
+    """Byte-bounded LRU cache. A value of None is a cached negative lookup."""
+
+    def __init__(self, max_size: int):
+        if max_size <= 0:
+            raise ValueError(f"max_size must be positive. max_size={max_size}")
+
+        self._max_size = max_size
+        self._items = OrderedDict()
+        self._size = 0
+        self._version = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _entry_size(key: bytes, value: Optional[bytes]) -> int:
+        return len(key) + (len(value) if value is not None else 0) + _ENTRY_OVERHEAD
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, key: bytes):
+        """Return a cached value, None for a cached negative lookup or _MISSING"""
+        with self._lock:
+            try:
+                value = self._items[key]
+            except KeyError:
+                self.misses += 1
+                return _MISSING
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def fill(self, key: bytes, value: Optional[bytes], version: int):
+        """Cache a value read from the store unless a write happened after the read began"""
+        with self._lock:
+            if version != self._version:
+                return
+            self._set(key, value)
+
+    def invalidate(self, keys: Iterable[bytes]):
+        with self._lock:
+            self._version += 1
+            for key in keys:
+                self._pop(key)
+
+    def invalidate_range(self, start_key: Optional[bytes], stop_key: Optional[bytes]):
+        with self._lock:
+            self._version += 1
+            for key in [key for key in self._items if _key_in_range(key, start_key, stop_key)]:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._items.clear()
+            self._size = 0
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._items),
+                "size": self._size,
+                "max_size": self._max_size,
+            }
+
+    def _set(self, key: bytes, value: Optional[bytes]):
+        self._pop(key)
+
+        entry_size = self._entry_size(key, value)
+        if entry_size > self._max_size:
+            return
+
+        self._items[key] = value
+        self._size += entry_size
+        while self._size > self._max_size:
+            old_key, old_value = self._items.popitem(last=False)
+            self._size -= self._entry_size(old_key, old_value)
+            self.evictions += 1
+
+    def _pop(self, key: bytes):
+        try:
+            value = self._items.pop(key)
+        except KeyError:
+            return
+        self._size -= self._entry_size(key, value)
+
+
+class _KeyValueStoreWriteBatchCache(KeyValueStoreWriteBatch):
+    """Views made by namespace() are written together, so every view keeps all views to update their caches"""
+
+    def __init__(
+        self, store: "KeyValueStoreCache", batch: KeyValueStoreWriteBatch, root: "_KeyValueStoreWriteBatchCache" = None
+    ):
+        self._store = store
+        self._batch = batch
+        self._cache = store._cache
+        self._batch_keys = set()
+        self._batch_ranges = []
+        self._views = [self] if root is None else root._views
+        if root is not None:
+            self._views.append(self)
+
+    @_validate_args_bytes_without_first
+    def put(self, key: bytes, value: bytes):
+        self._batch.put(key, value)
+        self._batch_keys.add(bytes(key))
+
+    @_validate_args_bytes_without_first
+    def delete(self, key: bytes):
+        self._batch.delete(key)
+        self._batch_keys.add(bytes(key))
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None):
+        _validate_range_keys(start_key, stop_key)
+        self._batch.delete_range(start_key, stop_key)
+        self._batch_ranges.append((start_key, stop_key))
+
+    def clear(self):
+        self._batch.clear()
+        for view in self._views:
+            view._batch_keys.clear()
+            view._batch_ranges.clear()
+
+    def count(self) -> int:
+        return self._batch.count()
+
+    def size(self) -> int:
+        return self._batch.size()
+
+    def write(self):
+        try:
+            self._batch.write()
+        finally:
+            for view in self._views:
+                view._cache.invalidate(view._batch_keys)
+                for start_key, stop_key in view._batch_ranges:
+                    view._cache.invalidate_range(start_key, stop_key)
+
+    def namespace(self, name: str) -> KeyValueStoreWriteBatch:
+        return _KeyValueStoreWriteBatchCache(self._store.namespace(name), self._batch.namespace(name), self)
+
+
+class KeyValueStoreCache(KeyValueStore):
+    """Read-through LRU cache in front of a KeyValueStore
+
+    Negative lookups are cached too. Writes go to the wrapped store first and then invalidate their keys in the cache.
+    Writes don't fill the cache, since concurrent writes of a key may reach the store and the cache in other orders.
+
+    :param store: a wrapped KeyValueStore instance
+    :param cache_size: the byte budget of cached keys and values
+    """
+
+    def __init__(self, store: KeyValueStore, cache_size: int):
+        self._store = store
+        self._cache_size = cache_size
+        self._cache = _LRUCache(cache_size)
+        # Namespaces are kept by the root, so that a namespace has one cache
+        self._root = self
+        self._namespaces = {}
+        self._namespaces_lock = threading.Lock()
+
+    @property
+    def store(self) -> KeyValueStore:
+        return self._store
+
+    def cache_info(self) -> dict:
+        """Return hits, misses, evictions, entries, size and max_size of the cache"""
+        return self._cache.info()
+
+    def cache_clear(self):
+        self._cache.clear()
+
+    @_validate_args_bytes_without_first
+    def get(self, key: bytes, *, default=None, **kwargs) -> bytes:
+        if default is not None:
+            _validate_args_bytes(default)
+
+        key = bytes(key)
+        result = self._cache.get(key) if not kwargs else _MISSING
+        if result is _MISSING:
+            version = self._cache.version
+            result = self._store.multi_get([key], **kwargs)[0]
+            if not kwargs:
+                self._cache.fill(key, result, version)
+
+        if result is None:
+            result = default
+        if result is None:
+            raise KeyError(f"Has no value of key({key})")
+        return result
+
+    def multi_get(self, keys: Iterable[bytes], *, default=None, **kwargs) -> List[Optional[bytes]]:
+        keys = [bytes(key) for key in _validate_keys_bytes(keys)]
+        if default is not None:
+            _validate_args_bytes(default)
+        if kwargs:
+            return self._store.multi_get(keys, default=default, **kwargs)
+
+        results = [self._cache.get(key) for key in keys]
+        missed_keys = [key for key, result in zip(keys, results) if result is _MISSING]
+        if missed_keys:
+            version = self._cache.version
+            fetched = dict(zip(missed_keys, self._store.multi_get(missed_keys)))
+            for key, value in fetched.items():
+                self._cache.fill(key, value, version)
+            results = [fetched[key] if result is _MISSING else result for key, result in zip(keys, results)]
+
+        return [default if result is None else result for result in results]
+
+    @_validate_args_bytes_without_first
+    def put(self, key: bytes, value: bytes, *, sync=False, **kwargs):
+        try:
+            self._store.put(key, value, sync=sync, **kwargs)
+        finally:
+            self._cache.invalidate([bytes(key)])
+
+    @_validate_args_bytes_without_first
+    def delete(self, key: bytes, *, sync=False, **kwargs):
+        try:
+            self._store.delete(key, sync=sync, **kwargs)
+        finally:
+            self._cache.invalidate([bytes(key)])
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None, **kwargs) -> int:
+        try:
+            return self._store.delete_range(start_key, stop_key, **kwargs)
+        finally:
+            self._cache.invalidate_range(start_key, stop_key)
+
+    def bulk_load(self, items: Iterable[Tuple[bytes, bytes]], **kwargs) -> dict:
+        try:
+            return self._store.bulk_load(items, **kwargs)
+        finally:
+            self._cache.clear()
+
+    def close(self):
+        self._clear_caches()
+        self._store.close()
+
+    def destroy_store(self):
+        self._clear_caches()
+        self._store.destroy_store()
+
+    def _clear_caches(self):
+        self._cache.clear()
+        if self._root is self:
+            with self._namespaces_lock:
+                for namespace in self._namespaces.values():
+                    namespace._cache.clear()
+
+    @_validate_args_bytes_without_first
+    def key_may_exist(self, key: bytes) -> Tuple[bool, Any]:
+        result = self._cache.get(bytes(key))
+        if result is _MISSING:
+            return self._store.key_may_exist(key)
+        if result is None:
+            return False, None
+        return True, result
+
+    def catch_up(self):
+        """Catch up the store and clear the cache, since its entries may be older than the new records"""
+        self._store.catch_up()
+        self._clear_caches()
+
+    def namespace(self, name: str) -> KeyValueStore:
+        """Return the namespace of the wrapped store with a cache of its own. The cache has the same byte budget."""
+        root = self._root
+        if name == self.DEFAULT_NAMESPACE:
+            return root
+        with root._namespaces_lock:
+            namespace = root._namespaces.get(name)
+            if namespace is None:
+                namespace = root._namespaces[name] = KeyValueStoreCache(root._store.namespace(name), root._cache_size)
+                namespace._root = root
+        return namespace
+
+    def engine_stats(self) -> dict:
+        return self._store.engine_stats()
+
+    def compact_range(self, start_key: bytes = None, stop_key: bytes = None, **kwargs) -> dict:
+        return self._store.compact_range(start_key, stop_key, **kwargs)
+
+    def checkpoint(self, path: str):
+        self._store.checkpoint(path)
+
+    def split_key_range(self, start_key: bytes = None, stop_key: bytes = None, parts: int = 2) -> List[bytes]:
+        return self._store.split_key_range(start_key, stop_key, parts)
+
+    def WriteBatch(self, sync=False) -> KeyValueStoreWriteBatch:
+        return _KeyValueStoreWriteBatchCache(self, self._store.WriteBatch(sync=sync))
+
+    def CancelableWriteBatch(self, sync=False) -> KeyValueStoreCancelableWriteBatch:
+        return KeyValueStoreCancelableWriteBatch(self, sync=sync)
+
+    def Iterator(self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs):
+        return self._store.Iterator(start_key=start_key, stop_key=stop_key, include_value=include_value, **kwargs)
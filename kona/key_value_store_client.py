@@ -0,0 +1,316 @@
+"""KeyValueStoreClient is a KeyValueStore of a kona server (see kona.server).
+
+It has the API of KeyValueStore, so a process can switch to a served store with
+KeyValueStore.new("unix:///path/to/kona.sock", store_type="client").
+Requests of all threads share one connection and are pipelined: a thread sends its request without waiting for the
+responses of other threads, and a reader thread hands the responses to the waiting threads.
+"""
+
+import itertools
+import json
+import socket
+import threading
+import urllib.parse
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from kona import protocol
+from kona.key_value_store import (
+    KeyValueStore,
+    KeyValueStoreCancelableWriteBatch,
+    KeyValueStoreError,
+    KeyValueStoreIterator,
+    KeyValueStoreWriteBatch,
+    _validate_args_bytes,
+    _validate_args_bytes_without_first,
+    _validate_keys_bytes,
+    _validate_range_keys,
+)
+
+DEFAULT_ITERATOR_CHUNK_SIZE = 256
+
+
+class _KeyValueStoreWriteBatchClient(KeyValueStoreWriteBatch):
+    """Operations are sent in one request when write() is called. The server writes them atomically."""
+
+    def __init__(self, store: "KeyValueStoreClient", sync: bool):
+        self._store = store
+        self._sync = sync
+        self._fields: List[Optional[bytes]] = []
+        self._count = 0
+        self._size = 0
+
+    @_validate_args_bytes_without_first
+    def put(self, key: bytes, value: bytes):
+        self._fields.extend((protocol.WRITE_PUT, bytes(key), bytes(value)))
+        self._count += 1
+        self._size += len(key) + len(value)
+
+    @_validate_args_bytes_without_first
+    def delete(self, key: bytes):
+        self._fields.extend((protocol.WRITE_DELETE, bytes(key)))
+        self._count += 1
+        self._size += len(key)
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None):
+        _validate_range_keys(start_key, stop_key)
+        self._fields.extend((protocol.WRITE_DELETE_RANGE, start_key, stop_key))
+        self._count += 1
+        self._size += len(start_key or b"") + len(stop_key or b"")
+
+    def clear(self):
+        self._fields = []
+        self._count = 0
+        self._size = 0
+
+    def count(self) -> int:
+        return self._count
+
+    def size(self) -> int:
+        return self._size
+
+    def write(self):
+        self._store._write([protocol.pack_flag(self._sync)] + self._fields)
+
+
+class _KeyValueStoreIteratorClient(KeyValueStoreIterator):
+    """Rows are fetched from a cursor of the server in chunks. The range is checked again by this iterator."""
+
+    def __init__(
+        self,
+        store: "KeyValueStoreClient",
+        start_key: bytes = None,
+        stop_key: bytes = None,
+        include_value=True,
+        chunk_size: int = DEFAULT_ITERATOR_CHUNK_SIZE,
+        **kwargs,
+    ):
+        super().__init__(start_key, stop_key, include_value, **kwargs)
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive. chunk_size={chunk_size}")
+        self._store = store
+        self._chunk_size = chunk_size
+        self._cursor: Optional[int] = None
+        self._rows: List[Tuple[bytes, Optional[bytes]]] = []
+        self._index = 0
+        self._exhausted = True
+
+    def _open_cursor(self, start_key: Optional[bytes], stop_key: Optional[bytes], reverse: bool):
+        self._close_cursor()
+        fields = [start_key, stop_key, protocol.pack_flag(self._include_value), protocol.pack_flag(reverse)]
+        self._cursor = protocol.unpack_int(self._store._call(protocol.OP_ITER_OPEN, fields)[0])
+        self._rows, self._index = [], 0
+        self._exhausted = False
+
+    def _close_cursor(self):
+        cursor, self._cursor = self._cursor, None
+        if cursor is not None:
+            self._store._call(protocol.OP_ITER_CLOSE, [protocol.pack_int(cursor)])
+
+    def _seek_first(self, key: Optional[bytes]):
+        self._open_cursor(key, self._upper, False)
+
+    def _seek_last(self, key: Optional[bytes]):
+        self._open_cursor(self._lower, key, True)
+
+    def _read_next(self) -> Optional[Tuple[bytes, Optional[bytes]]]:
+        if self._index >= len(self._rows):
+            if self._exhausted:
+                return None
+            fields = self._store._call(
+                protocol.OP_ITER_NEXT, [protocol.pack_int(self._cursor), protocol.pack_int(self._chunk_size)]
+            )
+            self._exhausted = protocol.unpack_flag(fields[0])
+            self._rows = list(zip(fields[1::2], fields[2::2]))
+            self._index = 0
+            if self._exhausted:
+                self._close_cursor()
+            if not self._rows:
+                return None
+
+        row = self._rows[self._index]
+        self._index += 1
+        return row
+
+    def _close(self):
+        self._rows = []
+        if not self._store._closed:
+            self._close_cursor()
+
+
+class KeyValueStoreClient(KeyValueStore):
+    """KeyValueStore of a kona server
+
+    destroy_store() is not supported, since the server owns the store. checkpoint() makes a checkpoint at a path
+    of the server (OP_SNAPSHOT).
+
+    :param uri: the socket path URI of the server (ex. unix:///xxx/kona.sock)
+    :param timeout: seconds to wait for a response. None waits forever.
+    """
+
+    def __init__(self, uri: str, *, timeout: float = None):
+        uri_obj = urllib.parse.urlparse(uri)
+        if uri_obj.scheme != "unix":
+            raise ValueError(f"Support unix socket URI only (ex. unix:///xxx/kona.sock). uri={uri}")
+        self._path = f"{(uri_obj.netloc if uri_obj.netloc else '')}{uri_obj.path}"
+        self._timeout = timeout
+
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._socket.connect(self._path)
+        except OSError as e:
+            self._socket.close()
+            raise KeyValueStoreError(f"Can't connect to the kona server. path={self._path}, e={e}")
+
+        self._send_lock = threading.Lock()
+        self._request_ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._closed = False
+        self._reader = threading.Thread(target=self._run_reader, name="kona-client", daemon=True)
+        self._reader.start()
+
+    def _recv_exactly(self, size: int) -> bytes:
+        chunks = []
+        while size > 0:
+            chunk = self._socket.recv(min(size, 1024 * 1024))
+            if not chunk:
+                raise ConnectionError("The kona server has closed the connection")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def _run_reader(self):
+        error: BaseException = KeyValueStoreError("The client is closed")
+        try:
+            while True:
+                length, request_id, status = protocol.unpack_header(self._recv_exactly(protocol.HEADER.size))
+                fields = protocol.unpack_fields(self._recv_exactly(length))
+                with self._send_lock:
+                    future = self._pending.pop(request_id, None)
+                if future is not None:
+                    future.set_result((status, fields))
+        except (OSError, protocol.ProtocolError) as e:
+            if not self._closed:
+                error = KeyValueStoreError(f"The connection to the kona server is broken. e={e}")
+        with self._send_lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(error)
+
+    def _submit(self, op: int, fields: List[Optional[bytes]]) -> Future:
+        future = Future()
+        with self._send_lock:
+            if self._closed:
+                raise KeyValueStoreError("The client is closed")
+            request_id = next(self._request_ids) & 0xFFFFFFFF
+            frame = protocol.pack_frame(request_id, op, fields)
+            self._pending[request_id] = future
+            try:
+                self._socket.sendall(frame)
+            except OSError as e:
+                self._pending.pop(request_id, None)
+                raise KeyValueStoreError(f"Can't send a request to the kona server. e={e}")
+        return future
+
+    def _call(self, op: int, fields: List[Optional[bytes]]) -> List[Optional[bytes]]:
+        status, fields = self._submit(op, fields).result(self._timeout)
+        if status == protocol.STATUS_OK:
+            return fields
+        if status == protocol.STATUS_MISSING:
+            raise KeyError("Has no value of the key")
+        message = fields[0].decode() if fields and fields[0] is not None else ""
+        if status == protocol.STATUS_VALUE_ERROR:
+            raise ValueError(message)
+        raise KeyValueStoreError(message)
+
+    def _write(self, fields: List[Optional[bytes]]):
+        self._call(protocol.OP_WRITE, fields)
+
+    @_validate_args_bytes_without_first
+    def get(self, key: bytes, *, default=None, **kwargs) -> bytes:
+        if default is not None:
+            _validate_args_bytes(default)
+        try:
+            return self._call(protocol.OP_GET, [bytes(key)])[0]
+        except KeyError:
+            if default is None:
+                raise KeyError(f"Has no value of key({key})")
+            return default
+
+    def multi_get(self, keys: Iterable[bytes], *, default=None, **kwargs) -> List[Optional[bytes]]:
+        keys = _validate_keys_bytes(keys)
+        if default is not None:
+            _validate_args_bytes(default)
+        values = self._call(protocol.OP_MULTI_GET, [bytes(key) for key in keys])
+        return [default if value is None else value for value in values]
+
+    @_validate_args_bytes_without_first
+    def put(self, key: bytes, value: bytes, *, sync=False, **kwargs):
+        self._write([protocol.pack_flag(sync), protocol.WRITE_PUT, bytes(key), bytes(value)])
+
+    @_validate_args_bytes_without_first
+    def delete(self, key: bytes, *, sync=False, **kwargs):
+        self._write([protocol.pack_flag(sync), protocol.WRITE_DELETE, bytes(key)])
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None, **kwargs) -> int:
+        """Delete the range on the server. chunk_size of the server store is used."""
+        _validate_range_keys(start_key, stop_key)
+        return protocol.unpack_int(self._call(protocol.OP_DELETE_RANGE, [start_key, stop_key])[0])
+
+    def close(self):
+        """Close the connection. The server keeps the store open."""
+        with self._send_lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+        if self._reader is not threading.current_thread():
+            self._reader.join()
+
+    def destroy_store(self):
+        raise KeyValueStoreError("The kona server owns the store. Destroy it on the server.")
+
+    @_validate_args_bytes_without_first
+    def key_may_exist(self, key: bytes) -> Tuple[bool, Any]:
+        fields = self._call(protocol.OP_KEY_MAY_EXIST, [bytes(key)])
+        if not fields:
+            return NotImplemented
+        return protocol.unpack_flag(fields[0]), fields[1]
+
+    def engine_stats(self) -> dict:
+        return json.loads(self._call(protocol.OP_ENGINE_STATS, [])[0])
+
+    def compact_range(
+        self, start_key: bytes = None, stop_key: bytes = None, *, progress: Callable[[dict], None] = None
+    ) -> dict:
+        """Compact the range on the server. progress is called once with the result."""
+        _validate_range_keys(start_key, stop_key)
+        stats = json.loads(self._call(protocol.OP_COMPACT_RANGE, [start_key, stop_key])[0])
+        if progress is not None:
+            progress(stats)
+        return stats
+
+    def checkpoint(self, path: str):
+        """Make a checkpoint of the store at the path of the server"""
+        self._call(protocol.OP_SNAPSHOT, [str(path).encode()])
+
+    def WriteBatch(self, sync=False) -> KeyValueStoreWriteBatch:
+        return _KeyValueStoreWriteBatchClient(self, sync)
+
+    def CancelableWriteBatch(self, sync=False) -> KeyValueStoreCancelableWriteBatch:
+        return KeyValueStoreCancelableWriteBatch(self, sync=sync)
+
+    def Iterator(
+        self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs
+    ) -> KeyValueStoreIterator:
+        """Get Iterator
+
+        :param kwargs: chunk_size (rows fetched per request), prefix, reverse, include_start, include_stop
+            and resume_token
+        """
+        return _KeyValueStoreIteratorClient(self, start_key, stop_key, include_value, **kwargs)
@@ -0,0 +1,350 @@
+"""KeyValueStoreCompaction compacts a KeyValueStore in the background.
+
+A low-priority compactor thread calls compact_range() of the wrapped store after delete_threshold records have been
+deleted, or after the store has been idle for idle_seconds with deletes since the last compaction.
+compaction_info() shows the progress of a running compaction and the result of the last one,
+so space of pruned records is reclaimed without taking the store down.
+Deletes in namespaces are counted by the same compactor, which compacts the store and the namespaces with deletes.
+"""
+
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from kona.key_value_store import (
+    KeyValueStore,
+    KeyValueStoreCancelableWriteBatch,
+    KeyValueStoreIterator,
+    KeyValueStoreWriteBatch,
+    _validate_args_bytes_without_first,
+)
+
+# Nice value of the compactor thread
+COMPACTOR_NICE = 19
+
+
+def _lower_thread_priority():
+    # Linux schedules threads as tasks, so setpriority() of the native thread id lowers only the calling thread.
+    if not sys.platform.startswith("linux"):
+        return
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), COMPACTOR_NICE)
+    except OSError as e:
+        logger.warning(f"Can't lower the priority of the compactor thread. e={e}")
+
+
+class _KeyValueStoreWriteBatchCompaction(KeyValueStoreWriteBatch):
+    """Views made by namespace() are written together, so every view keeps all views to count their deletes"""
+
+    def __init__(
+        self,
+        store: "KeyValueStoreCompaction",
+        batch: KeyValueStoreWriteBatch,
+        root: "_KeyValueStoreWriteBatchCompaction" = None,
+    ):
+        self._store = store
+        self._batch = batch
+        self._deletes = 0
+        self._views = [self] if root is None else root._views
+        if root is not None:
+            self._views.append(self)
+
+    def put(self, key: bytes, value: bytes):
+        self._batch.put(key, value)
+
+    def delete(self, key: bytes):
+        self._batch.delete(key)
+        self._deletes += 1
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None):
+        self._batch.delete_range(start_key, stop_key)
+        self._deletes += 1
+
+    def clear(self):
+        self._batch.clear()
+        for view in self._views:
+            view._deletes = 0
+
+    def count(self) -> int:
+        return self._batch.count()
+
+    def size(self) -> int:
+        return self._batch.size()
+
+    def write(self):
+        self._batch.write()
+        for view in self._views:
+            view._store._add_deletes(view._deletes)
+
+    def namespace(self, name: str) -> KeyValueStoreWriteBatch:
+        return _KeyValueStoreWriteBatchCompaction(self._store.namespace(name), self._batch.namespace(name), self)
+
+
+class KeyValueStoreCompaction(KeyValueStore):
+    """Background compaction of a KeyValueStore
+
+    A range deleted in a WriteBatch counts as one delete, since the number of its records is unknown.
+    delete_range() of the store counts the deleted records.
+
+    :param store: a wrapped KeyValueStore instance
+    :param delete_threshold: compact after this many deletes since the last compaction if given
+    :param idle_seconds: compact when nothing has been called for this many seconds after deletes if given
+    :param check_interval: seconds between checks of the idle window
+    """
+
+    def __init__(
+        self,
+        store: KeyValueStore,
+        *,
+        delete_threshold: int = None,
+        idle_seconds: float = None,
+        check_interval: float = 1.0,
+    ):
+        if delete_threshold is not None and delete_threshold <= 0:
+            raise ValueError(f"delete_threshold must be positive. delete_threshold={delete_threshold}")
+        if idle_seconds is not None and idle_seconds < 0:
+            raise ValueError(f"idle_seconds must not be negative. idle_seconds={idle_seconds}")
+        if check_interval <= 0:
+            raise ValueError(f"check_interval must be positive. check_interval={check_interval}")
+
+        self._store = store
+        self._delete_threshold = delete_threshold
+        self._idle_seconds = idle_seconds
+        self._check_interval = check_interval
+
+        self._cond = threading.Condition()
+        self._compaction_lock = threading.Lock()
+        # Deletes since the last compaction by namespace. None is the store itself.
+        self._pending_deletes: Dict[Optional[str], int] = {}
+        self._last_activity = time.monotonic()
+        self._running: Optional[dict] = None
+        self._last: Optional[dict] = None
+        self._compactions = 0
+        self._closed = False
+
+        self._compactor: Optional[threading.Thread] = None
+        if delete_threshold is not None or idle_seconds is not None:
+            self._compactor = threading.Thread(target=self._run_compactor, name="kona-compaction", daemon=True)
+            self._compactor.start()
+
+    @property
+    def store(self) -> KeyValueStore:
+        return self._store
+
+    def compaction_info(self) -> dict:
+        """Return the progress of a running compaction, the result of the last one and deletes since then"""
+        with self._cond:
+            return {
+                "running": dict(self._running) if self._running is not None else None,
+                "last": dict(self._last) if self._last is not None else None,
+                "compactions": self._compactions,
+                "pending_deletes": sum(self._pending_deletes.values()),
+            }
+
+    def _touch(self):
+        self._last_activity = time.monotonic()
+
+    def _add_deletes(self, count: int, namespace: str = None):
+        self._last_activity = time.monotonic()
+        if count:
+            with self._cond:
+                self._pending_deletes[namespace] = self._pending_deletes.get(namespace, 0) + count
+                self._cond.notify_all()
+
+    def _compaction_reason(self) -> Optional[str]:
+        pending_deletes = sum(self._pending_deletes.values())
+        if self._delete_threshold is not None and pending_deletes >= self._delete_threshold:
+            return "deletes"
+        if (
+            self._idle_seconds is not None
+            and pending_deletes > 0
+            and time.monotonic() - self._last_activity >= self._idle_seconds
+        ):
+            return "idle"
+        return None
+
+    def _run_compactor(self):
+        _lower_thread_priority()
+        while True:
+            with self._cond:
+                reason = self._compaction_reason()
+                while reason is None and not self._closed:
+                    self._cond.wait(self._check_interval)
+                    reason = self._compaction_reason()
+                if self._closed:
+                    return
+
+            try:
+                self._compact(reason, None, None, None)
+            except Exception as e:
+                logger.warning(f"Background compaction has failed. reason={reason}, e={e}")
+
+    def _compact(
+        self,
+        reason: str,
+        start_key: Optional[bytes],
+        stop_key: Optional[bytes],
+        progress: Optional[Callable[[dict], None]],
+        namespace: str = None,
+    ) -> dict:
+        def _progress(stats: dict):
+            with self._cond:
+                self._running.update(stats)
+            if progress is not None:
+                progress(stats)
+
+        with self._compaction_lock:
+            with self._cond:
+                # Deletes during the compaction are counted for the next one.
+                if reason == "manual":
+                    # Deletes of other namespaces and out of a compacted sub-range are still pending.
+                    namespaces = [namespace]
+                    if start_key is None and stop_key is None:
+                        self._pending_deletes.pop(namespace, None)
+                else:
+                    # A background compaction compacts the store and the namespaces with deletes, the store first.
+                    namespaces = sorted(self._pending_deletes, key=lambda name: (name is not None, name or ""))
+                    self._pending_deletes.clear()
+                self._running = {"reason": reason, "started": time.time(), "slices": None, "compacted_slices": 0}
+
+            last = {"reason": reason, "started": self._running["started"], "error": None}
+            try:
+                # The result is that of the first compacted store.
+                stats = None
+                for name in namespaces:
+                    store = self._store if name is None else self._store.namespace(name)
+                    result = store.compact_range(start_key, stop_key, progress=_progress)
+                    if stats is None:
+                        stats = result
+                last.update(stats)
+                return stats
+            except BaseException as e:
+                last["error"] = repr(e)
+                raise
+            finally:
+                with self._cond:
+                    self._running = None
+                    self._last = last
+                    self._compactions += 1
+
+    def compact_range(
+        self, start_key: bytes = None, stop_key: bytes = None, *, progress: Callable[[dict], None] = None
+    ) -> dict:
+        """Compact in the calling thread. It waits for a running background compaction."""
+        return self._compact("manual", start_key, stop_key, progress)
+
+    @_validate_args_bytes_without_first
+    def get(self, key: bytes, *, default=None, **kwargs) -> bytes:
+        self._touch()
+        return self._store.get(key, default=default, **kwargs)
+
+    def multi_get(self, keys: Iterable[bytes], *, default=None, **kwargs) -> List[Optional[bytes]]:
+        self._touch()
+        return self._store.multi_get(keys, default=default, **kwargs)
+
+    @_validate_args_bytes_without_first
+    def put(self, key: bytes, value: bytes, *, sync=False, **kwargs):
+        self._touch()
+        self._store.put(key, value, sync=sync, **kwargs)
+
+    @_validate_args_bytes_without_first
+    def delete(self, key: bytes, *, sync=False, **kwargs):
+        self._store.delete(key, sync=sync, **kwargs)
+        self._add_deletes(1)
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None, **kwargs) -> int:
+        count = self._store.delete_range(start_key, stop_key, **kwargs)
+        self._add_deletes(count)
+        return count
+
+    def bulk_load(self, items: Iterable[Tuple[bytes, bytes]], **kwargs) -> dict:
+        self._touch()
+        return self._store.bulk_load(items, **kwargs)
+
+    def _stop_compactor(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._compactor is not None and self._compactor is not threading.current_thread():
+            self._compactor.join()
+
+    def close(self):
+        """Wait for a running compaction, stop the compactor and close the store"""
+        self._stop_compactor()
+        self._store.close()
+
+    def destroy_store(self):
+        self._stop_compactor()
+        self._store.destroy_store()
+
+    @_validate_args_bytes_without_first
+    def key_may_exist(self, key: bytes) -> Tuple[bool, Any]:
+        return self._store.key_may_exist(key)
+
+    def catch_up(self):
+        self._store.catch_up()
+
+    def engine_stats(self) -> dict:
+        stats = self._store.engine_stats()
+        stats["compaction"] = self.compaction_info()
+        return stats
+
+    def checkpoint(self, path: str):
+        self._store.checkpoint(path)
+
+    def split_key_range(self, start_key: bytes = None, stop_key: bytes = None, parts: int = 2) -> List[bytes]:
+        return self._store.split_key_range(start_key, stop_key, parts)
+
+    def namespace(self, name: str) -> KeyValueStore:
+        """Return the namespace of the wrapped store. Its deletes are counted by the compactor of this store."""
+        if name == self.DEFAULT_NAMESPACE:
+            return self
+        return _KeyValueStoreNamespaceCompaction(self, name)
+
+    def WriteBatch(self, sync=False) -> KeyValueStoreWriteBatch:
+        return _KeyValueStoreWriteBatchCompaction(self, self._store.WriteBatch(sync=sync))
+
+    def CancelableWriteBatch(self, sync=False) -> KeyValueStoreCancelableWriteBatch:
+        return KeyValueStoreCancelableWriteBatch(self, sync=sync)
+
+    def Iterator(
+        self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs
+    ) -> KeyValueStoreIterator:
+        self._touch()
+        return self._store.Iterator(start_key, stop_key, include_value, **kwargs)
+
+
+class _KeyValueStoreNamespaceCompaction(KeyValueStoreCompaction):
+    """A namespace of KeyValueStoreCompaction. The compactor of the parent compacts it."""
+
+    def __init__(self, parent: KeyValueStoreCompaction, name: str):
+        self._parent = parent
+        self._name = name
+        self._store = parent._store.namespace(name)
+
+    def compaction_info(self) -> dict:
+        return self._parent.compaction_info()
+
+    def _touch(self):
+        self._parent._touch()
+
+    def _add_deletes(self, count: int, namespace: str = None):
+        self._parent._add_deletes(count, self._name)
+
+    def compact_range(
+        self, start_key: bytes = None, stop_key: bytes = None, *, progress: Callable[[dict], None] = None
+    ) -> dict:
+        return self._parent._compact("manual", start_key, stop_key, progress, self._name)
+
+    def close(self):
+        self._store.close()
+
+    def destroy_store(self):
+        self._store.destroy_store()
+
+    def namespace(self, name: str) -> KeyValueStore:
+        return self._parent.namespace(name)
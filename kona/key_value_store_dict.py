@@ -1,93 +1,424 @@
-"""KeyValueStoreDict classes are components for development"""
+"""KeyValueStoreDict is an in-memory key-value store.
+
+Records are kept in an ordered key index, so seeks are log-time and iteration is ordered like the other stores.
+It is useful as a fast ephemeral store and as a test double of range-scan code. Records are not persistent.
+"""
 
 import functools
-from typing import Any, Tuple
+import heapq
+import itertools
+import os
+import threading
+import urllib.parse
+import weakref
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Tuple
+
+from sortedcontainers import SortedDict
 
 from kona.key_value_store import (
     KeyValueStore,
     KeyValueStoreCancelableWriteBatch,
     KeyValueStoreError,
+    KeyValueStoreIterator,
     KeyValueStoreWriteBatch,
+    _key_in_range,
     _validate_args_bytes,
     _validate_args_bytes_without_first,
+    _validate_keys_bytes,
+    _validate_range_keys,
 )
 
+# Approximate bookkeeping cost of a record (index node and bytes object headers)
+_ENTRY_OVERHEAD = 96
+
+# The number of records read from the index at once while iterating
+_SCAN_CHUNK_SIZE = 128
+
+# Marker of a record which didn't exist when the snapshot was made
+_ABSENT = object()
+
 
 def _error_convert(func):
     @functools.wraps(func)
     def _wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
-        except RuntimeError as e:
+        except (RuntimeError, OSError) as e:
             raise KeyValueStoreError(e)
 
     return _wrapper
 
 
+class _SpilledValue:
+    """Location of a value in the spill file"""
+
+    __slots__ = ("offset", "length")
+
+    def __init__(self, offset: int, length: int):
+        self.offset = offset
+        self.length = length
+
+
+class KeyValueStoreDictSnapshot:
+    """Read-only view of KeyValueStoreDict at the time the snapshot was made.
+
+    Records are copied on write only while the snapshot is alive. Close it as soon as it is no longer needed.
+    """
+
+    def __init__(self, store: "KeyValueStoreDict"):
+        self._store = store
+        self._saved_items = SortedDict()
+
+    def _save(self, key: bytes, value):
+        if key not in self._saved_items:
+            self._saved_items[key] = value
+
+    def _value_ref(self, key: bytes):
+        value = self._saved_items.get(key, None)
+        if value is None:
+            return self._store._index.get(key, _ABSENT)
+        return value
+
+    @_validate_args_bytes_without_first
+    @_error_convert
+    def get(self, key: bytes, *, default=None, **kwargs) -> bytes:
+        if default is not None:
+            _validate_args_bytes(default)
+
+        with self._store._lock:
+            value = self._value_ref(bytes(key))
+            result = default if value is _ABSENT else self._store._read_value(value)
+        if result is None:
+            raise KeyError(f"Has no value of key({key})")
+        return result
+
+    @_error_convert
+    def multi_get(self, keys: Iterable[bytes], *, default=None, **kwargs) -> List[Optional[bytes]]:
+        keys = _validate_keys_bytes(keys)
+        if default is not None:
+            _validate_args_bytes(default)
+
+        with self._store._lock:
+            values = [self._value_ref(bytes(key)) for key in keys]
+            return [default if value is _ABSENT else self._store._read_value(value) for value in values]
+
+    def Iterator(
+        self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs
+    ) -> KeyValueStoreIterator:
+        return _KeyValueStoreIteratorDict(self._store, self, start_key, stop_key, include_value, **kwargs)
+
+    def close(self):
+        self._store._release_snapshot(self)
+        self._saved_items = SortedDict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
 class _KeyValueStoreWriteBatchDict(KeyValueStoreWriteBatch):
-    def __init__(self, store_items: dict):
-        self._store_items = store_items
-        self._batch_items = dict()
+    """Views made by namespace() share the buffer of the root batch, keyed by the store of the namespace."""
+
+    def __init__(self, store: "KeyValueStoreDict", root: "_KeyValueStoreWriteBatchDict" = None):
+        self._store = store
+        self._root = self if root is None else root
+        if root is None:
+            self._batch_items = dict()
+            self._batch_ranges = dict()
+            self._count = 0
+            self._size = 0
+
+    def _items(self) -> dict:
+        return self._root._batch_items.setdefault(self._store, dict())
 
     @_validate_args_bytes_without_first
     @_error_convert
     def put(self, key: bytes, value: bytes):
-        self._batch_items[key] = value
+        self._items()[bytes(key)] = bytes(value)
+        self._root._count += 1
+        self._root._size += len(key) + len(value)
 
     @_validate_args_bytes_without_first
     @_error_convert
     def delete(self, key: bytes):
-        self._batch_items[key] = None
+        self._items()[bytes(key)] = None
+        self._root._count += 1
+        self._root._size += len(key)
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None):
+        _validate_range_keys(start_key, stop_key)
+        items = self._items()
+        for key in [key for key in items if _key_in_range(key, start_key, stop_key)]:
+            del items[key]
+        # Ranges are deleted before the items in write(), so the items left are those put after the ranges.
+        self._root._batch_ranges.setdefault(self._store, []).append((start_key, stop_key))
+        self._root._count += 1
+        self._root._size += len(start_key or b"") + len(stop_key or b"")
 
     @_error_convert
     def clear(self):
-        self._batch_items.clear()
+        self._root._batch_items.clear()
+        self._root._batch_ranges.clear()
+        self._root._count = 0
+        self._root._size = 0
 
-    @_error_convert
-    def write(self):
-        for key, value in self._batch_items.items():
-            if value is None:
-                try:
-                    del self._store_items[key]
-                except KeyError:
-                    pass
-            else:
-                self._store_items[key] = value
-
-
-class _KeyValueStoreCancelableWriteBatchDict(KeyValueStoreCancelableWriteBatch):
-    def __init__(self, store: KeyValueStore, store_items: dict):
-        super().__init__(store)
-        self._store_items = store_items
-        self._original_items = dict()
-
-    def _touch(self, key: bytes):
-        if key in self._original_items:
-            return
+    def count(self) -> int:
+        return self._root._count
 
-        try:
-            value = self._store_items[key]
-        except KeyError:
-            value = None
-        self._original_items[key] = value
+    def size(self) -> int:
+        return self._root._size
 
-    def _get_original_touched_item(self):
-        for key, value in self._original_items.items():
-            yield key, value
+    @_error_convert
+    def write(self):
+        # Namespaces share the lock of the parent store, so all namespaces are written atomically.
+        with self._store._lock:
+            for store, ranges in self._root._batch_ranges.items():
+                for start_key, stop_key in ranges:
+                    store._delete_range(start_key, stop_key)
+            for store, batch_items in self._root._batch_items.items():
+                store._write_items(batch_items.items())
+
+    def namespace(self, name: str) -> KeyValueStoreWriteBatch:
+        return _KeyValueStoreWriteBatchDict(self._store.namespace(name), self._root)
+
+
+class _KeyValueStoreIteratorDict(KeyValueStoreIterator):
+    """Iterate records of a snapshot. Rows are read from the index in chunks under the store lock."""
+
+    def __init__(
+        self,
+        store: "KeyValueStoreDict",
+        snapshot: Optional[KeyValueStoreDictSnapshot],
+        start_key: bytes = None,
+        stop_key: bytes = None,
+        include_value=True,
+        **kwargs,
+    ):
+        super().__init__(start_key, stop_key, include_value, **kwargs)
+        self._store = store
+        self._own_snapshot = snapshot is None
+        self._snapshot = store.snapshot() if snapshot is None else snapshot
+        self._cursor: Optional[bytes] = None
+        self._include_cursor = True
+        self._rows = iter(())
+        self._exhausted = False
+
+    def _seek_first(self, key: Optional[bytes]):
+        self._seek(key)
+
+    def _seek_last(self, key: Optional[bytes]):
+        self._seek(key)
+
+    def _seek(self, key: Optional[bytes]):
+        self._cursor = key
+        self._include_cursor = True
+        self._rows = iter(())
+        self._exhausted = False
+
+    def _read_next(self) -> Optional[Tuple[bytes, Optional[bytes]]]:
+        while True:
+            try:
+                return next(self._rows)
+            except StopIteration:
+                pass
+            if self._exhausted:
+                return None
+
+            rows, last_key, self._exhausted = self._store._scan(
+                self._snapshot, self._cursor, self._include_cursor, self._reverse, self._include_value
+            )
+            self._cursor, self._include_cursor = last_key, False
+            self._rows = iter(rows)
+
+    def _close(self):
+        self._rows = iter(())
+        if self._own_snapshot:
+            self._snapshot.close()
+        self._snapshot = None
 
-    def clear(self):
-        super().clear()
-        self._original_items.clear()
 
-    def close(self):
-        self._original_items: dict = None
+class KeyValueStoreDict(KeyValueStore):
+    """In-memory key-value store with an ordered key index.
+
+    A namespace is another KeyValueStoreDict which shares the lock of the parent store.
+
+    :param uri: a file path URI of the spill directory. It is used only if memory_limit is set.
+    :param memory_limit: if the size of records in memory exceeds this limit (bytes),
+        new values are spilled to a file in the spill directory. Keys are always kept in memory.
+        Each namespace has its own limit and spills to a subdirectory.
+    """
+
+    def __init__(self, uri: str = None, *, memory_limit: int = None, **kwargs):
+        self._index = SortedDict()
+        self._lock = threading.RLock()
+        self._parent: Optional[KeyValueStoreDict] = None
+        self._name = self.DEFAULT_NAMESPACE
+        self._namespaces = {}
+        self._snapshots = weakref.WeakSet()
+        self._memory_size = 0
+        self._memory_limit = memory_limit
+
+        self._spill_path: Optional[Path] = None
+        self._spill_fd: Optional[int] = None
+        self._spill_size = 0
+        if memory_limit is not None:
+            if memory_limit <= 0:
+                raise ValueError(f"memory_limit must be positive. memory_limit={memory_limit}")
+            uri_obj = urllib.parse.urlparse(uri or "")
+            if uri_obj.scheme != "file":
+                raise ValueError(f"Spilling to disk needs a file path URI (ex. file:///xxx/xxx). uri={uri}")
+            self._spill_path = Path(f"{(uri_obj.netloc if uri_obj.netloc else '')}{uri_obj.path}")
+
+    @staticmethod
+    def _entry_size(key: bytes, value) -> int:
+        return len(key) + (len(value) if isinstance(value, bytes) else 0) + _ENTRY_OVERHEAD
+
+    def memory_info(self) -> dict:
+        """Return the number of records, the size of records in memory and the size of spilled values"""
+        with self._lock:
+            return {
+                "records": len(self._index),
+                "memory_size": self._memory_size,
+                "memory_limit": self._memory_limit,
+                "spilled_size": self._spill_size,
+            }
+
+    def engine_stats(self) -> dict:
+        memory_info = self.memory_info()
+        return {
+            "engine": self.STORE_TYPE_DICT,
+            "estimated_num_keys": memory_info["records"],
+            "data_size": memory_info["memory_size"] + memory_info["spilled_size"],
+            self.STORE_TYPE_DICT: memory_info,
+        }
 
+    @_error_convert
+    def split_key_range(self, start_key: bytes = None, stop_key: bytes = None, parts: int = 2) -> List[bytes]:
+        """Return exact boundary keys found by positions of the key index"""
+        if parts <= 0:
+            raise ValueError(f"parts must be positive. parts={parts}")
+        with self._lock:
+            lower = 0 if start_key is None else self._index.bisect_left(bytes(start_key))
+            upper = len(self._index) if stop_key is None else self._index.bisect_right(bytes(stop_key))
+            count = max(upper - lower, 0)
+            positions = sorted({count * i // parts for i in range(1, parts)} - {0})
+            return [self._index.peekitem(lower + position)[0] for position in positions]
+
+    def namespace(self, name: str) -> "KeyValueStoreDict":
+        if self._parent is not None:
+            return self._parent.namespace(name)
+        if name == self.DEFAULT_NAMESPACE:
+            return self
+
+        with self._lock:
+            namespace = self._namespaces.get(name)
+            if namespace is None:
+                uri = None if self._spill_path is None else f"file://{self._spill_path.absolute() / name}"
+                namespace = KeyValueStoreDict(uri, memory_limit=self._memory_limit)
+                namespace._lock = self._lock
+                namespace._parent = self
+                namespace._name = name
+                self._namespaces[name] = namespace
+            return namespace
+
+    def _read_value(self, value) -> bytes:
+        if isinstance(value, _SpilledValue):
+            return os.pread(self._spill_fd, value.length, value.offset)
+        return value
+
+    def _make_value(self, value: bytes):
+        if self._memory_limit is None or self._memory_size + len(value) <= self._memory_limit:
+            return value
+
+        if self._spill_fd is None:
+            self._spill_path.mkdir(parents=True, exist_ok=True)
+            self._spill_fd = os.open(self._spill_path / "spill.data", os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        spilled = _SpilledValue(self._spill_size, len(value))
+        os.pwrite(self._spill_fd, value, spilled.offset)
+        self._spill_size += len(value)
+        return spilled
+
+    def _set(self, key: bytes, value: Optional[bytes]):
+        old_value = self._index.get(key, _ABSENT)
+        if old_value is _ABSENT and value is None:
+            return
 
-class KeyValueStoreDict(KeyValueStore):
-    """KeyValueStoreDict class is just for development"""
+        for snapshot in self._snapshots:
+            snapshot._save(key, old_value)
 
-    def __init__(self, **kwargs):
-        self._store_items = dict()
+        if old_value is not _ABSENT:
+            self._memory_size -= self._entry_size(key, old_value)
+        if value is None:
+            del self._index[key]
+        else:
+            value = self._make_value(value)
+            self._index[key] = value
+            self._memory_size += self._entry_size(key, value)
+
+    def _write_items(self, items: Iterable[Tuple[bytes, Optional[bytes]]]):
+        with self._lock:
+            for key, value in items:
+                self._set(key, value)
+
+    def _delete_range(self, start_key: Optional[bytes], stop_key: Optional[bytes], limit: int = None) -> List[bytes]:
+        keys = list(itertools.islice(self._index.irange(start_key, stop_key), limit))
+        for key in keys:
+            self._set(key, None)
+        return keys
+
+    def _scan(
+        self,
+        snapshot: KeyValueStoreDictSnapshot,
+        cursor: Optional[bytes],
+        include_cursor: bool,
+        reverse: bool,
+        include_value: bool,
+    ) -> Tuple[list, Optional[bytes], bool]:
+        """Read next records of the snapshot from the cursor
+
+        :return: rows, the last key read from the index and whether the end of the index has been reached
+        """
+        if reverse:
+            kwargs = {"maximum": cursor, "inclusive": (True, include_cursor), "reverse": True}
+        else:
+            kwargs = {"minimum": cursor, "inclusive": (include_cursor, True)}
+
+        with self._lock:
+            live_keys = list(itertools.islice(self._index.irange(**kwargs), _SCAN_CHUNK_SIZE))
+            saved_keys = list(itertools.islice(snapshot._saved_items.irange(**kwargs), _SCAN_CHUNK_SIZE))
+            exhausted = len(live_keys) < _SCAN_CHUNK_SIZE and len(saved_keys) < _SCAN_CHUNK_SIZE
+
+            keys = []
+            for key in heapq.merge(live_keys, saved_keys, reverse=reverse):
+                if keys and keys[-1] == key:
+                    continue
+                if len(keys) >= _SCAN_CHUNK_SIZE:
+                    exhausted = False
+                    break
+                keys.append(key)
+
+            rows = []
+            for key in keys:
+                value = snapshot._value_ref(key)
+                if value is _ABSENT:
+                    continue
+                rows.append((key, self._read_value(value) if include_value else None))
+
+        return rows, keys[-1] if keys else cursor, exhausted
+
+    def snapshot(self) -> KeyValueStoreDictSnapshot:
+        """Make a read-only view of the current records"""
+        snapshot = KeyValueStoreDictSnapshot(self)
+        with self._lock:
+            self._snapshots.add(snapshot)
+        return snapshot
+
+    def _release_snapshot(self, snapshot: KeyValueStoreDictSnapshot):
+        with self._lock:
+            self._snapshots.discard(snapshot)
 
     @_validate_args_bytes_without_first
     @_error_convert
@@ -95,52 +426,89 @@ class KeyValueStoreDict(KeyValueStore):
         if default is not None:
             _validate_args_bytes(default)
 
-        result = self._store_items.get(key, default)
+        with self._lock:
+            value = self._index.get(bytes(key), None)
+            result = default if value is None else self._read_value(value)
         if result is None:
             raise KeyError(f"Has no value of key({key})")
         return result
 
+    @_error_convert
+    def multi_get(self, keys: Iterable[bytes], *, default=None, **kwargs) -> List[Optional[bytes]]:
+        keys = _validate_keys_bytes(keys)
+        if default is not None:
+            _validate_args_bytes(default)
+
+        with self._lock:
+            values = [self._index.get(bytes(key), None) for key in keys]
+            return [default if value is None else self._read_value(value) for value in values]
+
     @_validate_args_bytes_without_first
     @_error_convert
     def put(self, key: bytes, value: bytes, *, sync=False, **kwargs):
-        self._store_items[key] = value
+        with self._lock:
+            self._set(bytes(key), bytes(value))
 
     @_validate_args_bytes_without_first
     @_error_convert
     def delete(self, key: bytes, *, sync=False, **kwargs):
-        try:
-            del self._store_items[key]
-        except KeyError:
-            pass
+        with self._lock:
+            self._set(bytes(key), None)
+
+    @_error_convert
+    def _bulk_load_chunk(self, chunk: List[Tuple[bytes, bytes]]):
+        self._write_items((bytes(key), bytes(value)) for key, value in chunk)
+
+    @_error_convert
+    def _delete_range_chunk(self, start_key: Optional[bytes], stop_key: Optional[bytes], limit: int) -> List[bytes]:
+        with self._lock:
+            return self._delete_range(start_key, stop_key, limit)
 
     @_error_convert
     def close(self):
-        if not self._store_items:
-            self._store_items = None
+        with self._lock:
+            if self._spill_fd is not None:
+                os.close(self._spill_fd)
+                self._spill_fd = None
 
     @_error_convert
     def destroy_store(self):
-        self.close()
+        with self._lock:
+            if self._parent is not None:
+                self._parent._namespaces.pop(self._name, None)
+            for namespace in list(self._namespaces.values()):
+                namespace.destroy_store()
+            self.close()
+            self._index.clear()
+            self._memory_size = 0
+            self._spill_size = 0
+            if self._spill_path is not None:
+                (self._spill_path / "spill.data").unlink(missing_ok=True)
+                if self._spill_path.exists() and not any(self._spill_path.iterdir()):
+                    self._spill_path.rmdir()
 
     @_validate_args_bytes_without_first
     @_error_convert
     def key_may_exist(self, key: bytes) -> Tuple[bool, Any]:
-        return NotImplemented
+        """Answer exactly from the key index. The value is returned if the key exists."""
+        with self._lock:
+            value = self._index.get(bytes(key))
+            return (False, None) if value is None else (True, self._read_value(value))
 
     @_error_convert
     def WriteBatch(self, sync=False) -> KeyValueStoreWriteBatch:
-        return _KeyValueStoreWriteBatchDict(self._store_items)
+        return _KeyValueStoreWriteBatchDict(self)
 
     @_error_convert
     def CancelableWriteBatch(self, sync=False) -> KeyValueStoreCancelableWriteBatch:
-        return _KeyValueStoreCancelableWriteBatchDict(self, self._store_items)
+        return KeyValueStoreCancelableWriteBatch(self, sync=sync)
 
     @_error_convert
-    def Iterator(self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs):
-        if start_key is not None or stop_key is not None:
-            raise ValueError("Unsupported arguments which are start_key and stop_key")
-
-        if include_value:
-            return self._store_items.items()
-        else:
-            return self._store_items.keys()
+    def Iterator(
+        self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs
+    ) -> KeyValueStoreIterator:
+        """Get Iterator
+
+        The iterator reads a snapshot made when it was created. Writes after that are not visible to it.
+        """
+        return _KeyValueStoreIteratorDict(self, None, start_key, stop_key, include_value, **kwargs)
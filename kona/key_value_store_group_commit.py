@@ -0,0 +1,254 @@
+"""KeyValueStoreGroupCommit merges concurrent put and delete calls into one WriteBatch.
+
+A background committer writes pending operations as a group when the commit window has passed
+or the group has reached its maximum size. Callers block until their group has been written,
+so a caller always reads its own writes. A group is written with sync=True if any of its callers asked for it.
+Writes to namespaces join the same groups, and are written with views of the batch made by namespace().
+"""
+
+import threading
+import time
+from typing import Any, Iterable, List, Optional, Tuple
+
+from kona.key_value_store import (
+    KeyValueStore,
+    KeyValueStoreCancelableWriteBatch,
+    KeyValueStoreError,
+    KeyValueStoreIterator,
+    KeyValueStoreWriteBatch,
+    _validate_args_bytes_without_first,
+)
+
+
+class _Group:
+    __slots__ = ("items", "sync", "created", "done", "error")
+
+    def __init__(self):
+        self.items = []
+        self.sync = False
+        self.created = time.perf_counter()
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class _GroupCommitStats:
+    def __init__(self):
+        self.groups = 0
+        self.operations = 0
+        self.max_group_size = 0
+        self.sync_groups = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def add(self, group: _Group, latency: float):
+        self.groups += 1
+        self.operations += len(group.items)
+        self.max_group_size = max(self.max_group_size, len(group.items))
+        self.sync_groups += 1 if group.sync else 0
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def dict(self) -> dict:
+        return {
+            "groups": self.groups,
+            "operations": self.operations,
+            "sync_groups": self.sync_groups,
+            "mean_group_size": self.operations / self.groups if self.groups else 0.0,
+            "max_group_size": self.max_group_size,
+            "mean_latency": self.total_latency / self.groups if self.groups else 0.0,
+            "max_latency": self.max_latency,
+        }
+
+
+class KeyValueStoreGroupCommit(KeyValueStore):
+    """Group commit of single-key writes in front of a KeyValueStore
+
+    :param store: a wrapped KeyValueStore instance
+    :param window: seconds to wait for more operations after the first operation of a group has arrived
+    :param max_group_size: a group is written without waiting for the window if it has this many operations
+    """
+
+    def __init__(self, store: KeyValueStore, window: float = 0.001, max_group_size: int = 1000):
+        if window < 0:
+            raise ValueError(f"window must not be negative. window={window}")
+        if max_group_size <= 0:
+            raise ValueError(f"max_group_size must be positive. max_group_size={max_group_size}")
+
+        self._store = store
+        self._window = window
+        self._max_group_size = max_group_size
+
+        self._cond = threading.Condition()
+        self._group = _Group()
+        self._stats = _GroupCommitStats()
+        self._committer: Optional[threading.Thread] = None
+        self._closed = False
+
+    @property
+    def store(self) -> KeyValueStore:
+        return self._store
+
+    def group_commit_stats(self) -> dict:
+        """Return the number of groups and operations, group sizes and commit latencies (seconds)
+
+        Latency is measured from the arrival of the first operation of a group to the end of its write.
+        """
+        with self._cond:
+            return self._stats.dict()
+
+    def _submit(self, key: bytes, value: Optional[bytes], sync: bool, namespace: str = None):
+        with self._cond:
+            if self._closed:
+                raise KeyValueStoreError("KeyValueStoreGroupCommit is already closed")
+            if self._committer is None:
+                self._committer = threading.Thread(target=self._run_committer, name="kona-group-commit", daemon=True)
+                self._committer.start()
+
+            group = self._group
+            if not group.items:
+                group.created = time.perf_counter()
+            group.items.append((namespace, key, value))
+            group.sync = group.sync or sync
+            self._cond.notify_all()
+
+        group.done.wait()
+        if group.error is not None:
+            raise group.error
+
+    def _run_committer(self):
+        while True:
+            with self._cond:
+                while not self._group.items and not self._closed:
+                    self._cond.wait()
+                if not self._group.items:
+                    return
+
+                deadline = self._group.created + self._window
+                while len(self._group.items) < self._max_group_size and not self._closed:
+                    timeout = deadline - time.perf_counter()
+                    if timeout <= 0:
+                        break
+                    self._cond.wait(timeout)
+
+                group, self._group = self._group, _Group()
+
+            self._commit(group)
+
+    def _commit(self, group: _Group):
+        try:
+            batch = self._store.WriteBatch(sync=group.sync)
+            views = {None: batch}
+            for namespace, key, value in group.items:
+                view = views.get(namespace)
+                if view is None:
+                    view = views[namespace] = batch.namespace(namespace)
+                if value is None:
+                    view.delete(key)
+                else:
+                    view.put(key, value)
+            batch.write()
+        except BaseException as e:
+            group.error = e
+        finally:
+            latency = time.perf_counter() - group.created
+            with self._cond:
+                self._stats.add(group, latency)
+            group.done.set()
+
+    @_validate_args_bytes_without_first
+    def get(self, key: bytes, *, default=None, **kwargs) -> bytes:
+        return self._store.get(key, default=default, **kwargs)
+
+    def multi_get(self, keys: Iterable[bytes], *, default=None, **kwargs) -> List[Optional[bytes]]:
+        return self._store.multi_get(keys, default=default, **kwargs)
+
+    @_validate_args_bytes_without_first
+    def put(self, key: bytes, value: bytes, *, sync=False, **kwargs):
+        self._submit(bytes(key), bytes(value), sync)
+
+    @_validate_args_bytes_without_first
+    def delete(self, key: bytes, *, sync=False, **kwargs):
+        self._submit(bytes(key), None, sync)
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None, **kwargs) -> int:
+        return self._store.delete_range(start_key, stop_key, **kwargs)
+
+    def bulk_load(self, items: Iterable[Tuple[bytes, bytes]], **kwargs) -> dict:
+        return self._store.bulk_load(items, **kwargs)
+
+    def _stop_committer(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            committer = self._committer
+        if committer is not None and committer is not threading.current_thread():
+            committer.join()
+
+    def close(self):
+        """Write pending groups, stop the committer and close the store"""
+        self._stop_committer()
+        self._store.close()
+
+    def destroy_store(self):
+        self._stop_committer()
+        self._store.destroy_store()
+
+    @_validate_args_bytes_without_first
+    def key_may_exist(self, key: bytes) -> Tuple[bool, Any]:
+        return self._store.key_may_exist(key)
+
+    def catch_up(self):
+        self._store.catch_up()
+
+    def engine_stats(self) -> dict:
+        return self._store.engine_stats()
+
+    def compact_range(self, start_key: bytes = None, stop_key: bytes = None, **kwargs) -> dict:
+        return self._store.compact_range(start_key, stop_key, **kwargs)
+
+    def checkpoint(self, path: str):
+        self._store.checkpoint(path)
+
+    def split_key_range(self, start_key: bytes = None, stop_key: bytes = None, parts: int = 2) -> List[bytes]:
+        return self._store.split_key_range(start_key, stop_key, parts)
+
+    def namespace(self, name: str) -> KeyValueStore:
+        """Return the namespace of the wrapped store. Its writes join the groups of this store."""
+        if name == self.DEFAULT_NAMESPACE:
+            return self
+        return _KeyValueStoreNamespaceGroupCommit(self, name)
+
+    def WriteBatch(self, sync=False) -> KeyValueStoreWriteBatch:
+        return self._store.WriteBatch(sync=sync)
+
+    def CancelableWriteBatch(self, sync=False) -> KeyValueStoreCancelableWriteBatch:
+        return self._store.CancelableWriteBatch(sync=sync)
+
+    def Iterator(
+        self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs
+    ) -> KeyValueStoreIterator:
+        return self._store.Iterator(start_key=start_key, stop_key=stop_key, include_value=include_value, **kwargs)
+
+
+class _KeyValueStoreNamespaceGroupCommit(KeyValueStoreGroupCommit):
+    """A namespace of KeyValueStoreGroupCommit. The committer of the parent writes its operations."""
+
+    def __init__(self, parent: KeyValueStoreGroupCommit, name: str):
+        self._parent = parent
+        self._name = name
+        self._store = parent._store.namespace(name)
+
+    def group_commit_stats(self) -> dict:
+        return self._parent.group_commit_stats()
+
+    def _submit(self, key: bytes, value: Optional[bytes], sync: bool, namespace: str = None):
+        self._parent._submit(key, value, sync, self._name)
+
+    def close(self):
+        self._store.close()
+
+    def destroy_store(self):
+        self._store.destroy_store()
+
+    def namespace(self, name: str) -> KeyValueStore:
+        return self._parent.namespace(name)
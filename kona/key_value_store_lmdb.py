@@ -1,18 +1,30 @@
 import functools
 import gc
+import multiprocessing
+import os
+import shutil
+import struct
+import threading
+import time
 import urllib.parse
 from pathlib import Path
-from typing import Any, Optional, Tuple
+from typing import Any, BinaryIO, Callable, Iterable, List, Optional, Tuple
 
 import lmdb
+from loguru import logger
 
+from kona.bloom_filter import BloomFilter
 from kona.key_value_store import (
     KeyValueStore,
     KeyValueStoreCancelableWriteBatch,
     KeyValueStoreError,
+    KeyValueStoreIterator,
     KeyValueStoreWriteBatch,
+    _key_in_range,
     _validate_args_bytes,
     _validate_args_bytes_without_first,
+    _validate_keys_bytes,
+    _validate_range_keys,
 )
 
 lmdb_exceptions = [
@@ -45,6 +57,91 @@ lmdb_exceptions = [
 ]
 
 
+# Named databases of namespaces are keys of the main database. Keys of the main database with this prefix are reserved.
+_NAMESPACE_PREFIX = b"\x01kona:"
+
+# The bloom filter is saved in this file of the environment directory when the store is closed.
+BLOOM_FILTER_FILE_NAME = "kona_bloom_filter"
+
+# The smallest capacity of a rebuilt bloom filter
+_MIN_BLOOM_FILTER_CAPACITY = 1024
+
+# compact_range() copies the environment to this subdirectory of the environment directory before the swap.
+COMPACTION_DIR_NAME = "kona_compaction"
+
+
+def _delete_range(
+    txn: lmdb.Transaction, dbi, start_key: Optional[bytes], stop_key: Optional[bytes], limit: int = None
+) -> List[bytes]:
+    """Delete records of the range with a cursor and return the deleted keys. Names of namespaces are kept."""
+    keys = []
+    with txn.cursor(db=dbi) as cursor:
+        positioned = cursor.first() if start_key is None else cursor.set_range(start_key)
+        while positioned and (limit is None or len(keys) < limit):
+            key = cursor.key()
+            if stop_key is not None and key > stop_key:
+                break
+            if dbi is None and key.startswith(_NAMESPACE_PREFIX):
+                positioned = cursor.next()
+                continue
+            keys.append(key)
+            # delete() moves the cursor to the next record. The key is empty after the last record.
+            cursor.delete()
+            positioned = bool(cursor.key())
+    return keys
+
+
+class _ConnectionWriter:
+    """A binary file object which sends what is written to the parent process in chunks"""
+
+    def __init__(self, conn, chunk_size: int = 1024 * 1024):
+        self._conn = conn
+        self._chunk_size = chunk_size
+        self._chunks = []
+        self._size = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        if self._size >= self._chunk_size:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self._chunks:
+            self._conn.send(("data", b"".join(self._chunks)))
+            self._chunks, self._size = [], 0
+
+
+def _copy_environment(store: "KeyValueStoreLMDB", conn, path: str):
+    store._db.copy(path, compact=True)
+
+
+def _export_records(store: "KeyValueStoreLMDB", conn, start_key: Optional[bytes], stop_key: Optional[bytes]) -> dict:
+    writer = _ConnectionWriter(conn)
+    stats = KeyValueStore.export(store, writer, start_key, stop_key)
+    writer.flush()
+    return stats
+
+
+def _reader_process(conn, path: str, options: dict, namespace: Optional[str], func: Callable, args: tuple):
+    """Run func with a read-only instance of the store and send ("result", result) or ("error", message)"""
+    try:
+        store = KeyValueStoreLMDB(f"file://{os.path.abspath(path)}", read_only=True, **options)
+        try:
+            result = func(store if namespace is None else store.namespace(namespace), conn, *args)
+        finally:
+            store.close()
+        conn.send(("result", result))
+    except Exception as e:
+        try:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+        except OSError:
+            pass
+    finally:
+        conn.close()
+
+
 def _error_convert(func):
     @functools.wraps(func)
     def _wrapper(*args, **kwargs):
@@ -58,66 +155,283 @@ def _error_convert(func):
     return _wrapper
 
 
+class _TransactionGate:
+    """Count active transactions of an environment, so that the map can be resized while there are none.
+
+    LMDB requires that no transactions are active in the process while set_mapsize() is called.
+    New transactions wait while the map is being resized or the data file is being swapped by compaction.
+    """
+
+    def __init__(self, timeout: float):
+        self._timeout = timeout
+        self._cond = threading.Condition()
+        self._active = 0
+        self._resizing = False
+
+    def acquire(self):
+        with self._cond:
+            while self._resizing:
+                self._cond.wait()
+            self._active += 1
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            if self._active == 0:
+                self._cond.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def pause(self, func):
+        """Run func while no transaction is active"""
+        with self._cond:
+            while self._resizing:
+                self._cond.wait()
+            self._resizing = True
+            try:
+                if not self._cond.wait_for(lambda: self._active == 0, self._timeout):
+                    raise KeyValueStoreError(
+                        f"Can't pause transactions. {self._active} transactions are still active after {self._timeout}s"
+                    )
+                func()
+            finally:
+                self._resizing = False
+                self._cond.notify_all()
+
+
+class _NullTransactionGate:
+    """Transaction gate when the map is never resized and the store is not compacted"""
+
+    def acquire(self):
+        pass
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
 class _KeyValueStoreWriteBatchLMDB(KeyValueStoreWriteBatch):
-    def __init__(self, db: lmdb.Environment):
-        self._db = db
-        self._txn = self._new_txn()
+    """Buffer operations in memory and apply them in a write transaction when write() is called.
 
-    @_error_convert
-    def _new_txn(self):
-        return self._db.begin(write=True)
+    LMDB allows only one writer per environment, so the writer lock is held only while writing.
+    Views made by namespace() share the buffer of the root batch, keyed by the named database.
+    """
+
+    def __init__(self, store: "KeyValueStoreLMDB", root: "_KeyValueStoreWriteBatchLMDB" = None):
+        self._store = store
+        self._root = self if root is None else root
+        if root is None:
+            self._batch_items = dict()
+            self._batch_ranges = dict()
+            self._count = 0
+            self._size = 0
+
+    def _items(self) -> dict:
+        return self._root._batch_items.setdefault(self._store._dbi, dict())
 
     @_validate_args_bytes_without_first
-    @_error_convert
     def put(self, key: bytes, value: bytes):
-        self._txn.put(key, value)
+        self._items()[bytes(key)] = bytes(value)
+        self._root._count += 1
+        self._root._size += len(key) + len(value)
 
     @_validate_args_bytes_without_first
-    @_error_convert
     def delete(self, key: bytes):
-        self._txn.delete(key)
+        self._items()[bytes(key)] = None
+        self._root._count += 1
+        self._root._size += len(key)
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None):
+        _validate_range_keys(start_key, stop_key)
+        items = self._items()
+        for key in [key for key in items if _key_in_range(key, start_key, stop_key)]:
+            del items[key]
+        # Ranges are deleted before the items in write(), so the items left are those put after the ranges.
+        self._root._batch_ranges.setdefault(self._store._dbi, []).append((start_key, stop_key))
+        self._root._count += 1
+        self._root._size += len(start_key or b"") + len(stop_key or b"")
 
-    @_error_convert
     def clear(self):
-        self._txn.abort()
+        self._root._batch_items.clear()
+        self._root._batch_ranges.clear()
+        self._root._count = 0
+        self._root._size = 0
 
-    @_error_convert
-    def write(self):
-        self._txn.commit()
-
-
-class _KeyValueStoreCancelableWriteBatchLMDB(KeyValueStoreCancelableWriteBatch):
-    def __init__(self, store: KeyValueStore, db: lmdb.Environment):
-        super().__init__(store)
-        self._original_items = dict()
-        self._db = db
-
-    def _touch(self, key: bytes):
-        if key in self._original_items:
-            return
+    def count(self) -> int:
+        return self._root._count
 
-        value = self._db.begin().get(key, None)
-        self._original_items[key] = value
+    def size(self) -> int:
+        return self._root._size
 
-    def _get_original_touched_item(self):
-        for key, value in self._original_items.items():
-            yield key, value
+    @_error_convert
+    def write(self):
+        operations = []
+        for dbi in {**self._root._batch_ranges, **self._root._batch_items}:
+            items = sorted(self._root._batch_items.get(dbi, {}).items())
+            put_items = [(key, value) for key, value in items if value is not None]
+            delete_keys = [key for key, value in items if value is None]
+            operations.append((dbi, self._root._batch_ranges.get(dbi, []), put_items, delete_keys))
+        main_keys = [key for dbi, _, put_items, _ in operations if dbi is None for key, _ in put_items]
+        self._store._main._run_write_txn(main_keys, self._write, operations)
+
+    def _write(self, operations: List[Tuple[Any, list, List[Tuple[bytes, bytes]], List[bytes]]]):
+        with self._store._db.begin(write=True) as txn:
+            for dbi, ranges, put_items, delete_keys in operations:
+                for start_key, stop_key in ranges:
+                    _delete_range(txn, dbi, start_key, stop_key)
+                if put_items:
+                    with txn.cursor(db=dbi) as cursor:
+                        cursor.putmulti(put_items)
+                for key in delete_keys:
+                    txn.delete(key, db=dbi)
+
+    def namespace(self, name: str) -> KeyValueStoreWriteBatch:
+        return _KeyValueStoreWriteBatchLMDB(self._store.namespace(name), self._root)
+
+
+class _KeyValueStoreIteratorLMDB(KeyValueStoreIterator):
+    """Iterate records in a read transaction which is held until the iterator is closed"""
+
+    def __init__(
+        self, store: "KeyValueStoreLMDB", start_key: bytes = None, stop_key: bytes = None, include_value=True, **kwargs
+    ):
+        super().__init__(start_key, stop_key, include_value, **kwargs)
+        self._gate = store._gate
+        self._gate.acquire()
+        try:
+            self._txn = store._db.begin(db=store._dbi)
+        except BaseException:
+            self._gate.release()
+            raise
+        self._cursor = self._txn.cursor()
+        self._rows = iter(())
+        # Names of named databases are keys of the main database.
+        self._skip_namespaces = store._dbi is None
 
-    def clear(self):
-        super().clear()
-        self._original_items.clear()
+    @_error_convert
+    def _seek_first(self, key: Optional[bytes]):
+        positioned = self._cursor.first() if key is None else self._cursor.set_range(key)
+        self._set_rows(positioned)
 
-    def close(self):
-        self._original_items: Optional[dict] = None
+    @_error_convert
+    def _seek_last(self, key: Optional[bytes]):
+        if key is None:
+            positioned = self._cursor.last()
+        elif self._cursor.set_range(key):
+            positioned = self._cursor.key() == key or self._cursor.prev()
+        else:
+            positioned = self._cursor.last()
+        self._set_rows(positioned)
+
+    def _set_rows(self, positioned: bool):
+        if not positioned:
+            # An unpositioned cursor would restart iternext() from the first record.
+            self._rows = iter(())
+        elif not self._reverse:
+            self._rows = self._cursor.iternext(keys=True, values=self._include_value)
+        else:
+            self._rows = self._cursor.iterprev(keys=True, values=self._include_value)
+
+    def _read_next(self) -> Optional[Tuple[bytes, Optional[bytes]]]:
+        while True:
+            try:
+                row = next(self._rows)
+            except StopIteration:
+                return None
+            if self._skip_namespaces and (row[0] if self._include_value else row).startswith(_NAMESPACE_PREFIX):
+                continue
+            return row if self._include_value else (row, None)
+
+    def _close(self):
+        self._rows = None
+        self._cursor.close()
+        self._txn.abort()
+        self._gate.release()
 
 
 class KeyValueStoreLMDB(KeyValueStore):
-    def __init__(self, uri: str, **kwargs):
+    """KeyValueStore of LMDB
+
+    If max_map_size is given, the map grows automatically instead of raising MapFullError.
+    The map is resized geometrically by map_growth_factor up to max_map_size, and the failed operation is retried.
+    Resizing waits for active transactions (including open iterators) of this instance up to map_resize_timeout seconds.
+
+    Readers in other processes can open the store with read_only=True. Every read transaction sees the latest
+    committed records, and readers follow the map when the writer has grown it.
+    lock=False skips the reader lock table, which is safe only if nothing writes to the store.
+
+    With bloom_bits_per_key, a bloom filter of the keys of the main database answers key_may_exist() and
+    skips the B-tree for most missing keys of get(). Keys are added to the filter before they are written, and
+    the filter is saved with the last transaction id when the store is closed. It is rebuilt from a scan of the keys
+    if the store has been written since, or if it is full. Deleted keys stay in the filter until it is rebuilt.
+    The filter needs this instance to be the only writer of the store.
+
+    The data file of LMDB never shrinks. compact_range() copies the environment with compaction and swaps the data file
+    while transactions of this instance are paused. It needs this instance to be the only writer, and readers
+    in other processes must reopen the store to see the swapped file.
+
+    :param uri: a file path URI (ex. file:///xxx/xxx)
+    :param read_only: open the environment read-only (readonly option of lmdb.Environment)
+    :param bloom_bits_per_key: keep a bloom filter of this many bits per key if given. 10 makes about 1% false positives.
+    :param compactable: allow compact_range(). Transactions are counted to be paused, which costs a lock per call.
+        It is allowed with max_map_size too.
+    :param max_map_size: the ceiling of the map size (bytes). The map never grows if None.
+    :param map_growth_factor: the map size is multiplied by this factor whenever the map is full
+    :param map_resize_timeout: seconds to wait for active transactions before resizing or swapping the data file
+    :param kwargs: options of lmdb.Environment
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        *,
+        read_only: bool = False,
+        bloom_bits_per_key: int = None,
+        compactable: bool = False,
+        max_map_size: int = None,
+        map_growth_factor: float = 2.0,
+        map_resize_timeout: float = 10.0,
+        **kwargs,
+    ):
         uri_obj = urllib.parse.urlparse(uri)
         if uri_obj.scheme != "file":
             raise ValueError(f"Support file path URI only (ex. file:///xxx/xxx). uri={uri}")
+        if map_growth_factor <= 1:
+            raise ValueError(f"map_growth_factor must be greater than 1. map_growth_factor={map_growth_factor}")
         self._path = f"{(uri_obj.netloc if uri_obj.netloc else '')}{uri_obj.path}"
+        self._read_only = read_only or kwargs.get("readonly", False)
+        if self._read_only:
+            if bloom_bits_per_key is not None:
+                raise ValueError("bloom_bits_per_key needs a writer instance. The filter can't follow other writers.")
+            kwargs["readonly"] = True
+        self._options = kwargs
         self._db = self._new_db(self._path, **kwargs)
+        self._dbi = None
+        self._namespaces = {}
+
+        self._max_map_size = max_map_size
+        self._map_growth_factor = map_growth_factor
+        self._map_resize_count = 0
+        self._last_map_resize: Optional[dict] = None
+        if max_map_size is None and not self._read_only and not compactable:
+            self._gate = _NullTransactionGate()
+        else:
+            self._gate = _TransactionGate(map_resize_timeout)
+        self._compaction_lock = threading.Lock()
+
+        self._filter: Optional[BloomFilter] = None
+        self._filter_lock = threading.RLock()
+        if bloom_bits_per_key is not None:
+            self._filter = self._load_filter(bloom_bits_per_key)
 
     @staticmethod
     def _lmdb_options(**kwargs):
@@ -148,40 +462,388 @@ class KeyValueStoreLMDB(KeyValueStore):
     def _new_db(self, path, **kwargs) -> lmdb.Environment:
         return lmdb.Environment(path, **KeyValueStoreLMDB._lmdb_options(**kwargs))
 
+    def _run_txn(self, func, *args):
+        """Run a function which makes a transaction. Retry it after the map has grown if the map is full."""
+        while True:
+            try:
+                with self._gate:
+                    return func(*args)
+            except lmdb.MapFullError:
+                if not self._grow_map():
+                    raise
+            except lmdb.MapResizedError:
+                # Another process has grown the map.
+                if isinstance(self._gate, _NullTransactionGate):
+                    raise
+                self._gate.pause(lambda: self._db.set_mapsize(0))
+
+    def _grow_map(self) -> bool:
+        """Grow the map geometrically. Return False if the map has reached max_map_size."""
+        if self._max_map_size is None:
+            return False
+
+        map_size = self._db.info()["map_size"]
+        if map_size >= self._max_map_size:
+            return False
+
+        def _resize():
+            current_map_size = self._db.info()["map_size"]
+            if current_map_size > map_size:
+                # Another thread has already grown the map.
+                return
+
+            new_map_size = min(int(current_map_size * self._map_growth_factor), self._max_map_size)
+            start = time.perf_counter()
+            self._db.set_mapsize(new_map_size)
+            self._map_resize_count += 1
+            self._last_map_resize = {
+                "old_map_size": current_map_size,
+                "new_map_size": new_map_size,
+                "elapsed": time.perf_counter() - start,
+            }
+            logger.info(f"LMDB map has grown. path={self._path}, {self._last_map_resize}")
+
+        self._gate.pause(_resize)
+        return True
+
+    @property
+    def _main(self) -> "KeyValueStoreLMDB":
+        """The store of the main database"""
+        return self
+
+    def _filter_path(self) -> Path:
+        return Path(self._path) / BLOOM_FILTER_FILE_NAME
+
+    def _load_filter(self, bits_per_key: int) -> BloomFilter:
+        """Load the filter saved by close(). Rebuild it if it is missing, stale or made with other bits_per_key."""
+        try:
+            data = self._filter_path().read_bytes()
+            last_txnid = struct.unpack_from("<Q", data)[0]
+            bloom_filter = BloomFilter.from_bytes(data[8:])
+            if last_txnid == self._db.info()["last_txnid"] and bloom_filter.bits_per_key == bits_per_key:
+                return bloom_filter
+            logger.info(f"Bloom filter is stale. It will be rebuilt. path={self._path}")
+        except FileNotFoundError:
+            pass
+        except (ValueError, struct.error) as e:
+            logger.warning(f"Bloom filter is broken. It will be rebuilt. path={self._path}, e={e}")
+        return self._build_filter(bits_per_key, _MIN_BLOOM_FILTER_CAPACITY)
+
+    def _build_filter(self, bits_per_key: int, min_capacity: int) -> BloomFilter:
+        start = time.perf_counter()
+        count = self._run_txn(self._count_entries)
+        bloom_filter = BloomFilter(max(2 * count, min_capacity), bits_per_key)
+        self._run_txn(self._add_keys_to_filter, bloom_filter)
+        logger.info(
+            f"Bloom filter has been built. path={self._path}, keys={count}, capacity={bloom_filter.capacity}, "
+            f"elapsed={time.perf_counter() - start:.3f}"
+        )
+        return bloom_filter
+
+    def _add_keys_to_filter(self, bloom_filter: BloomFilter):
+        with self._db.begin() as txn:
+            bloom_filter.update(txn.cursor().iternext(values=False))
+
+    def _save_filter(self):
+        path = self._filter_path()
+        temp_path = path.with_name(f"{path.name}.tmp")
+        temp_path.write_bytes(struct.pack("<Q", self._db.info()["last_txnid"]) + self._filter.to_bytes())
+        os.replace(temp_path, path)
+
+    def _run_write_txn(self, keys: List[bytes], func, *args):
+        """Run a function which makes a write transaction of the main database.
+
+        keys are added to the bloom filter before the transaction, so that get() never misses a written key.
+        """
+        if self._filter is None or not keys:
+            return self._run_txn(func, *args)
+
+        with self._filter_lock:
+            self._filter.update(keys)
+            result = self._run_txn(func, *args)
+            if self._filter.count > self._filter.capacity:
+                self._filter = self._build_filter(self._filter.bits_per_key, self._filter.capacity * 2)
+            return result
+
+    def bloom_filter_info(self) -> Optional[dict]:
+        """Return BloomFilter.info() of the bloom filter or None if the store has no filter"""
+        return self._filter.info() if self._filter is not None else None
+
+    def map_size_info(self) -> dict:
+        """Return the current map size, the ceiling and the resize metrics"""
+        return {
+            "map_size": self._db.info()["map_size"],
+            "max_map_size": self._max_map_size,
+            "resize_count": self._map_resize_count,
+            "last_resize": self._last_map_resize,
+        }
+
+    def _readers(self) -> List[dict]:
+        """Parse the reader lock table of mdb_reader_list()"""
+        readers = []
+        for line in self._db.readers().splitlines()[1:]:
+            fields = line.split()
+            if len(fields) == 3:
+                # txnid is "-" for a reader slot without an active transaction
+                txnid = int(fields[2]) if fields[2].isdigit() else None
+                readers.append({"pid": int(fields[0]), "thread": fields[1], "txnid": txnid})
+        return readers
+
+    @_error_convert
+    def engine_stats(self) -> dict:
+        stat = self._db.stat()
+        info = self._db.info()
+        return {
+            "engine": self.STORE_TYPE_LMDB,
+            "estimated_num_keys": stat["entries"],
+            "data_size": (info["last_pgno"] + 1) * stat["psize"],
+            self.STORE_TYPE_LMDB: {
+                "stat": stat,
+                "info": info,
+                "readers": self._readers(),
+                "reader_usage": info["num_readers"] / info["max_readers"],
+                "map_usage": (info["last_pgno"] + 1) * stat["psize"] / info["map_size"],
+                "map_size_info": self.map_size_info(),
+                "bloom_filter": self.bloom_filter_info(),
+            },
+        }
+
+    @_error_convert
+    def split_key_range(self, start_key: bytes = None, stop_key: bytes = None, parts: int = 2) -> List[bytes]:
+        """Return boundary keys of the key range.
+
+        The number of records of a whole database is taken from its statistics, so the keys are walked once.
+        """
+        if start_key is not None or stop_key is not None:
+            return super().split_key_range(start_key, stop_key, parts)
+        if parts <= 0:
+            raise ValueError(f"parts must be positive. parts={parts}")
+        return self._nth_keys(None, None, parts, self._run_txn(self._count_entries))
+
+    def _count_entries(self) -> int:
+        with self._db.begin(db=self._dbi) as txn:
+            if self._dbi is not None:
+                return txn.stat(self._dbi)["entries"]
+            # The main database has a record for every namespace.
+            count = self._db.stat()["entries"]
+            cursor = txn.cursor()
+            if cursor.set_range(_NAMESPACE_PREFIX):
+                for key in cursor.iternext(values=False):
+                    if not key.startswith(_NAMESPACE_PREFIX):
+                        break
+                    count -= 1
+            return count
+
     @_validate_args_bytes_without_first
     @_error_convert
     def get(self, key: bytes, *, default=None, **kwargs) -> bytes:
         if default is not None:
             _validate_args_bytes(default)
 
-        with self._db.begin() as txn:
-            result = txn.get(key, default)
-            if result is None:
-                raise KeyError(f"Has no value of key({key})")
-            return result
+        if self._filter is not None and not self._filter.may_contain(bytes(key)):
+            result = default
+        else:
+            result = self._run_txn(self._get, key, default)
+        if result is None:
+            raise KeyError(f"Has no value of key({key})")
+        return result
+
+    def _get(self, key: bytes, default: Optional[bytes]) -> Optional[bytes]:
+        with self._db.begin(db=self._dbi) as txn:
+            return txn.get(key, default)
+
+    @_error_convert
+    def multi_get(self, keys: Iterable[bytes], *, default=None, **kwargs) -> List[Optional[bytes]]:
+        keys = _validate_keys_bytes(keys)
+        if default is not None:
+            _validate_args_bytes(default)
+
+        if self._filter is None:
+            return self._run_txn(self._multi_get, keys, default)
+
+        results = [default] * len(keys)
+        indexes = [i for i, key in enumerate(keys) if self._filter.may_contain(bytes(key))]
+        if indexes:
+            values = self._run_txn(self._multi_get, [keys[i] for i in indexes], default)
+            for i, value in zip(indexes, values):
+                results[i] = value
+        return results
+
+    def _multi_get(self, keys: List[bytes], default: Optional[bytes]) -> List[Optional[bytes]]:
+        with self._db.begin(db=self._dbi) as txn:
+            return [txn.get(key, default) for key in keys]
 
     @_validate_args_bytes_without_first
     @_error_convert
     def put(self, key: bytes, value: bytes, *, sync=False, **kwargs):
-        with self._db.begin(write=True) as txn:
+        self._run_write_txn([bytes(key)], self._put, key, value)
+
+    def _put(self, key: bytes, value: bytes):
+        with self._db.begin(write=True, db=self._dbi) as txn:
             txn.put(key, value)
 
     @_validate_args_bytes_without_first
     @_error_convert
     def delete(self, key: bytes, *, sync=False, **kwargs):
-        with self._db.begin(write=True) as txn:
+        self._run_txn(self._delete, key)
+
+    def _delete(self, key: bytes):
+        with self._db.begin(write=True, db=self._dbi) as txn:
             txn.delete(key)
 
+    @_error_convert
+    def _delete_range_chunk(self, start_key: Optional[bytes], stop_key: Optional[bytes], limit: int) -> List[bytes]:
+        # Each chunk is a write transaction, so the writer lock is released between chunks.
+        return self._run_txn(self._delete_range_txn, start_key, stop_key, limit)
+
+    def _delete_range_txn(self, start_key: Optional[bytes], stop_key: Optional[bytes], limit: int) -> List[bytes]:
+        with self._db.begin(write=True) as txn:
+            return _delete_range(txn, self._dbi, start_key, stop_key, limit)
+
+    def _compaction_slices(
+        self, start_key: Optional[bytes], stop_key: Optional[bytes]
+    ) -> List[Tuple[Optional[bytes], Optional[bytes]]]:
+        if self._read_only:
+            raise KeyValueStoreError("A read-only instance can't compact the store")
+        if isinstance(self._gate, _NullTransactionGate):
+            raise KeyValueStoreError("Compaction swaps the data file. Open the store with compactable=True")
+        # LMDB compacts the whole file, so the range is ignored.
+        return [(None, None)]
+
+    @_error_convert
+    def _compact_slice(self, start_key: Optional[bytes], stop_key: Optional[bytes]):
+        with self._compaction_lock:
+            temp_path = Path(self._path) / COMPACTION_DIR_NAME
+            shutil.rmtree(temp_path, ignore_errors=True)
+            temp_path.mkdir()
+            try:
+                # The first copy doesn't pause transactions. It is made again while they are paused
+                # only if the store has been written during the copy.
+                last_txnid = self._db.info()["last_txnid"]
+                self._run_txn(functools.partial(self._db.copy, str(temp_path), compact=True))
+                self._gate.pause(functools.partial(self._swap_data_file, temp_path, last_txnid))
+            finally:
+                shutil.rmtree(temp_path, ignore_errors=True)
+
+    def _swap_data_file(self, temp_path: Path, last_txnid: int):
+        if self._db.info()["last_txnid"] != last_txnid:
+            (temp_path / "data.mdb").unlink()
+            self._db.copy(str(temp_path), compact=True)
+
+        map_size = self._db.info()["map_size"]
+        self._db.close()
+        os.replace(temp_path / "data.mdb", Path(self._path) / "data.mdb")
+        self._db = self._new_db(self._path, **{**self._options, "map_size": map_size})
+        for namespace in self._namespaces.values():
+            namespace._dbi = self._db.open_db(_NAMESPACE_PREFIX + namespace._name.encode(), create=False)
+
+    @_error_convert
+    def _bulk_load_chunk(self, chunk: List[Tuple[bytes, bytes]]):
+        self._run_write_txn([key for key, _ in chunk], self._putmulti, chunk, False)
+
+    @_error_convert
+    def _bulk_load_sorted_chunk(self, chunk: List[Tuple[bytes, bytes]]):
+        self._run_write_txn([key for key, _ in chunk], self._putmulti, chunk, True)
+
+    def _putmulti(self, chunk: List[Tuple[bytes, bytes]], is_sorted: bool):
+        with self._db.begin(write=True, db=self._dbi) as txn:
+            with txn.cursor() as cursor:
+                # Appending is possible only if all keys are greater than the last key of the store.
+                append = is_sorted and (not cursor.last() or cursor.key() < chunk[0][0])
+                cursor.putmulti(chunk, append=append)
+
+    @_error_convert
+    def namespace(self, name: str) -> "KeyValueStoreLMDB":
+        """Return a named database. The environment must be opened with the max_dbs option."""
+        if name == self.DEFAULT_NAMESPACE:
+            return self
+
+        namespace = self._namespaces.get(name)
+        if namespace is None:
+            dbi = self._run_txn(
+                functools.partial(self._db.open_db, _NAMESPACE_PREFIX + name.encode(), create=not self._read_only)
+            )
+            namespace = self._namespaces[name] = _KeyValueStoreNamespaceLMDB(self, name, dbi)
+        return namespace
+
     @_error_convert
     def close(self):
         if self._db:
+            self._namespaces.clear()
+            if self._filter is not None:
+                with self._filter_lock:
+                    self._save_filter()
             self._db.close()
             gc.collect()
             self._db = None
 
+    def _run_in_reader(self, func: Callable, *args, on_data: Callable[[bytes], None] = None):
+        """Run func(store, conn, *args) in a process with a read-only instance of the store and return its result.
+
+        A read transaction of another process doesn't hold the transaction gate of this instance,
+        so the map can grow and the data file can be swapped while a long copy or scan runs.
+        """
+        context = multiprocessing.get_context("spawn")
+        receiver, sender = context.Pipe(duplex=False)
+        options = {
+            name: value
+            for name, value in self._lmdb_options(**self._main._options).items()
+            if name in ("subdir", "max_dbs", "max_readers")
+        }
+        namespace = None if self._main is self else self._name
+        process = context.Process(
+            target=_reader_process, args=(sender, self._path, options, namespace, func, args), daemon=True
+        )
+        process.start()
+        sender.close()
+        try:
+            while True:
+                try:
+                    kind, payload = receiver.recv()
+                except EOFError:
+                    process.join()
+                    raise KeyValueStoreError(f"The reader process has exited. exitcode={process.exitcode}")
+                if kind == "data":
+                    on_data(payload)
+                elif kind == "error":
+                    raise KeyValueStoreError(f"The reader process has failed. {payload}")
+                else:
+                    return payload
+        finally:
+            receiver.close()
+            process.join()
+
+    @_error_convert
+    def checkpoint(self, path: str):
+        """Copy the environment with compaction in one read transaction. Writers are not blocked.
+
+        If the map can grow or the store is compactable, the copy is made by a read-only instance in another process,
+        so that a map growth or a compaction doesn't wait for the copy.
+        A checkpoint of a namespace is a checkpoint of the whole store. The bloom filter is rebuilt when the copy is opened.
+        """
+        Path(path).mkdir(parents=True, exist_ok=True)
+        if isinstance(self._gate, _NullTransactionGate):
+            self._run_txn(functools.partial(self._db.copy, str(path), compact=True))
+        else:
+            self._run_in_reader(_copy_environment, str(path))
+
+    def export(self, fileobj: BinaryIO, start_key: bytes = None, stop_key: bytes = None) -> dict:
+        """Write records of the key range to a binary file object in the streaming format of kona.export.
+
+        If the map can grow or the store is compactable, records are read by a read-only instance in another process
+        as checkpoint() does, and sent to this process.
+        """
+        if isinstance(self._gate, _NullTransactionGate):
+            return super().export(fileobj, start_key, stop_key)
+        _validate_range_keys(start_key, stop_key)
+        return self._run_in_reader(_export_records, start_key, stop_key, on_data=fileobj.write)
+
     @_error_convert
     def destroy_store(self):
+        """Close and remove the store. A read-only instance is closed only."""
         self.close()
+        if self._read_only:
+            return
 
         def rm_tree(path: Path):
             for child in path.iterdir():
@@ -196,34 +858,104 @@ class KeyValueStoreLMDB(KeyValueStore):
     @_validate_args_bytes_without_first
     @_error_convert
     def key_may_exist(self, key: bytes) -> Tuple[bool, Any]:
-        return NotImplemented
+        """Answer with the bloom filter. NotImplemented is returned if the store has no filter."""
+        if self._filter is None:
+            return NotImplemented
+        return self._filter.may_contain(bytes(key)), None
 
     @_error_convert
     def WriteBatch(self, sync=False) -> KeyValueStoreWriteBatch:
-        return _KeyValueStoreWriteBatchLMDB(self._db)
+        return _KeyValueStoreWriteBatchLMDB(self)
 
     @_error_convert
     def CancelableWriteBatch(self, sync=False) -> KeyValueStoreCancelableWriteBatch:
-        return _KeyValueStoreCancelableWriteBatchLMDB(self, self._db)
+        return KeyValueStoreCancelableWriteBatch(self, sync=sync)
 
     @_error_convert
-    def Iterator(self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs):
+    def Iterator(
+        self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs
+    ) -> KeyValueStoreIterator:
         """Get Iterator
 
+        The iterator holds a read transaction until it is exhausted or closed.
+        The map can't be resized while the transaction is held.
+
         :param start_key:
         :param stop_key:
-        :param include_value:  # This parameter is not handled in lmdb
-        :param kwargs:  # This parameter is not handled in lmdb
+        :param include_value: If False, iterate keys only with lmdb iternext(values=False).
+        :param kwargs: prefix, reverse, include_start, include_stop and resume_token
         :return:
         """
         if "start" in kwargs or "stop" in kwargs:
             raise ValueError("Use start_key and stop_key arguments instead of start and stop arguments")
 
+        return _KeyValueStoreIteratorLMDB(self, start_key, stop_key, include_value, **kwargs)
+
+
+class _KeyValueStoreNamespaceLMDB(KeyValueStoreLMDB):
+    """A named database of KeyValueStoreLMDB. It shares the environment and the map growth of the parent.
+
+    The bloom filter of the parent covers the main database only.
+    """
+
+    _filter = None
+
+    def __init__(self, parent: KeyValueStoreLMDB, name: str, dbi):
+        self._parent = parent
+        self._name = name
+        self._dbi = dbi
+        self._path = parent._path
+
+    @property
+    def _db(self) -> lmdb.Environment:
+        if self._parent._db is None:
+            raise KeyValueStoreError(f"The store of the namespace is closed. namespace={self._name}")
+        return self._parent._db
+
+    @property
+    def _gate(self):
+        return self._parent._gate
+
+    @property
+    def _read_only(self) -> bool:
+        return self._parent._read_only
+
+    @property
+    def _main(self) -> KeyValueStoreLMDB:
+        return self._parent
+
+    def _run_txn(self, func, *args):
+        return self._parent._run_txn(func, *args)
+
+    def map_size_info(self) -> dict:
+        return self._parent.map_size_info()
+
+    def compact_range(self, start_key: bytes = None, stop_key: bytes = None, **kwargs) -> dict:
+        """Compact the whole environment"""
+        return self._parent.compact_range(start_key, stop_key, **kwargs)
+
+    def namespace(self, name: str) -> KeyValueStoreLMDB:
+        return self._parent.namespace(name)
+
+    @_error_convert
+    def engine_stats(self) -> dict:
+        stats = self._parent.engine_stats()
         with self._db.begin() as txn:
-            with txn.cursor() as cursor:
-                cursor.set_range(start_key or b"")
+            stat = txn.stat(self._dbi)
+        stats["estimated_num_keys"] = stat["entries"]
+        stats["data_size"] = (stat["branch_pages"] + stat["leaf_pages"] + stat["overflow_pages"]) * stat["psize"]
+        stats[self.STORE_TYPE_LMDB]["stat"] = stat
+        return stats
+
+    def close(self):
+        pass
 
-                for key, value in cursor:
-                    yield key, value
-                    if stop_key and stop_key == key:
-                        return
+    @_error_convert
+    def destroy_store(self):
+        """Drop the named database"""
+        self._parent._namespaces.pop(self._name, None)
+        self._run_txn(self._drop)
+
+    def _drop(self):
+        with self._db.begin(write=True) as txn:
+            txn.drop(self._dbi, delete=True)
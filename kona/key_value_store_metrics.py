@@ -0,0 +1,449 @@
+"""KeyValueStoreMetrics records per-operation metrics of a KeyValueStore.
+
+Wrap a store with KeyValueStoreInstrumented (or KeyValueStore.new(..., metrics=True)) to record counters,
+latency histograms, bytes read and written, batch sizes and iterator rows. Stores that are not wrapped pay nothing.
+
+Events are also passed to sinks: callbacks given to KeyValueStoreMetrics and loguru
+(TRACE level, if KONA_LOG_ENABLE_LOGGER is set).
+"""
+
+import threading
+import time
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from kona.config import settings
+from kona.key_value_store import (
+    KeyValueStore,
+    KeyValueStoreCancelableWriteBatch,
+    KeyValueStoreIterator,
+    KeyValueStoreWriteBatch,
+)
+
+# Upper bounds of latency buckets (seconds): 1us, 2us, 4us, ... about 67s and the overflow bucket
+LATENCY_BUCKETS = tuple(2**i / 1_000_000 for i in range(27))
+# Upper bounds of batch size and iterator row buckets: 1, 2, 4, ... 2**20 and the overflow bucket
+ITEM_BUCKETS = tuple(2**i for i in range(21))
+
+
+class KeyValueStoreMetricEvent(NamedTuple):
+    """An event of one operation
+
+    :param op: get, multi_get, put, delete, delete_range, key_may_exist, bulk_load, compact_range, write_batch,
+        cancelable_write_batch, cancel_write_batch, rollback_write_batch or iterator
+    :param latency: seconds
+    :param bytes: bytes read or written
+    :param items: keys, batched operations or iterator rows of the operation
+    :param error: an exception raised by the operation
+    """
+
+    op: str
+    latency: float
+    bytes: int
+    items: int
+    error: Optional[BaseException]
+
+
+def _bucket_index(buckets: Sequence, value) -> int:
+    # Buckets are powers of two, so a short linear scan from the bottom is cheaper than bisect for typical values
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            return i
+    return len(buckets)
+
+
+def _histogram_percentile(histogram: List[int], bounds: Sequence, count: int, ratio: float) -> float:
+    """Return the upper bound of the bucket holding the percentile"""
+    if count == 0:
+        return 0.0
+
+    rank = ratio * count
+    accumulated = 0
+    for i, bucket_count in enumerate(histogram):
+        accumulated += bucket_count
+        if accumulated >= rank:
+            return bounds[i] if i < len(bounds) else float("inf")
+    return float("inf")
+
+
+class _OperationStats:
+    __slots__ = (
+        "count",
+        "errors",
+        "latency_sum",
+        "latency_max",
+        "bytes",
+        "items",
+        "latency_histogram",
+        "item_histogram",
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.bytes = 0
+        self.items = 0
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.item_histogram = [0] * (len(ITEM_BUCKETS) + 1)
+
+    def add(self, latency: float, nbytes: int, items: int, error: Optional[BaseException]):
+        self.count += 1
+        if error is not None:
+            self.errors += 1
+        self.latency_sum += latency
+        if latency > self.latency_max:
+            self.latency_max = latency
+        self.bytes += nbytes
+        self.items += items
+        self.latency_histogram[_bucket_index(LATENCY_BUCKETS, latency)] += 1
+        self.item_histogram[_bucket_index(ITEM_BUCKETS, items)] += 1
+
+    def dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "items": self.items,
+            "latency_sum": self.latency_sum,
+            "latency_mean": self.latency_sum / self.count if self.count else 0.0,
+            "latency_max": self.latency_max,
+            "latency_p50": _histogram_percentile(self.latency_histogram, LATENCY_BUCKETS, self.count, 0.50),
+            "latency_p99": _histogram_percentile(self.latency_histogram, LATENCY_BUCKETS, self.count, 0.99),
+            "latency_p999": _histogram_percentile(self.latency_histogram, LATENCY_BUCKETS, self.count, 0.999),
+            "latency_histogram": list(self.latency_histogram),
+            "item_histogram": list(self.item_histogram),
+        }
+
+
+def _log_sink(event: KeyValueStoreMetricEvent):
+    logger.trace(
+        "op={} latency={:.6f} bytes={} items={} error={!r}",
+        event.op,
+        event.latency,
+        event.bytes,
+        event.items,
+        event.error,
+    )
+
+
+class KeyValueStoreMetrics:
+    """Thread-safe collector of KeyValueStoreMetricEvent
+
+    :param callbacks: functions called with each KeyValueStoreMetricEvent
+    :param log: log each event with loguru. settings.KONA_LOG_ENABLE_LOGGER if None
+    """
+
+    def __init__(self, callbacks: Iterable[Callable[[KeyValueStoreMetricEvent], Any]] = (), log: bool = None):
+        if log is None:
+            log = settings.KONA_LOG_ENABLE_LOGGER
+
+        self._sinks = list(callbacks)
+        if log:
+            self._sinks.append(_log_sink)
+        self._operations = {}
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    def add_callback(self, callback: Callable[[KeyValueStoreMetricEvent], Any]):
+        self._sinks.append(callback)
+
+    def record(self, op: str, latency: float, nbytes: int = 0, items: int = 1, error: BaseException = None):
+        with self._lock:
+            stats = self._operations.get(op)
+            if stats is None:
+                stats = self._operations[op] = _OperationStats()
+            stats.add(latency, nbytes, items, error)
+
+        if self._sinks:
+            event = KeyValueStoreMetricEvent(op, latency, nbytes, items, error)
+            for sink in self._sinks:
+                sink(event)
+
+    def stats(self, reset: bool = False) -> dict:
+        """Return metrics of each operation. Latencies are seconds and percentiles are upper bounds of buckets
+
+        :param reset: start new counters after taking the stats
+        """
+        with self._lock:
+            result = {
+                "started": self._started,
+                "operations": {op: stats.dict() for op, stats in self._operations.items()},
+            }
+            if reset:
+                self._operations = {}
+                self._started = time.time()
+        return result
+
+
+class _MeasuredCall:
+    """Measure one call and record an error if it raised"""
+
+    __slots__ = ("_metrics", "_op", "_start", "_done")
+
+    def __init__(self, metrics: KeyValueStoreMetrics, op: str):
+        self._metrics = metrics
+        self._op = op
+        self._start = 0.0
+        self._done = False
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None and not self._done:
+            self._done = True
+            self._metrics.record(self._op, time.perf_counter() - self._start, error=exc_val)
+
+    def done(self, nbytes: int = 0, items: int = 1):
+        self._done = True
+        self._metrics.record(self._op, time.perf_counter() - self._start, nbytes, items)
+
+
+class _KeyValueStoreWriteBatchMetrics(KeyValueStoreWriteBatch):
+    def __init__(self, batch: KeyValueStoreWriteBatch, metrics: KeyValueStoreMetrics):
+        self._batch = batch
+        self._metrics = metrics
+
+    def put(self, key: bytes, value: bytes):
+        self._batch.put(key, value)
+
+    def delete(self, key: bytes):
+        self._batch.delete(key)
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None):
+        self._batch.delete_range(start_key, stop_key)
+
+    def clear(self):
+        self._batch.clear()
+
+    def count(self) -> int:
+        return self._batch.count()
+
+    def size(self) -> int:
+        return self._batch.size()
+
+    def write(self):
+        count, size = self._batch.count(), self._batch.size()
+        with _MeasuredCall(self._metrics, "write_batch") as call:
+            self._batch.write()
+        call.done(size, count)
+
+    def namespace(self, name: str) -> KeyValueStoreWriteBatch:
+        return _KeyValueStoreWriteBatchMetrics(self._batch.namespace(name), self._metrics)
+
+
+class _KeyValueStoreCancelableWriteBatchMetrics(KeyValueStoreCancelableWriteBatch):
+    def __init__(self, batch: KeyValueStoreCancelableWriteBatch, metrics: KeyValueStoreMetrics):
+        # The wrapped batch does the work, so the base class initializer is not called.
+        self._cancelable_batch = batch
+        self._metrics = metrics
+
+    def put(self, key: bytes, value: bytes):
+        self._cancelable_batch.put(key, value)
+
+    def delete(self, key: bytes):
+        self._cancelable_batch.delete(key)
+
+    def clear(self):
+        self._cancelable_batch.clear()
+
+    def count(self) -> int:
+        return self._cancelable_batch.count()
+
+    def size(self) -> int:
+        return self._cancelable_batch.size()
+
+    def write(self):
+        count, size = self._cancelable_batch.count(), self._cancelable_batch.size()
+        with _MeasuredCall(self._metrics, "cancelable_write_batch") as call:
+            self._cancelable_batch.write()
+        call.done(size, count)
+
+    def cancel(self):
+        count = self._cancelable_batch.count()
+        with _MeasuredCall(self._metrics, "cancel_write_batch") as call:
+            self._cancelable_batch.cancel()
+        call.done(0, count)
+
+    def close(self):
+        self._cancelable_batch.close()
+
+    def savepoint(self) -> int:
+        return self._cancelable_batch.savepoint()
+
+    def rollback_to(self, savepoint: int):
+        count = self._cancelable_batch.count() - savepoint
+        with _MeasuredCall(self._metrics, "rollback_write_batch") as call:
+            self._cancelable_batch.rollback_to(savepoint)
+        call.done(0, count)
+
+
+class _KeyValueStoreIteratorMetrics:
+    """Count rows and bytes of an iterator and record them when it is closed or exhausted"""
+
+    def __init__(self, iterator: KeyValueStoreIterator, metrics: KeyValueStoreMetrics):
+        self._iterator = iterator
+        self._metrics = metrics
+        self._latency = 0.0
+        self._rows = 0
+        self._bytes = 0
+        self._recorded = False
+
+    def __getattr__(self, name):
+        return getattr(self._iterator, name)
+
+    def _count(self, row):
+        self._rows += 1
+        if isinstance(row, tuple):
+            self._bytes += len(row[0]) + (len(row[1]) if row[1] is not None else 0)
+        else:
+            self._bytes += len(row)
+
+    def _record(self):
+        if not self._recorded:
+            self._recorded = True
+            self._metrics.record("iterator", self._latency, self._bytes, self._rows)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = next(self._iterator)
+        except StopIteration:
+            self._latency += time.perf_counter() - start
+            self._record()
+            raise
+        self._latency += time.perf_counter() - start
+        self._count(row)
+        return row
+
+    def next_n(self, n: int) -> list:
+        start = time.perf_counter()
+        rows = self._iterator.next_n(n)
+        self._latency += time.perf_counter() - start
+        for row in rows:
+            self._count(row)
+        return rows
+
+    def close(self):
+        self._iterator.close()
+        self._record()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class KeyValueStoreInstrumented(KeyValueStore):
+    """Record metrics of a wrapped KeyValueStore
+
+    A KeyError of get() is a normal miss and is not counted as an error.
+
+    :param store: a wrapped KeyValueStore instance
+    :param metrics: a collector. A new KeyValueStoreMetrics if None
+    """
+
+    def __init__(self, store: KeyValueStore, metrics: KeyValueStoreMetrics = None):
+        self._store = store
+        self._metrics = metrics if metrics is not None else KeyValueStoreMetrics()
+
+    @property
+    def store(self) -> KeyValueStore:
+        return self._store
+
+    @property
+    def metrics(self) -> KeyValueStoreMetrics:
+        return self._metrics
+
+    def stats(self, reset: bool = False) -> dict:
+        return self._metrics.stats(reset=reset)
+
+    def get(self, key: bytes, *, default=None, **kwargs) -> bytes:
+        with _MeasuredCall(self._metrics, "get") as call:
+            try:
+                value = self._store.get(key, default=default, **kwargs)
+            except KeyError:
+                call.done(0)
+                raise
+        call.done(len(value))
+        return value
+
+    def multi_get(self, keys: Iterable[bytes], *, default=None, **kwargs) -> List[Optional[bytes]]:
+        with _MeasuredCall(self._metrics, "multi_get") as call:
+            values = self._store.multi_get(keys, default=default, **kwargs)
+        call.done(sum(len(value) for value in values if value is not None), len(values))
+        return values
+
+    def put(self, key: bytes, value: bytes, *, sync=False, **kwargs):
+        with _MeasuredCall(self._metrics, "put") as call:
+            self._store.put(key, value, sync=sync, **kwargs)
+        call.done(len(key) + len(value))
+
+    def delete(self, key: bytes, *, sync=False, **kwargs):
+        with _MeasuredCall(self._metrics, "delete") as call:
+            self._store.delete(key, sync=sync, **kwargs)
+        call.done(len(key))
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None, **kwargs) -> int:
+        with _MeasuredCall(self._metrics, "delete_range") as call:
+            count = self._store.delete_range(start_key, stop_key, **kwargs)
+        call.done(0, count)
+        return count
+
+    def bulk_load(self, items: Iterable[Tuple[bytes, bytes]], **kwargs) -> dict:
+        with _MeasuredCall(self._metrics, "bulk_load") as call:
+            result = self._store.bulk_load(items, **kwargs)
+        call.done(result["bytes"], result["count"])
+        return result
+
+    def close(self):
+        self._store.close()
+
+    def destroy_store(self):
+        self._store.destroy_store()
+
+    def key_may_exist(self, key: bytes) -> Tuple[bool, Any]:
+        with _MeasuredCall(self._metrics, "key_may_exist") as call:
+            result = self._store.key_may_exist(key)
+        call.done(0)
+        return result
+
+    def namespace(self, name: str) -> KeyValueStore:
+        """Return the namespace of the wrapped store. Its metrics are recorded to the same collector."""
+        return KeyValueStoreInstrumented(self._store.namespace(name), self._metrics)
+
+    def catch_up(self):
+        self._store.catch_up()
+
+    def engine_stats(self) -> dict:
+        return self._store.engine_stats()
+
+    def compact_range(self, start_key: bytes = None, stop_key: bytes = None, **kwargs) -> dict:
+        with _MeasuredCall(self._metrics, "compact_range") as call:
+            result = self._store.compact_range(start_key, stop_key, **kwargs)
+        call.done(0, result["slices"])
+        return result
+
+    def checkpoint(self, path: str):
+        self._store.checkpoint(path)
+
+    def split_key_range(self, start_key: bytes = None, stop_key: bytes = None, parts: int = 2) -> List[bytes]:
+        return self._store.split_key_range(start_key, stop_key, parts)
+
+    def WriteBatch(self, sync=False) -> KeyValueStoreWriteBatch:
+        return _KeyValueStoreWriteBatchMetrics(self._store.WriteBatch(sync=sync), self._metrics)
+
+    def CancelableWriteBatch(self, sync=False) -> KeyValueStoreCancelableWriteBatch:
+        return _KeyValueStoreCancelableWriteBatchMetrics(self._store.CancelableWriteBatch(sync=sync), self._metrics)
+
+    def Iterator(self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs):
+        iterator = self._store.Iterator(start_key=start_key, stop_key=stop_key, include_value=include_value, **kwargs)
+        return _KeyValueStoreIteratorMetrics(iterator, self._metrics)
@@ -0,0 +1,311 @@
+"""KeyValueStoreOverlay keeps writes in an in-memory layer over another KeyValueStore.
+
+Reads check the layer first and fall through to the base store. Deleted keys are kept as tombstones,
+so they hide records of the base store. commit() writes the layer to the base store in one WriteBatch
+and discard() drops it without touching the base store. Overlays can be stacked:
+
+    block_layer = KeyValueStoreOverlay(store)
+    tx_layer = block_layer.overlay()
+    ...
+    tx_layer.commit()  # into block_layer
+    block_layer.discard()  # nothing has been written to store
+"""
+
+import bisect
+import threading
+from typing import Any, Iterable, List, Optional, Tuple
+
+from sortedcontainers import SortedDict
+
+from kona.key_value_store import (
+    KeyValueStore,
+    KeyValueStoreCancelableWriteBatch,
+    KeyValueStoreIterator,
+    KeyValueStoreWriteBatch,
+    _key_in_range,
+    _validate_args_bytes,
+    _validate_args_bytes_without_first,
+    _validate_keys_bytes,
+    _validate_range_keys,
+)
+
+# Marker of a base row which has not been read yet
+_UNREAD = object()
+
+
+class _KeyValueStoreWriteBatchOverlay(KeyValueStoreWriteBatch):
+    def __init__(self, store: "KeyValueStoreOverlay"):
+        self._store = store
+        self._batch_items = dict()
+        self._batch_ranges = []
+        self._count = 0
+        self._size = 0
+
+    @_validate_args_bytes_without_first
+    def put(self, key: bytes, value: bytes):
+        self._batch_items[bytes(key)] = bytes(value)
+        self._count += 1
+        self._size += len(key) + len(value)
+
+    @_validate_args_bytes_without_first
+    def delete(self, key: bytes):
+        self._batch_items[bytes(key)] = None
+        self._count += 1
+        self._size += len(key)
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None):
+        _validate_range_keys(start_key, stop_key)
+        for key in [key for key in self._batch_items if _key_in_range(key, start_key, stop_key)]:
+            del self._batch_items[key]
+        self._batch_ranges.append((start_key, stop_key))
+        self._count += 1
+        self._size += len(start_key or b"") + len(stop_key or b"")
+
+    def clear(self):
+        self._batch_items.clear()
+        self._batch_ranges.clear()
+        self._count = 0
+        self._size = 0
+
+    def count(self) -> int:
+        return self._count
+
+    def size(self) -> int:
+        return self._size
+
+    def write(self):
+        with self._store._lock:
+            for start_key, stop_key in self._batch_ranges:
+                self._store._delete_range_items(start_key, stop_key)
+            self._store._write_items(self._batch_items.items())
+
+
+class _KeyValueStoreIteratorOverlay(KeyValueStoreIterator):
+    """Merge records of the layer, copied when the iterator is made, with an iterator of the base store"""
+
+    def __init__(
+        self,
+        store: "KeyValueStoreOverlay",
+        start_key: bytes = None,
+        stop_key: bytes = None,
+        include_value=True,
+        **kwargs,
+    ):
+        super().__init__(start_key, stop_key, include_value, **kwargs)
+        self._base = store.base
+        with store._lock:
+            keys = list(store._items.irange(self._lower, self._upper))
+            self._items = [(key, store._items[key]) for key in keys]
+        self._keys = keys
+        self._index = 0
+        self._base_it: Optional[KeyValueStoreIterator] = None
+        self._base_row = _UNREAD
+
+    def _seek_first(self, key: Optional[bytes]):
+        self._close()
+        self._base_it = self._base.Iterator(
+            key, self._upper, include_value=self._include_value, include_stop=self._include_upper
+        )
+        self._index = 0 if key is None else bisect.bisect_left(self._keys, key)
+
+    def _seek_last(self, key: Optional[bytes]):
+        self._close()
+        self._base_it = self._base.Iterator(
+            self._lower, key, include_value=self._include_value, include_start=self._include_lower, reverse=True
+        )
+        self._index = (len(self._keys) if key is None else bisect.bisect_right(self._keys, key)) - 1
+
+    def _next_base_row(self) -> Optional[Tuple[bytes, Optional[bytes]]]:
+        try:
+            row = next(self._base_it)
+        except StopIteration:
+            return None
+        return row if self._include_value else (row, None)
+
+    def _read_next(self) -> Optional[Tuple[bytes, Optional[bytes]]]:
+        while True:
+            if self._base_row is _UNREAD:
+                self._base_row = self._next_base_row()
+            item = self._items[self._index] if 0 <= self._index < len(self._items) else None
+            if item is None and self._base_row is None:
+                return None
+
+            if item is not None and (
+                self._base_row is None
+                or (item[0] <= self._base_row[0] if not self._reverse else item[0] >= self._base_row[0])
+            ):
+                self._index += -1 if self._reverse else 1
+                if self._base_row is not None and self._base_row[0] == item[0]:
+                    self._base_row = _UNREAD
+                key, value = item
+                if value is None:
+                    # A tombstone hides the record of the base store.
+                    continue
+                return key, value if self._include_value else None
+
+            row, self._base_row = self._base_row, _UNREAD
+            return row
+
+    def _close(self):
+        if self._base_it is not None:
+            self._base_it.close()
+            self._base_it = None
+        self._base_row = _UNREAD
+
+
+class KeyValueStoreOverlay(KeyValueStore):
+    """In-memory write layer over a KeyValueStore
+
+    close() and destroy_store() discard the layer. The base store is neither closed nor destroyed,
+    since it usually outlives many layers.
+
+    :param base: a KeyValueStore instance under the layer. It can be another KeyValueStoreOverlay.
+    """
+
+    def __init__(self, base: KeyValueStore):
+        self._base = base
+        # A value of None is a tombstone of a deleted key.
+        self._items = SortedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+
+    @property
+    def base(self) -> KeyValueStore:
+        return self._base
+
+    def overlay(self) -> "KeyValueStoreOverlay":
+        """Return a new layer on top of this layer"""
+        return KeyValueStoreOverlay(self)
+
+    def overlay_info(self) -> dict:
+        """Return the number of records and tombstones and the size of keys and values (bytes) in the layer"""
+        with self._lock:
+            tombstones = sum(1 for value in self._items.values() if value is None)
+            return {"records": len(self._items) - tombstones, "tombstones": tombstones, "size": self._size}
+
+    def commit(self, sync=False):
+        """Write the layer to the base store in one WriteBatch and empty the layer
+
+        :param sync: sync option of the WriteBatch
+        """
+        with self._lock:
+            if not self._items:
+                return
+            batch = self._base.WriteBatch(sync=sync)
+            for key, value in self._items.items():
+                if value is None:
+                    batch.delete(key)
+                else:
+                    batch.put(key, value)
+            batch.write()
+            self._items = SortedDict()
+            self._size = 0
+
+    def discard(self):
+        """Drop the layer without writing it"""
+        with self._lock:
+            self._items = SortedDict()
+            self._size = 0
+
+    def _write_items(self, items: Iterable[Tuple[bytes, Optional[bytes]]]):
+        with self._lock:
+            for key, value in items:
+                old_value = self._items.get(key)
+                if key in self._items:
+                    self._size -= len(key) + (len(old_value) if old_value is not None else 0)
+                self._items[key] = value
+                self._size += len(key) + (len(value) if value is not None else 0)
+
+    def _delete_range_items(self, start_key: Optional[bytes], stop_key: Optional[bytes]):
+        """Put tombstones of all records of the range, which hide records of the base store"""
+        with self._lock:
+            with self.Iterator(start_key, stop_key, include_value=False) as it:
+                self._write_items([(key, None) for key in it])
+
+    @_validate_args_bytes_without_first
+    def get(self, key: bytes, *, default=None, **kwargs) -> bytes:
+        if default is not None:
+            _validate_args_bytes(default)
+
+        key = bytes(key)
+        with self._lock:
+            if key in self._items:
+                result = self._items[key]
+                if result is None:
+                    result = default
+                if result is None:
+                    raise KeyError(f"Has no value of key({key})")
+                return result
+        return self._base.get(key, default=default, **kwargs)
+
+    def multi_get(self, keys: Iterable[bytes], *, default=None, **kwargs) -> List[Optional[bytes]]:
+        keys = _validate_keys_bytes(keys)
+        if default is not None:
+            _validate_args_bytes(default)
+
+        results = [None] * len(keys)
+        base_indexes = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                key = bytes(key)
+                if key in self._items:
+                    value = self._items[key]
+                    results[i] = default if value is None else value
+                else:
+                    base_indexes.append(i)
+        if base_indexes:
+            values = self._base.multi_get([keys[i] for i in base_indexes], default=default, **kwargs)
+            for i, value in zip(base_indexes, values):
+                results[i] = value
+        return results
+
+    @_validate_args_bytes_without_first
+    def put(self, key: bytes, value: bytes, *, sync=False, **kwargs):
+        self._write_items([(bytes(key), bytes(value))])
+
+    @_validate_args_bytes_without_first
+    def delete(self, key: bytes, *, sync=False, **kwargs):
+        self._write_items([(bytes(key), None)])
+
+    def close(self):
+        self.discard()
+
+    def destroy_store(self):
+        self.discard()
+
+    @_validate_args_bytes_without_first
+    def key_may_exist(self, key: bytes) -> Tuple[bool, Any]:
+        key = bytes(key)
+        with self._lock:
+            if key in self._items:
+                value = self._items[key]
+                return value is not None, value
+        return self._base.key_may_exist(key)
+
+    def catch_up(self):
+        self._base.catch_up()
+
+    def compact_range(self, start_key: bytes = None, stop_key: bytes = None, **kwargs) -> dict:
+        """Compact the base store. The layer is not compacted."""
+        return self._base.compact_range(start_key, stop_key, **kwargs)
+
+    def engine_stats(self) -> dict:
+        stats = self._base.engine_stats()
+        stats["overlay"] = self.overlay_info()
+        return stats
+
+    def WriteBatch(self, sync=False) -> KeyValueStoreWriteBatch:
+        return _KeyValueStoreWriteBatchOverlay(self)
+
+    def CancelableWriteBatch(self, sync=False) -> KeyValueStoreCancelableWriteBatch:
+        return KeyValueStoreCancelableWriteBatch(self, sync=sync)
+
+    def Iterator(
+        self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs
+    ) -> KeyValueStoreIterator:
+        """Get Iterator
+
+        Records of the layer are copied from the range when the iterator is made.
+        Records of the base store are read as the iterator of the base store does.
+        """
+        return _KeyValueStoreIteratorOverlay(self, start_key, stop_key, include_value, **kwargs)
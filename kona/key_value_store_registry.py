@@ -0,0 +1,348 @@
+"""KeyValueStoreRegistry shares open stores of a process.
+
+LMDB forbids opening an environment twice in a process, and RocksDB fails on its lock file. So KeyValueStore.new()
+opens a store once per store type and resolved path, and hands out a KeyValueStoreHandle to each caller.
+The handles are refcounted views of the same store: close() of a handle releases it, and the last one closes the
+store. Opening an open store with the same options only makes a handle. Other options raise KeyValueStoreError,
+except create_if_missing, which matters only to the first open. Opening a writable store with read_only=True makes a
+read-only handle of it.
+"""
+
+import os
+import threading
+import urllib.parse
+import weakref
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple
+
+from kona.key_value_store import (
+    KeyValueStore,
+    KeyValueStoreCancelableWriteBatch,
+    KeyValueStoreError,
+    KeyValueStoreIterator,
+    KeyValueStoreWriteBatch,
+)
+
+
+def registry_key(uri: str, store_type: str, secondary_path: str = None) -> tuple:
+    """Make the key of a store from its type and the resolved path of the URI
+
+    A RocksDB secondary instance is another instance of the path, so the resolved secondary_path is a part of its key.
+    """
+    uri_obj = urllib.parse.urlparse(uri)
+    path = uri
+    if uri_obj.scheme == "file":
+        path = os.path.realpath(f"{(uri_obj.netloc if uri_obj.netloc else '')}{uri_obj.path}")
+    if secondary_path is None:
+        return store_type, path
+    return store_type, path, os.path.realpath(secondary_path)
+
+
+# Options which only matter to the open of a store, and options of read-only opens
+_OPEN_ONLY_OPTIONS = ("create_if_missing",)
+_READ_ONLY_OPTIONS = ("read_only", "readonly")
+
+
+def _conflicting_options(open_options: Dict[str, str], options: Dict[str, str]) -> List[str]:
+    # An omitted option is the same as None, the default of the options of KeyValueStore.new().
+    conflicts = []
+    for name in sorted(set(open_options) | set(options)):
+        open_value, value = open_options.get(name, repr(None)), options.get(name, repr(None))
+        if open_value != value:
+            conflicts.append(f"{name}={value} (open with {name}={open_value})")
+    return conflicts
+
+
+class _Entry:
+    __slots__ = ("key", "options", "read_only", "lock", "store", "refs", "opens", "closed")
+
+    def __init__(self, key: tuple, options: Dict[str, str], read_only: bool):
+        self.key = key
+        self.options = options
+        self.read_only = read_only
+        # Reentrant, since closing a store may collect garbage handles, which release their stores.
+        self.lock = threading.RLock()
+        self.store: Optional[KeyValueStore] = None
+        self.refs = 0
+        self.opens = 0
+        self.closed = False
+
+
+class KeyValueStoreRegistry:
+    """Refcounted stores of a process, by the keys of registry_key()"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[tuple, _Entry] = {}
+        if hasattr(os, "register_at_fork"):
+            # Handles opened in the parent must not be used in a child. A child opens its own stores.
+            os.register_at_fork(after_in_child=self._forget)
+
+    def _forget(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def _remove(self, entry: _Entry):
+        entry.closed = True
+        with self._lock:
+            if self._entries.get(entry.key) is entry:
+                del self._entries[entry.key]
+
+    def open(self, key: tuple, options: dict, opener: Callable[[], KeyValueStore]) -> "KeyValueStoreHandle":
+        """Return a handle of the store of the key. opener() opens the store if it is not open.
+
+        Options are compared by repr(), so objects given as options match only themselves, and create_if_missing is
+        not compared. A read-only open of a writable store returns a read-only handle of it, while a writable open of a
+        read-only store fails. KeyValueStoreError is raised if the store is open with other options.
+        """
+        read_only = any(options.get(name) for name in _READ_ONLY_OPTIONS)
+        options = {
+            name: repr(value)
+            for name, value in options.items()
+            if name not in _OPEN_ONLY_OPTIONS and name not in _READ_ONLY_OPTIONS
+        }
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._entries[key] = _Entry(key, options, read_only)
+                else:
+                    conflicts = _conflicting_options(entry.options, options)
+                    if entry.read_only and not read_only:
+                        conflicts.append("read_only=False (open with read_only=True)")
+                    if conflicts:
+                        raise KeyValueStoreError(
+                            f"The store is already open with other options. {', '.join(conflicts)}, key={key}"
+                        )
+
+            # A store is opened and closed under the lock of its entry, so that it is never open twice.
+            # Stores of other keys are opened and closed concurrently. A sharded store opens its shards in it.
+            with entry.lock:
+                if entry.closed:
+                    continue
+                if entry.store is None:
+                    try:
+                        entry.store = opener()
+                    except BaseException:
+                        self._remove(entry)
+                        raise
+                entry.refs += 1
+                entry.opens += 1
+                return KeyValueStoreHandle(self, entry, read_only=read_only and not entry.read_only)
+
+    def _release(self, entry: _Entry, destroy: bool):
+        with entry.lock:
+            if destroy and entry.refs > 1:
+                raise KeyValueStoreError(
+                    f"Can't destroy a store which other handles use. handles={entry.refs - 1}, key={entry.key}"
+                )
+            entry.refs -= 1
+            if entry.refs > 0:
+                return
+            try:
+                if destroy:
+                    entry.store.destroy_store()
+                else:
+                    entry.store.close()
+            finally:
+                self._remove(entry)
+
+    def info(self) -> List[dict]:
+        """Return the store type, the path, open handles and the number of opens of every open store"""
+        with self._lock:
+            return [
+                {"store_type": entry.key[0], "path": entry.key[1], "handles": entry.refs, "opens": entry.opens}
+                for entry in self._entries.values()
+                if entry.store is not None
+            ]
+
+
+# The registry of KeyValueStore.new()
+registry = KeyValueStoreRegistry()
+
+
+class KeyValueStoreHandle(KeyValueStore):
+    """A refcounted view of a store shared by KeyValueStoreRegistry
+
+    Methods and attributes of the store which are not in KeyValueStore are reached through the handle too, and
+    .store is the store itself. namespace() returns a handle of the namespace, which is valid while this handle is
+    open. Iterators and write batches of the handle keep it open. close() releases the handle once, and
+    destroy_store() destroys the store only if no other handle uses it. The writes of KeyValueStore raise
+    KeyValueStoreError on a read-only handle.
+
+    :param registry: the registry of the store
+    :param entry: the entry of the store in the registry
+    :param read_only: whether the handle refuses writes
+    """
+
+    def __init__(self, registry: KeyValueStoreRegistry, entry: _Entry, read_only: bool = False):
+        self._registry = registry
+        self._entry: Optional[_Entry] = entry
+        self._read_only = read_only
+        # Weak, since a namespace handle refers to this handle, and a cycle would delay __del__ to the next collection
+        self._namespaces = weakref.WeakValueDictionary()
+
+    @property
+    def store(self) -> KeyValueStore:
+        """The shared store. KeyValueStoreError is raised if the handle is closed."""
+        return self._target
+
+    @property
+    def _target(self) -> KeyValueStore:
+        entry = self._entry
+        if entry is None:
+            raise KeyValueStoreError("The store handle is closed")
+        return entry.store
+
+    @property
+    def _writer(self) -> KeyValueStore:
+        if self._read_only:
+            raise KeyValueStoreError("The store handle is read-only")
+        return self._target
+
+    def _keep(self, obj):
+        # An iterator or a batch refers to the handle, so that the store stays open while it is used,
+        # e.g. in `for key, value in KeyValueStore.new(...).Iterator()`.
+        obj._store_handle = self
+        return obj
+
+    # Hooks of KeyValueStore which wrappers such as KeyValueStoreSharded call on their stores.
+    # The handle inherits them, so __getattr__ would never forward them to the fast paths of the store.
+
+    def _delete_range_chunk(self, start_key: Optional[bytes], stop_key: Optional[bytes], limit: int) -> List[bytes]:
+        return self._writer._delete_range_chunk(start_key, stop_key, limit)
+
+    def _compaction_slices(
+        self, start_key: Optional[bytes], stop_key: Optional[bytes]
+    ) -> List[Tuple[Optional[bytes], Optional[bytes]]]:
+        return self._target._compaction_slices(start_key, stop_key)
+
+    def _compact_slice(self, start_key: Optional[bytes], stop_key: Optional[bytes]):
+        self._writer._compact_slice(start_key, stop_key)
+
+    def _nth_keys(self, start_key: Optional[bytes], stop_key: Optional[bytes], parts: int, count: int) -> List[bytes]:
+        return self._target._nth_keys(start_key, stop_key, parts, count)
+
+    def _bulk_load_chunk(self, chunk: List[Tuple[bytes, bytes]]):
+        self._writer._bulk_load_chunk(chunk)
+
+    def _bulk_load_sorted_chunk(self, chunk: List[Tuple[bytes, bytes]]):
+        self._writer._bulk_load_sorted_chunk(chunk)
+
+    def _bulk_load_finish(self, min_key: bytes, max_key: bytes):
+        self._writer._bulk_load_finish(min_key, max_key)
+
+    def __getattr__(self, name: str):
+        # It is called only for attributes which the handle doesn't have.
+        if name.startswith("__") or name in ("_entry", "_registry", "_read_only", "_target", "_writer", "_namespaces"):
+            raise AttributeError(name)
+        return getattr(self._target, name)
+
+    def get(self, key: bytes, *, default=None, **kwargs) -> bytes:
+        return self._target.get(key, default=default, **kwargs)
+
+    def multi_get(self, keys: Iterable[bytes], *, default=None, **kwargs) -> List[Optional[bytes]]:
+        return self._target.multi_get(keys, default=default, **kwargs)
+
+    def put(self, key: bytes, value: bytes, *, sync=False, **kwargs):
+        self._writer.put(key, value, sync=sync, **kwargs)
+
+    def delete(self, key: bytes, *, sync=False, **kwargs):
+        self._writer.delete(key, sync=sync, **kwargs)
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None, **kwargs) -> int:
+        return self._writer.delete_range(start_key, stop_key, **kwargs)
+
+    def bulk_load(self, items: Iterable[Tuple[bytes, bytes]], **kwargs) -> dict:
+        return self._writer.bulk_load(items, **kwargs)
+
+    def close(self):
+        """Release the handle. The store is closed when all handles are released."""
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._registry._release(entry, destroy=False)
+
+    def destroy_store(self):
+        """Release the handle and destroy the store. KeyValueStoreError is raised if other handles use the store."""
+        entry = self._entry
+        if entry is None:
+            raise KeyValueStoreError("The store handle is closed")
+        self._registry._release(entry, destroy=True)
+        self._entry = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def key_may_exist(self, key: bytes) -> Tuple[bool, Any]:
+        return self._target.key_may_exist(key)
+
+    def catch_up(self):
+        self._target.catch_up()
+
+    def namespace(self, name: str) -> KeyValueStore:
+        if name == self.DEFAULT_NAMESPACE:
+            return self
+        namespace = self._namespaces.get(name)
+        if namespace is None:
+            namespace = _KeyValueStoreNamespaceHandle(self, name)
+            namespace = self._namespaces.setdefault(name, namespace)
+        return namespace
+
+    def engine_stats(self) -> dict:
+        return self._target.engine_stats()
+
+    def compact_range(self, start_key: bytes = None, stop_key: bytes = None, **kwargs) -> dict:
+        return self._writer.compact_range(start_key, stop_key, **kwargs)
+
+    def checkpoint(self, path: str):
+        self._target.checkpoint(path)
+
+    def export(self, fileobj: BinaryIO, start_key: bytes = None, stop_key: bytes = None) -> dict:
+        return self._target.export(fileobj, start_key, stop_key)
+
+    def import_(self, fileobj: BinaryIO, **kwargs) -> dict:
+        return self._writer.import_(fileobj, **kwargs)
+
+    def split_key_range(self, start_key: bytes = None, stop_key: bytes = None, parts: int = 2) -> List[bytes]:
+        return self._target.split_key_range(start_key, stop_key, parts)
+
+    def WriteBatch(self, sync=False) -> KeyValueStoreWriteBatch:
+        return self._keep(self._writer.WriteBatch(sync=sync))
+
+    def CancelableWriteBatch(self, sync=False) -> KeyValueStoreCancelableWriteBatch:
+        return self._keep(self._writer.CancelableWriteBatch(sync=sync))
+
+    def Iterator(
+        self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs
+    ) -> KeyValueStoreIterator:
+        return self._keep(self._target.Iterator(start_key, stop_key, include_value, **kwargs))
+
+
+class _KeyValueStoreNamespaceHandle(KeyValueStoreHandle):
+    """A namespace of the store of a handle. It holds no reference of the registry, so close() only closes it."""
+
+    def __init__(self, handle: KeyValueStoreHandle, name: str):
+        self._handle = handle
+        self._read_only = handle._read_only
+        self._store = handle._target.namespace(name)
+
+    @property
+    def _target(self) -> KeyValueStore:
+        if self._handle._entry is None:
+            raise KeyValueStoreError("The store handle is closed")
+        return self._store
+
+    def close(self):
+        self._target.close()
+
+    def destroy_store(self):
+        self._writer.destroy_store()
+
+    def __del__(self):
+        # The namespace is not closed by garbage collection, since other handles may use it.
+        pass
+
+    def namespace(self, name: str) -> KeyValueStore:
+        return self._handle.namespace(name)
@@ -1,19 +1,26 @@
 import functools
 import gc
+import re
+import threading
 import urllib.parse
 from pathlib import Path
-from typing import Any, Tuple
+from typing import Any, Iterable, List, Optional, Tuple
 
 import rocksdb
+from loguru import logger
 from rocksdb import errors
 
 from kona.key_value_store import (
     KeyValueStore,
     KeyValueStoreCancelableWriteBatch,
     KeyValueStoreError,
+    KeyValueStoreIterator,
     KeyValueStoreWriteBatch,
+    _key_in_range,
     _validate_args_bytes,
     _validate_args_bytes_without_first,
+    _validate_keys_bytes,
+    _validate_range_keys,
 )
 
 rocksdb_exceptions = [
@@ -27,6 +34,102 @@ rocksdb_exceptions = [
 ]
 
 
+# Integer properties reported by engine_stats()
+_ENGINE_INT_PROPERTIES = {
+    "memtable_size": "rocksdb.cur-size-all-mem-tables",
+    "immutable_memtables": "rocksdb.num-immutable-mem-table",
+    "mem_table_flush_pending": "rocksdb.mem-table-flush-pending",
+    "block_cache_capacity": "rocksdb.block-cache-capacity",
+    "block_cache_usage": "rocksdb.block-cache-usage",
+    "block_cache_pinned_usage": "rocksdb.block-cache-pinned-usage",
+    "table_readers_memory": "rocksdb.estimate-table-readers-mem",
+    "live_sst_files_size": "rocksdb.live-sst-files-size",
+    "total_sst_files_size": "rocksdb.total-sst-files-size",
+    "compaction_pending": "rocksdb.compaction-pending",
+    "pending_compaction_bytes": "rocksdb.estimate-pending-compaction-bytes",
+    "running_compactions": "rocksdb.num-running-compactions",
+    "running_flushes": "rocksdb.num-running-flushes",
+    "is_write_stopped": "rocksdb.is-write-stopped",
+    "actual_delayed_write_rate": "rocksdb.actual-delayed-write-rate",
+    "background_errors": "rocksdb.background-errors",
+}
+
+_CUMULATIVE_WRITES_PATTERN = re.compile(r"Cumulative writes: (\d+) writes, (\d+) keys, (\d+) commit groups")
+_CUMULATIVE_STALL_PATTERN = re.compile(r"Cumulative stall: (\d+):(\d+):([\d.]+) H:M:S, ([\d.]+) percent")
+_STALL_COUNT_PATTERN = re.compile(r"(\d+) ([a-z0-9_ ]+?)(?:,|$)")
+
+# compact_range() compacts this many slices of about the same size of SST files
+_COMPACTION_SLICES = 8
+
+# WriteBatch.delete_range() reads the keys of a range this many at a time in write()
+_DELETE_RANGE_CHUNK_SIZE = 10000
+
+_MB = 1024 * 1024
+
+# Tuning profiles of KeyValueStoreRocksDB. "table" holds options of BlockBasedTableFactory and bloom_bits_per_key,
+# and the others are options of rocksdb.Options. Options given to the store override the profile.
+ROCKSDB_PROFILES = {
+    # Small blocks and bloom filters, so that a get() reads one block and a miss reads none
+    "point_lookup": {
+        "table": {"block_size": 4 * 1024, "bloom_bits_per_key": 10, "cache_index_and_filter_blocks": True},
+        "write_buffer_size": 32 * _MB,
+        "max_write_buffer_number": 2,
+    },
+    # Large blocks and files with compaction readahead. Filters don't help iterators.
+    "scan_heavy": {
+        "table": {"block_size": 64 * 1024, "cache_index_and_filter_blocks": True},
+        "write_buffer_size": 64 * _MB,
+        "max_write_buffer_number": 3,
+        "target_file_size_base": 128 * _MB,
+        "compaction_readahead_size": 2 * _MB,
+    },
+    # Large memtables merged before flushes, and more L0 files before compactions and write stalls
+    "write_heavy": {
+        "table": {"block_size": 16 * 1024, "bloom_bits_per_key": 10, "cache_index_and_filter_blocks": True},
+        "write_buffer_size": 128 * _MB,
+        "max_write_buffer_number": 4,
+        "min_write_buffer_number_to_merge": 2,
+        "level0_file_num_compaction_trigger": 8,
+        "level0_slowdown_writes_trigger": 24,
+        "level0_stop_writes_trigger": 40,
+        "max_bytes_for_level_base": 512 * _MB,
+        "target_file_size_base": 64 * _MB,
+        "max_background_jobs": 4,
+    },
+}
+
+# Default of rocksdb.Options
+_DEFAULT_WRITE_BUFFER_SIZE = 64 * _MB
+_DEFAULT_MAX_WRITE_BUFFER_NUMBER = 2
+
+
+def _parse_db_stats(db_stats: str) -> dict:
+    """Parse write and stall counters of the "rocksdb.dbstats" property"""
+    result = {}
+    match = _CUMULATIVE_WRITES_PATTERN.search(db_stats)
+    if match:
+        result["writes"] = int(match.group(1))
+        result["written_keys"] = int(match.group(2))
+        result["commit_groups"] = int(match.group(3))
+    match = _CUMULATIVE_STALL_PATTERN.search(db_stats)
+    if match:
+        hours, minutes, seconds, percent = match.groups()
+        result["stall_seconds"] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        result["stall_percent"] = float(percent)
+    return result
+
+
+def _parse_stall_counts(cf_stats: str) -> dict:
+    """Parse the "Stalls(count)" line of the "rocksdb.cfstats-no-file-histogram" property"""
+    for line in cf_stats.splitlines():
+        if line.startswith("Stalls(count):"):
+            cumulative = line[len("Stalls(count):") :].split(", interval")[0]
+            return {
+                name.strip().replace(" ", "_"): int(count) for count, name in _STALL_COUNT_PATTERN.findall(cumulative)
+            }
+    return {}
+
+
 def _error_convert(func):
     @functools.wraps(func)
     def _wrapper(*args, **kwargs):
@@ -40,11 +143,143 @@ def _error_convert(func):
     return _wrapper
 
 
+class RocksDBSharedMemory:
+    """A block cache and a memtable budget shared by KeyValueStoreRocksDB instances of a process
+
+    Stores opened after set_shared_memory() read blocks through the same LRU cache, with index and filter blocks
+    charged to it. The binding has no WriteBufferManager, so write_buffer_size is split into max_stores equal
+    shares instead, and each store caps its memtables (db_write_buffer_size) at a share.
+    Opening more than max_stores stores raises KeyValueStoreError. Every shard of a sharded store counts.
+
+    :param block_cache_size: bytes of the block cache
+    :param write_buffer_size: bytes of memtables of all stores if given
+    :param max_stores: number of stores which share write_buffer_size
+    """
+
+    def __init__(self, block_cache_size: int, write_buffer_size: int = None, max_stores: int = 10):
+        if block_cache_size <= 0:
+            raise ValueError(f"block_cache_size must be positive. block_cache_size={block_cache_size}")
+        if max_stores <= 0:
+            raise ValueError(f"max_stores must be positive. max_stores={max_stores}")
+        if write_buffer_size is not None and write_buffer_size < max_stores:
+            raise ValueError(f"write_buffer_size is too small. write_buffer_size={write_buffer_size}")
+        self.block_cache = rocksdb.LRUCache(block_cache_size)
+        self._block_cache_size = block_cache_size
+        self._write_buffer_size = write_buffer_size
+        self._max_stores = max_stores
+        self._lock = threading.Lock()
+        self._stores = 0
+
+    @property
+    def write_buffer_share(self) -> Optional[int]:
+        """Bytes of memtables of a store"""
+        return self._write_buffer_size // self._max_stores if self._write_buffer_size is not None else None
+
+    def _acquire(self):
+        with self._lock:
+            if self._write_buffer_size is not None and self._stores >= self._max_stores:
+                raise KeyValueStoreError(f"Too many stores share the memtable budget. max_stores={self._max_stores}")
+            self._stores += 1
+
+    def _release(self):
+        with self._lock:
+            self._stores -= 1
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "block_cache_size": self._block_cache_size,
+                "write_buffer_size": self._write_buffer_size,
+                "write_buffer_share": self.write_buffer_share,
+                "max_stores": self._max_stores,
+                "stores": self._stores,
+            }
+
+
+_shared_memory: Optional[RocksDBSharedMemory] = None
+
+
+def set_shared_memory(shared_memory: Optional[RocksDBSharedMemory]):
+    """Share the memory among RocksDB stores opened after this call. None stops sharing."""
+    global _shared_memory
+    _shared_memory = shared_memory
+
+
+def get_shared_memory() -> Optional[RocksDBSharedMemory]:
+    return _shared_memory
+
+
+def _new_table_factory(table_options: dict, block_cache: Optional[rocksdb.LRUCache]) -> rocksdb.BlockBasedTableFactory:
+    table_options = dict(table_options)
+    bloom_bits_per_key = table_options.pop("bloom_bits_per_key", None)
+    if bloom_bits_per_key is not None:
+        table_options["filter_policy"] = rocksdb.BloomFilterPolicy(bloom_bits_per_key)
+    if block_cache is not None:
+        table_options["block_cache"] = block_cache
+        # Index and filter blocks are charged to the shared cache, so that they are bounded too.
+        table_options.setdefault("cache_index_and_filter_blocks", True)
+    return rocksdb.BlockBasedTableFactory(**table_options)
+
+
+def _split_by_files(files: List[dict], start_key: Optional[bytes], stop_key: Optional[bytes], parts: int):
+    """Pick boundary keys among the smallest and largest keys of SST files by the estimated bytes before them.
+
+    A file across a boundary counts half. Return None if the files can't make parts - 1 boundaries.
+    """
+    files = [
+        file
+        for file in files
+        if file["size"] > 0
+        and (start_key is None or file["largestkey"] >= start_key)
+        and (stop_key is None or file["smallestkey"] <= stop_key)
+    ]
+    total = sum(file["size"] for file in files)
+    candidates = sorted(
+        key
+        for key in {file[name] for file in files for name in ("smallestkey", "largestkey")}
+        if (start_key is None or key > start_key) and (stop_key is None or key <= stop_key)
+    )
+    if total == 0 or len(candidates) < parts - 1:
+        return None
+
+    def _bytes_before(key: bytes) -> float:
+        return sum(
+            file["size"] if file["largestkey"] < key else file["size"] / 2
+            for file in files
+            if file["smallestkey"] < key
+        )
+
+    # Candidates are sorted, so every boundary is greater than the previous one.
+    keys, index = [], 0
+    for i in range(1, parts):
+        remaining = parts - 1 - i
+        while index < len(candidates) - 1 - remaining and _bytes_before(candidates[index]) < total * i / parts:
+            index += 1
+        keys.append(candidates[index])
+        index += 1
+    return keys
+
+
 class _KeyValueStoreWriteBatchRocksDB(KeyValueStoreWriteBatch):
-    def __init__(self, db: rocksdb.DB, sync: bool):
-        self._db = db
+    """Batch of a namespace. Views made by namespace() share the rocksdb.WriteBatch of the root batch.
+
+    The binding has no DeleteRange, so delete_range() records the range, and write() adds a delete of every key
+    of the range to a copy of the batch. Keys of the store are read in chunks, and keys put in this batch
+    before the range are deleted too.
+    """
+
+    def __init__(self, store: "KeyValueStoreRocksDB", sync: bool, root: "_KeyValueStoreWriteBatchRocksDB" = None):
+        self._store = store
         self._sync = sync
-        self._batch = self._new_batch()
+        self._root = self if root is None else root
+        if root is None:
+            self._batch = self._new_batch()
+            self._size = 0
+            # (store, start_key, stop_key) of delete_range() calls
+            self._ranges = []
+            # Keys put in the batch by the store of the namespace, with the number of ranges before the last put.
+            # A key put after a range is kept by the range.
+            self._put_keys = dict()
 
     @_error_convert
     def _new_batch(self):
@@ -53,59 +288,252 @@ class _KeyValueStoreWriteBatchRocksDB(KeyValueStoreWriteBatch):
     @_validate_args_bytes_without_first
     @_error_convert
     def put(self, key: bytes, value: bytes):
-        self._batch.put(key, value)
+        self._root._batch.put(self._store._key(key), value)
+        self._root._put_keys.setdefault(self._store, dict())[bytes(key)] = len(self._root._ranges)
+        self._root._size += len(key) + len(value)
 
     @_validate_args_bytes_without_first
     @_error_convert
     def delete(self, key: bytes):
-        self._batch.delete(key)
+        self._root._batch.delete(self._store._key(key))
+        self._root._size += len(key)
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None):
+        _validate_range_keys(start_key, stop_key)
+        self._root._ranges.append((self._store, start_key, stop_key))
+        self._root._size += len(start_key or b"") + len(stop_key or b"")
 
     @_error_convert
     def clear(self):
-        self._batch.clear()
+        self._root._batch.clear()
+        self._root._size = 0
+        self._root._ranges.clear()
+        self._root._put_keys.clear()
 
-    @_error_convert
-    def write(self):
-        self._db.write(self._batch, sync=self._sync)
+    def count(self) -> int:
+        return self._root._batch.count() + len(self._root._ranges)
 
+    def size(self) -> int:
+        return self._root._size
 
-class _KeyValueStoreCancelableWriteBatchRocksDB(KeyValueStoreCancelableWriteBatch):
-    def __init__(self, store: KeyValueStore, db: rocksdb.DB, sync: bool):
-        super().__init__(store, sync=sync)
-        self._touched_keys = set()
-        self._db = db
-        self._snapshot = db.snapshot()
+    @_error_convert
+    def write(self):
+        batch = self._root._batch
+        if self._root._ranges:
+            # Deletes of the ranges are added to a copy, so that the batch can be written again.
+            batch = rocksdb.WriteBatch(batch.data())
+            for index, (store, start_key, stop_key) in enumerate(self._root._ranges):
+                self._add_range_deletes(batch, index, store, start_key, stop_key)
+        self._store._db.write(batch, sync=self._root._sync)
+
+    def _add_range_deletes(
+        self, batch: rocksdb.WriteBatch, index: int, store: "KeyValueStoreRocksDB", start_key, stop_key
+    ):
+        put_keys = self._root._put_keys.get(store, {})
+        for key, ranges_before in put_keys.items():
+            if ranges_before <= index and _key_in_range(key, start_key, stop_key):
+                batch.delete(store._key(key))
+        with store.Iterator(start_key, stop_key, include_value=False) as it:
+            while True:
+                keys = it.next_n(_DELETE_RANGE_CHUNK_SIZE)
+                for key in keys:
+                    if put_keys.get(key, 0) <= index:
+                        batch.delete(store._key(key))
+                if len(keys) < _DELETE_RANGE_CHUNK_SIZE:
+                    break
+
+    def namespace(self, name: str) -> KeyValueStoreWriteBatch:
+        return _KeyValueStoreWriteBatchRocksDB(self._store.namespace(name), self._sync, self._root)
+
+
+class _KeyValueStoreIteratorRocksDB(KeyValueStoreIterator):
+    def __init__(
+        self,
+        db: rocksdb.DB,
+        start_key: bytes = None,
+        stop_key: bytes = None,
+        include_value=True,
+        column_family: rocksdb.ColumnFamilyHandle = None,
+        **kwargs,
+    ):
+        super().__init__(start_key, stop_key, include_value, **kwargs)
+        self._it = db.iteritems(column_family) if include_value else db.iterkeys(column_family)
+        self._rows = reversed(self._it) if self._reverse else self._it
+        self._column_family = column_family
 
-    def _touch(self, key: bytes):
-        self._touched_keys.add(key)
+    @_error_convert
+    def _seek_first(self, key: Optional[bytes]):
+        if key is None:
+            self._it.seek_to_first()
+        else:
+            self._it.seek(key)
 
-    def _get_original_touched_item(self):
-        for key in self._touched_keys:
-            try:
-                yield key, self._db.get(key, snapshot=self._snapshot)
-            except KeyError:
-                return key, None
+    @_error_convert
+    def _seek_last(self, key: Optional[bytes]):
+        if key is None:
+            self._it.seek_to_last()
+        else:
+            self._it.seek_for_prev(key)
 
-    def clear(self):
-        super().clear()
-        self._touched_keys.clear()
+    def _read_next(self) -> Optional[Tuple[bytes, Optional[bytes]]]:
+        try:
+            row = next(self._rows)
+        except StopIteration:
+            return None
+        if self._column_family is not None:
+            # Keys of a column family are (column family handle, key) tuples.
+            row = (row[0][1], row[1]) if self._include_value else row[1]
+        return row if self._include_value else (row, None)
 
-    def close(self):
-        self._snapshot.close()
-        self._snapshot = None
+    def _close(self):
+        self._it = None
+        self._rows = None
 
 
 class KeyValueStoreRocksDB(KeyValueStore):
-    def __init__(self, uri: str, **kwargs):
+    """KeyValueStore of RocksDB
+
+    Namespaces are column families. Existing column families are opened with the store.
+
+    Readers in other processes can open the store with read_only=True, which sees the records at the time it was
+    opened, or as a secondary instance with secondary_path, which sees new writes of the primary after catch_up().
+
+    :param uri: a file path URI (ex. file:///xxx/xxx)
+    :param read_only: open the store read-only
+    :param secondary_path: open the store as a secondary instance which keeps its own info logs in this directory
+    :param catch_up_interval: call catch_up() of a secondary instance every this seconds in a background thread
+    :param bloom_bits_per_key: use bloom filters of this many bits per key in SST files (BlockBasedTableFactory).
+        10 makes about 1% false positives. It is ignored if table_factory is given.
+    :param profile: a tuning profile of ROCKSDB_PROFILES (point_lookup, scan_heavy or write_heavy)
+    :param use_shared_memory: use the memory of set_shared_memory() if it has been set.
+        The block cache is not shared if table_factory is given.
+    :param kwargs: options of rocksdb.Options
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        *,
+        read_only: bool = False,
+        secondary_path: str = None,
+        catch_up_interval: float = None,
+        bloom_bits_per_key: int = None,
+        profile: str = None,
+        use_shared_memory: bool = True,
+        **kwargs,
+    ):
         uri_obj = urllib.parse.urlparse(uri)
         if uri_obj.scheme != "file":
             raise ValueError(f"Support file path URI only (ex. file:///xxx/xxx). uri={uri}")
+        if catch_up_interval is not None and secondary_path is None:
+            raise ValueError("catch_up_interval needs secondary_path")
+        if profile is not None and profile not in ROCKSDB_PROFILES:
+            raise ValueError(f"Unknown profile. profile={profile}, profiles={list(ROCKSDB_PROFILES)}")
         self._path = f"{(uri_obj.netloc if uri_obj.netloc else '')}{uri_obj.path}"
-        self._db = self._new_db(self._path, **kwargs)
+        self._read_only = read_only
+        self._secondary_path = secondary_path
+        self._profile = profile
+        if secondary_path is not None:
+            # A secondary instance must keep all files of the primary open to follow it.
+            kwargs.setdefault("max_open_files", -1)
+
+        table_options = {}
+        if profile is not None:
+            profile_options = dict(ROCKSDB_PROFILES[profile])
+            table_options = profile_options.pop("table")
+            for name, value in profile_options.items():
+                kwargs.setdefault(name, value)
+        if bloom_bits_per_key is not None:
+            table_options["bloom_bits_per_key"] = bloom_bits_per_key
+        shared_memory = _shared_memory if use_shared_memory else None
+        if "table_factory" not in kwargs and (table_options or shared_memory is not None):
+            kwargs["table_factory"] = _new_table_factory(
+                table_options, shared_memory.block_cache if shared_memory is not None else None
+            )
+        if shared_memory is not None and shared_memory.write_buffer_share is not None:
+            share = shared_memory.write_buffer_share
+            kwargs["db_write_buffer_size"] = min(kwargs.get("db_write_buffer_size") or share, share)
+            max_write_buffer_number = kwargs.get("max_write_buffer_number", _DEFAULT_MAX_WRITE_BUFFER_NUMBER)
+            kwargs["write_buffer_size"] = min(
+                kwargs.get("write_buffer_size", _DEFAULT_WRITE_BUFFER_SIZE), share // max(max_write_buffer_number, 1)
+            )
+        # Column families use the same options as the default column family.
+        self._column_family_kwargs = {
+            name: value for name, value in kwargs.items() if hasattr(rocksdb.ColumnFamilyOptions, name)
+        }
+
+        self._shared_memory = shared_memory
+        if shared_memory is not None:
+            shared_memory._acquire()
+        try:
+            self._db = self._new_db(self._path, **kwargs)
+        except BaseException:
+            if shared_memory is not None:
+                shared_memory._release()
+            raise
+        self._cf: Optional[rocksdb.ColumnFamilyHandle] = None
+        self._namespaces = {}
+
+        self._catch_up_stop: Optional[threading.Event] = None
+        if catch_up_interval is not None:
+            self._catch_up_stop = threading.Event()
+            threading.Thread(
+                target=self._run_catch_up, args=(catch_up_interval, self._catch_up_stop), daemon=True
+            ).start()
 
     @_error_convert
     def _new_db(self, path, **kwargs) -> rocksdb.DB:
-        return rocksdb.DB(path, rocksdb.Options(**kwargs))
+        column_families = {
+            name: self._column_family_options()
+            for name in self._list_column_families(path)
+            if name != self.DEFAULT_NAMESPACE.encode()
+        }
+        options = rocksdb.Options(**kwargs)
+        if self._secondary_path is not None:
+            return rocksdb.DB(path, options, column_families=column_families, secondary_path=self._secondary_path)
+        return rocksdb.DB(path, options, column_families=column_families, read_only=self._read_only)
+
+    def _column_family_options(self) -> rocksdb.ColumnFamilyOptions:
+        return rocksdb.ColumnFamilyOptions(**self._column_family_kwargs)
+
+    def _run_catch_up(self, interval: float, stop: threading.Event):
+        while not stop.wait(interval):
+            try:
+                self.catch_up()
+            except KeyValueStoreError as e:
+                logger.warning(f"Failed to catch up with the primary. path={self._path}, e={e}")
+
+    @_error_convert
+    def catch_up(self):
+        """Make new writes of the primary visible to a secondary instance. It does nothing for other instances."""
+        if self._secondary_path is not None and self._db is not None:
+            self._db.try_catch_up_with_primary()
+
+    @staticmethod
+    def _list_column_families(path) -> List[bytes]:
+        if not Path(path).exists():
+            return []
+        try:
+            return rocksdb.list_column_families(path, rocksdb.Options())
+        except tuple(rocksdb_exceptions):
+            # There is no database yet.
+            return []
+
+    def _key(self, key: bytes):
+        return key if self._cf is None else (self._cf, key)
+
+    @_error_convert
+    def namespace(self, name: str) -> "KeyValueStoreRocksDB":
+        if name == self.DEFAULT_NAMESPACE:
+            return self
+
+        namespace = self._namespaces.get(name)
+        if namespace is None:
+            cf = self._db.get_column_family(name.encode())
+            if cf is None:
+                cf = self._db.create_column_family(name.encode(), self._column_family_options())
+            namespace = self._namespaces[name] = _KeyValueStoreNamespaceRocksDB(self, name, cf)
+        return namespace
 
     @_validate_args_bytes_without_first
     @_error_convert
@@ -113,30 +541,81 @@ class KeyValueStoreRocksDB(KeyValueStore):
         if default is not None:
             _validate_args_bytes(default)
 
-        result = self._db.get(key, **kwargs) or default
+        result = self._db.get(self._key(key), **kwargs) or default
         if result is None:
             raise KeyError(f"Has no value of key({key})")
         return result
 
+    @_error_convert
+    def multi_get(self, keys: Iterable[bytes], *, default=None, **kwargs) -> List[Optional[bytes]]:
+        keys = _validate_keys_bytes(keys)
+        if default is not None:
+            _validate_args_bytes(default)
+
+        values = self._db.multi_get([self._key(key) for key in keys], as_dict=False, **kwargs)
+        return [default if value is None else value for value in values]
+
     @_validate_args_bytes_without_first
     @_error_convert
     def put(self, key: bytes, value: bytes, *, sync=False, **kwargs):
-        self._db.put(key, value, sync=sync, **kwargs)
+        self._db.put(self._key(key), value, sync=sync, **kwargs)
 
     @_validate_args_bytes_without_first
     @_error_convert
     def delete(self, key: bytes, *, sync=False, **kwargs):
-        self._db.delete(key, sync=sync, **kwargs)
+        self._db.delete(self._key(key), sync=sync, **kwargs)
+
+    @_error_convert
+    def _bulk_load_chunk(self, chunk: List[Tuple[bytes, bytes]]):
+        # The WAL is skipped while loading. _bulk_load_finish() flushes the loaded records to SST files.
+        batch = rocksdb.WriteBatch()
+        for key, value in chunk:
+            batch.put(self._key(key), value)
+        self._db.write(batch, disable_wal=True)
+
+    @_error_convert
+    def _bulk_load_finish(self, min_key: bytes, max_key: bytes):
+        # CompactRange flushes the memtable first and writes the loaded range to the bottommost level.
+        self._db.compact_range(min_key, max_key, column_family=self._cf)
+
+    @_error_convert
+    def _compaction_slices(
+        self, start_key: Optional[bytes], stop_key: Optional[bytes]
+    ) -> List[Tuple[Optional[bytes], Optional[bytes]]]:
+        # The binding holds the GIL during CompactRange, so slices of about the same size let other threads run.
+        keys = None
+        if self._cf is None and len(self._db.column_families) <= 1:
+            keys = _split_by_files(self._db.get_live_files_metadata(), start_key, stop_key, _COMPACTION_SLICES)
+        bounds = [start_key] + (keys or []) + [stop_key]
+        return list(zip(bounds, bounds[1:]))
+
+    @_error_convert
+    def _compact_slice(self, start_key: Optional[bytes], stop_key: Optional[bytes]):
+        self._db.compact_range(start_key, stop_key, column_family=self._cf)
 
     @_error_convert
     def close(self):
+        if self._catch_up_stop is not None:
+            self._catch_up_stop.set()
         if self._db:
+            self._namespaces.clear()
             del self._db
             gc.collect()
             self._db = None
+            if self._shared_memory is not None:
+                self._shared_memory._release()
+
+    @_error_convert
+    def checkpoint(self, path: str):
+        """Make a RocksDB checkpoint. SST files are hard-linked when path is on the same file system.
+
+        A checkpoint of a namespace is a checkpoint of the whole store.
+        """
+        rocksdb.Checkpoint(self._db).create_checkpoint(str(path))
 
     @_error_convert
     def destroy_store(self):
+        """Close and remove the store. A read-only or secondary instance removes only its own files."""
         self.close()
 
         def rm_tree(path: Path):
@@ -147,41 +626,124 @@ class KeyValueStoreRocksDB(KeyValueStore):
                     rm_tree(child)
             path.rmdir()
 
-        rm_tree(Path(self._path))
+        if self._secondary_path is not None:
+            if Path(self._secondary_path).exists():
+                rm_tree(Path(self._secondary_path))
+        elif not self._read_only:
+            rm_tree(Path(self._path))
 
     @_validate_args_bytes_without_first
     @_error_convert
     def key_may_exist(self, key: bytes) -> Tuple[bool, Any]:
-        return self._db.key_may_exist(key, fetch=True)
+        return self._db.key_may_exist(self._key(key), fetch=True)
+
+    @_error_convert
+    def get_property(self, name) -> Optional[str]:
+        """Return a property of RocksDB (ex. "rocksdb.stats") or None if the property is unknown
+
+        :param name: str or bytes
+        """
+        if isinstance(name, str):
+            name = name.encode()
+        value = self._db.get_property(name, self._cf)
+        return value.decode() if value is not None else None
+
+    def _get_int_property(self, name: str) -> Optional[int]:
+        value = self.get_property(name)
+        return int(value) if value is not None else None
+
+    @_error_convert
+    def engine_stats(self) -> dict:
+        rocksdb_stats = {key: self._get_int_property(name) for key, name in _ENGINE_INT_PROPERTIES.items()}
+        rocksdb_stats.update(_parse_db_stats(self.get_property("rocksdb.dbstats") or ""))
+        rocksdb_stats["stall_counts"] = _parse_stall_counts(
+            self.get_property("rocksdb.cfstats-no-file-histogram") or ""
+        )
+
+        rocksdb_stats["profile"] = self._profile
+        rocksdb_stats["shared_memory"] = self._shared_memory.info() if self._shared_memory is not None else None
+
+        return {
+            "engine": self.STORE_TYPE_ROCKSDB,
+            "estimated_num_keys": self._get_int_property("rocksdb.estimate-num-keys"),
+            "data_size": (rocksdb_stats["live_sst_files_size"] or 0) + (rocksdb_stats["memtable_size"] or 0),
+            self.STORE_TYPE_ROCKSDB: rocksdb_stats,
+        }
+
+    @_error_convert
+    def split_key_range(self, start_key: bytes = None, stop_key: bytes = None, parts: int = 2) -> List[bytes]:
+        """Return boundary keys estimated from the key ranges and sizes of SST files.
+
+        The keys are counted instead if the SST files are too few to split the range,
+        or if the store has namespaces, because the file metadata doesn't tell the column family.
+        """
+        if parts <= 0:
+            raise ValueError(f"parts must be positive. parts={parts}")
+        if self._cf is None and len(self._db.column_families) <= 1:
+            keys = _split_by_files(self._db.get_live_files_metadata(), start_key, stop_key, parts)
+            if keys is not None:
+                return keys
+        return super().split_key_range(start_key, stop_key, parts)
 
     @_error_convert
     def WriteBatch(self, sync=False) -> KeyValueStoreWriteBatch:
-        return _KeyValueStoreWriteBatchRocksDB(self._db, sync=sync)
+        return _KeyValueStoreWriteBatchRocksDB(self, sync=sync)
 
     @_error_convert
     def CancelableWriteBatch(self, sync=False) -> KeyValueStoreCancelableWriteBatch:
-        return _KeyValueStoreCancelableWriteBatchRocksDB(self, self._db, sync=sync)
+        return KeyValueStoreCancelableWriteBatch(self, sync=sync)
 
     @_error_convert
-    def Iterator(self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs):
+    def Iterator(
+        self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs
+    ) -> KeyValueStoreIterator:
         """Get Iterator
 
         :param start_key:
         :param stop_key:
-        :param include_value:  # This parameter is not handled in rocksdb.
-        :param kwargs:  # This parameter is not handled in rocksdb.
+        :param include_value: If False, iterate keys only with rocksdb iterkeys().
+        :param kwargs: prefix, reverse, include_start, include_stop and resume_token
         :return:
         """
         if "start" in kwargs or "stop" in kwargs:
             raise ValueError("Use start_key and stop_key arguments instead of start and stop arguments")
 
-        it = self._db.iteritems()
-        try:
-            it.seek(start_key)
-        except TypeError:
-            it.seek_to_first()
-
-        for key, value in it:
-            yield key, value
-            if stop_key and stop_key == key:
-                return
+        return _KeyValueStoreIteratorRocksDB(
+            self._db, start_key, stop_key, include_value, column_family=self._cf, **kwargs
+        )
+
+
+class _KeyValueStoreNamespaceRocksDB(KeyValueStoreRocksDB):
+    """A column family of KeyValueStoreRocksDB
+
+    It reaches the DB through the parent store, so that closing the parent releases the DB.
+    """
+
+    def __init__(self, parent: KeyValueStoreRocksDB, name: str, cf: rocksdb.ColumnFamilyHandle):
+        self._parent = parent
+        self._name = name
+        self._cf = cf
+        self._path = parent._path
+        self._profile = parent._profile
+        self._shared_memory = parent._shared_memory
+
+    @property
+    def _db(self) -> rocksdb.DB:
+        if self._parent._db is None:
+            raise KeyValueStoreError(f"The store of the namespace is closed. namespace={self._name}")
+        return self._parent._db
+
+    def namespace(self, name: str) -> KeyValueStoreRocksDB:
+        return self._parent.namespace(name)
+
+    def catch_up(self):
+        self._parent.catch_up()
+
+    def close(self):
+        pass
+
+    @_error_convert
+    def destroy_store(self):
+        """Drop the column family"""
+        self._parent._namespaces.pop(self._name, None)
+        self._db.drop_column_family(self._cf)
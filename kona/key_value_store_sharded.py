@@ -0,0 +1,354 @@
+"""KeyValueStoreSharded partitions keys across several stores.
+
+Each key belongs to one shard chosen by a shard function (crc32 of the key by default).
+multi_get and batch writes are fanned out to the shards in parallel, and Iterator merges the shards in key order.
+A batch is atomic in each shard but not across shards.
+"""
+
+import heapq
+import json
+import time
+import urllib.parse
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from kona.key_value_store import (
+    KeyValueStore,
+    KeyValueStoreCancelableWriteBatch,
+    KeyValueStoreIterator,
+    KeyValueStoreWriteBatch,
+    _validate_args_bytes,
+    _validate_args_bytes_without_first,
+    _validate_keys_bytes,
+)
+
+# The layout of a sharded store made by KeyValueStoreSharded.open(). The number of shards can't be changed later.
+MANIFEST_FILE_NAME = "kona_shards.json"
+
+
+def crc32_shard(key: bytes, shards: int) -> int:
+    """The default shard function"""
+    return zlib.crc32(key) % shards
+
+
+class _KeyValueStoreWriteBatchSharded(KeyValueStoreWriteBatch):
+    def __init__(self, store: "KeyValueStoreSharded", batches: List[KeyValueStoreWriteBatch]):
+        self._store = store
+        self._batches = batches
+
+    @_validate_args_bytes_without_first
+    def put(self, key: bytes, value: bytes):
+        self._batches[self._store._shard_index(key)].put(key, value)
+
+    @_validate_args_bytes_without_first
+    def delete(self, key: bytes):
+        self._batches[self._store._shard_index(key)].delete(key)
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None):
+        for batch in self._batches:
+            batch.delete_range(start_key, stop_key)
+
+    def clear(self):
+        for batch in self._batches:
+            batch.clear()
+
+    def count(self) -> int:
+        return sum(batch.count() for batch in self._batches)
+
+    def size(self) -> int:
+        return sum(batch.size() for batch in self._batches)
+
+    def write(self):
+        self._store._map(lambda batch: batch.write(), [batch for batch in self._batches if batch.count() > 0])
+
+    def namespace(self, name: str) -> KeyValueStoreWriteBatch:
+        return _KeyValueStoreWriteBatchSharded(
+            self._store.namespace(name), [batch.namespace(name) for batch in self._batches]
+        )
+
+
+class _KeyValueStoreIteratorSharded(KeyValueStoreIterator):
+    """Merge iterators of the shards in key order"""
+
+    def __init__(
+        self,
+        store: "KeyValueStoreSharded",
+        start_key: bytes = None,
+        stop_key: bytes = None,
+        include_value=True,
+        **kwargs,
+    ):
+        super().__init__(start_key, stop_key, include_value, **kwargs)
+        self._store = store
+        self._iterators: List[KeyValueStoreIterator] = []
+        self._rows = iter(())
+
+    def _open(self, **kwargs):
+        self._close()
+        self._iterators = [
+            shard.Iterator(include_value=self._include_value, reverse=self._reverse, **kwargs)
+            for shard in self._store.shards
+        ]
+        rows = [self._shard_rows(iterator) for iterator in self._iterators]
+        self._rows = heapq.merge(*rows, key=lambda row: row[0], reverse=self._reverse)
+
+    def _shard_rows(self, iterator: KeyValueStoreIterator):
+        for row in iterator:
+            yield row if self._include_value else (row, None)
+
+    def _seek_first(self, key: Optional[bytes]):
+        self._open(start_key=key, stop_key=self._upper, include_stop=self._include_upper)
+
+    def _seek_last(self, key: Optional[bytes]):
+        self._open(start_key=self._lower, include_start=self._include_lower, stop_key=key)
+
+    def _read_next(self) -> Optional[Tuple[bytes, Optional[bytes]]]:
+        return next(self._rows, None)
+
+    def _close(self):
+        self._rows = iter(())
+        for iterator in self._iterators:
+            iterator.close()
+        self._iterators = []
+
+
+class KeyValueStoreSharded(KeyValueStore):
+    """Hash-sharded store over several stores
+
+    :param stores: stores of the shards. Their order must not change between runs.
+    :param shard_fn: a function of (key, the number of shards) to the index of the shard. crc32_shard if None
+    :param max_workers: threads which call the shards in parallel. The number of shards if None
+    """
+
+    def __init__(
+        self,
+        stores: List[KeyValueStore],
+        *,
+        shard_fn: Callable[[bytes, int], int] = None,
+        max_workers: int = None,
+        _executor: ThreadPoolExecutor = None,
+    ):
+        if not stores:
+            raise ValueError("stores must not be empty")
+
+        self._stores = list(stores)
+        self._shard_fn = shard_fn or crc32_shard
+        self._own_executor = _executor is None
+        self._executor = _executor or ThreadPoolExecutor(
+            max_workers=max_workers or len(self._stores), thread_name_prefix="kona-shard"
+        )
+        self._path: Optional[Path] = None
+        self._namespaces = {}
+
+    @staticmethod
+    def open(
+        uri: str,
+        *,
+        shards: int = None,
+        shard_store_type: str = None,
+        shard_uris: List[str] = None,
+        shard_fn: Callable[[bytes, int], int] = None,
+        max_workers: int = None,
+        **kwargs,
+    ) -> "KeyValueStoreSharded":
+        """Open a sharded store whose layout is kept in a manifest file of the directory of uri
+
+        :param uri: a file path URI of the sharded store (ex. file:///xxx/xxx)
+        :param shards: the number of shards. It is read from the manifest if None
+        :param shard_store_type: one of STORE_TYPE_XXX for shards. It is read from the manifest if None
+        :param shard_uris: URIs of shards, for example on different disks. Subdirectories of uri if None
+        :param shard_fn: a function of (key, the number of shards) to the index of the shard
+        :param max_workers: threads which call the shards in parallel
+        :param kwargs: options of the shard stores
+        """
+        uri_obj = urllib.parse.urlparse(uri)
+        if uri_obj.scheme != "file":
+            raise ValueError(f"Support file path URI only (ex. file:///xxx/xxx). uri={uri}")
+        path = Path(f"{(uri_obj.netloc if uri_obj.netloc else '')}{uri_obj.path}")
+
+        manifest_path = path / MANIFEST_FILE_NAME
+        manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+        if shard_uris is not None:
+            shards = shards or len(shard_uris)
+            if len(shard_uris) != shards:
+                raise ValueError(f"The number of shard_uris must be shards. shards={shards}, shard_uris={shard_uris}")
+        shards = shards or manifest.get("shards")
+        shard_store_type = shard_store_type or manifest.get("store_type")
+        if not shards or shards <= 0:
+            raise ValueError(f"shards must be positive. shards={shards}")
+        for key, value in (("shards", shards), ("store_type", shard_store_type)):
+            if key in manifest and manifest[key] != value:
+                raise ValueError(f"The sharded store has {key}={manifest[key]}, but {value} is given. uri={uri}")
+
+        if shard_uris is None:
+            shard_uris = manifest.get("shard_uris") or [
+                f"file://{(path / f'shard_{i:04}').absolute()}" for i in range(shards)
+            ]
+
+        path.mkdir(parents=True, exist_ok=True)
+        stores = [KeyValueStore.new(shard_uri, store_type=shard_store_type, **kwargs) for shard_uri in shard_uris]
+        manifest_path.write_text(
+            json.dumps({"shards": shards, "store_type": shard_store_type, "shard_uris": shard_uris}, indent=2)
+        )
+
+        store = KeyValueStoreSharded(stores, shard_fn=shard_fn, max_workers=max_workers)
+        store._path = path
+        return store
+
+    @property
+    def shards(self) -> List[KeyValueStore]:
+        return self._stores
+
+    def _shard_index(self, key: bytes) -> int:
+        return self._shard_fn(bytes(key), len(self._stores))
+
+    def _shard(self, key: bytes) -> KeyValueStore:
+        return self._stores[self._shard_index(key)]
+
+    def _map(self, func: Callable, items: list) -> list:
+        if len(items) <= 1:
+            return [func(item) for item in items]
+        return list(self._executor.map(func, items))
+
+    def namespace(self, name: str) -> "KeyValueStoreSharded":
+        if name == self.DEFAULT_NAMESPACE:
+            return self
+
+        namespace = self._namespaces.get(name)
+        if namespace is None:
+            namespace = KeyValueStoreSharded(
+                [store.namespace(name) for store in self._stores], shard_fn=self._shard_fn, _executor=self._executor
+            )
+            self._namespaces[name] = namespace
+        return namespace
+
+    @_validate_args_bytes_without_first
+    def get(self, key: bytes, *, default=None, **kwargs) -> bytes:
+        return self._shard(key).get(key, default=default, **kwargs)
+
+    def multi_get(self, keys: Iterable[bytes], *, default=None, **kwargs) -> List[Optional[bytes]]:
+        keys = _validate_keys_bytes(keys)
+        if default is not None:
+            _validate_args_bytes(default)
+
+        indexes_by_shard: Dict[int, List[int]] = {}
+        for i, key in enumerate(keys):
+            indexes_by_shard.setdefault(self._shard_index(key), []).append(i)
+
+        def _multi_get(shard_indexes: Tuple[int, List[int]]) -> List[Optional[bytes]]:
+            shard_index, indexes = shard_indexes
+            return self._stores[shard_index].multi_get([keys[i] for i in indexes], default=default, **kwargs)
+
+        shard_items = list(indexes_by_shard.items())
+        results: List[Optional[bytes]] = [None] * len(keys)
+        for (_, indexes), values in zip(shard_items, self._map(_multi_get, shard_items)):
+            for i, value in zip(indexes, values):
+                results[i] = value
+        return results
+
+    @_validate_args_bytes_without_first
+    def put(self, key: bytes, value: bytes, *, sync=False, **kwargs):
+        self._shard(key).put(key, value, sync=sync, **kwargs)
+
+    @_validate_args_bytes_without_first
+    def delete(self, key: bytes, *, sync=False, **kwargs):
+        self._shard(key).delete(key, sync=sync, **kwargs)
+
+    def delete_range(self, start_key: bytes = None, stop_key: bytes = None, **kwargs) -> int:
+        """Delete the range of the shards in parallel"""
+        return sum(self._map(lambda store: store.delete_range(start_key, stop_key, **kwargs), self._stores))
+
+    def _partition(self, chunk: List[Tuple[bytes, bytes]]) -> List[Tuple[KeyValueStore, list]]:
+        chunks = [[] for _ in self._stores]
+        for key, value in chunk:
+            chunks[self._shard_index(key)].append((key, value))
+        return [(store, shard_chunk) for store, shard_chunk in zip(self._stores, chunks) if shard_chunk]
+
+    def _bulk_load_chunk(self, chunk: List[Tuple[bytes, bytes]]):
+        self._map(lambda item: item[0]._bulk_load_chunk(item[1]), self._partition(chunk))
+
+    def _bulk_load_sorted_chunk(self, chunk: List[Tuple[bytes, bytes]]):
+        # A subsequence of sorted records is sorted, so every shard can take its fast path.
+        self._map(lambda item: item[0]._bulk_load_sorted_chunk(item[1]), self._partition(chunk))
+
+    def _bulk_load_finish(self, min_key: bytes, max_key: bytes):
+        self._map(lambda store: store._bulk_load_finish(min_key, max_key), self._stores)
+
+    def close(self):
+        for store in self._stores:
+            store.close()
+        if self._own_executor:
+            self._executor.shutdown()
+
+    def destroy_store(self):
+        self._map(lambda store: store.destroy_store(), self._stores)
+        if self._own_executor:
+            self._executor.shutdown()
+        if self._path is not None:
+            (self._path / MANIFEST_FILE_NAME).unlink(missing_ok=True)
+            if self._path.exists() and not any(self._path.iterdir()):
+                self._path.rmdir()
+
+    def compact_range(
+        self, start_key: bytes = None, stop_key: bytes = None, *, progress: Callable[[dict], None] = None
+    ) -> dict:
+        """Compact the shards one by one, so that compaction doesn't load the disks of all shards at once"""
+        stats = {"slices": 0, "compacted_slices": 0, "data_size_before": None, "data_size_after": None, "elapsed": 0.0}
+        start = time.perf_counter()
+        for store in self._stores:
+            shard_stats = store.compact_range(start_key, stop_key)
+            for key in ("slices", "compacted_slices", "data_size_before", "data_size_after"):
+                if shard_stats[key] is not None:
+                    stats[key] = (stats[key] or 0) + shard_stats[key]
+            stats["elapsed"] = time.perf_counter() - start
+            if progress is not None:
+                progress(dict(stats))
+        return stats
+
+    def checkpoint(self, path: str):
+        """Checkpoint the shards in parallel to subdirectories of path with a manifest for KeyValueStoreSharded.open()
+
+        Each shard is consistent, but the shards are not checkpointed at the same moment.
+        """
+        path = Path(path)
+        shard_paths = [path / f"shard_{i:04}" for i in range(len(self._stores))]
+        self._map(lambda item: item[0].checkpoint(str(item[1])), list(zip(self._stores, shard_paths)))
+        manifest = {
+            "shards": len(self._stores),
+            "store_type": self._stores[0].engine_stats()["engine"],
+            "shard_uris": [f"file://{shard_path.absolute()}" for shard_path in shard_paths],
+        }
+        (path / MANIFEST_FILE_NAME).write_text(json.dumps(manifest, indent=2))
+
+    @_validate_args_bytes_without_first
+    def key_may_exist(self, key: bytes) -> Tuple[bool, Any]:
+        return self._shard(key).key_may_exist(key)
+
+    def catch_up(self):
+        self._map(lambda store: store.catch_up(), self._stores)
+
+    def engine_stats(self) -> dict:
+        shard_stats = self._map(lambda store: store.engine_stats(), self._stores)
+        return {
+            "engine": "sharded",
+            "estimated_num_keys": sum(stats["estimated_num_keys"] or 0 for stats in shard_stats),
+            "data_size": sum(stats["data_size"] or 0 for stats in shard_stats),
+            "sharded": {"shards": shard_stats},
+        }
+
+    def WriteBatch(self, sync=False) -> KeyValueStoreWriteBatch:
+        return _KeyValueStoreWriteBatchSharded(self, [store.WriteBatch(sync=sync) for store in self._stores])
+
+    def CancelableWriteBatch(self, sync=False) -> KeyValueStoreCancelableWriteBatch:
+        return KeyValueStoreCancelableWriteBatch(self, sync=sync)
+
+    def Iterator(
+        self, start_key: bytes = None, stop_key: bytes = None, include_value: bool = True, **kwargs
+    ) -> KeyValueStoreIterator:
+        """Get Iterator
+
+        Iterators of all shards are opened and merged in key order.
+        """
+        return _KeyValueStoreIteratorSharded(self, start_key, stop_key, include_value, **kwargs)
@@ -0,0 +1,118 @@
+"""Scan a key range of a store in parallel worker processes.
+
+The range is split into sub-ranges of about the same size by KeyValueStore.split_key_range().
+Every worker opens its own read-only instance of the store, calls fn with an iterator of its sub-range
+and sends the result back. Results are returned in key order, so they can be streamed or reduced.
+
+    import operator
+    from functools import reduce
+
+    def count(it):
+        return sum(1 for _ in it)
+
+    total = reduce(operator.add, parallel_scan("file://./db", count, store_type="lmdb", workers=8))
+
+fn must be picklable, for example a function defined at the top level of a module.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterator, List, Optional
+
+from kona import settings
+from kona.key_value_store import KeyValueStore, KeyValueStoreIterator
+
+
+def _open_reader(uri: str, store_type: str, kwargs: dict) -> KeyValueStore:
+    return KeyValueStore.new(uri, store_type, read_only=True, **kwargs)
+
+
+def _split_key_range(
+    uri: str, store_type: str, kwargs: dict, start_key: Optional[bytes], stop_key: Optional[bytes], parts: int
+) -> List[bytes]:
+    with _open_reader(uri, store_type, kwargs) as store:
+        return store.split_key_range(start_key, stop_key, parts)
+
+
+def _scan_range(
+    uri: str,
+    store_type: str,
+    kwargs: dict,
+    fn: Callable[[KeyValueStoreIterator], Any],
+    start_key: Optional[bytes],
+    stop_key: Optional[bytes],
+    include_stop: bool,
+    include_value: bool,
+) -> Any:
+    with _open_reader(uri, store_type, kwargs) as store:
+        with store.Iterator(start_key, stop_key, include_value=include_value, include_stop=include_stop) as it:
+            return fn(it)
+
+
+def parallel_scan(
+    uri: str,
+    fn: Callable[[KeyValueStoreIterator], Any],
+    store_type: str = None,
+    *,
+    start_key: bytes = None,
+    stop_key: bytes = None,
+    include_value: bool = True,
+    workers: int = None,
+    parts: int = None,
+    mp_context: multiprocessing.context.BaseContext = None,
+    **kwargs,
+) -> Iterator[Any]:
+    """Call fn with an iterator of every sub-range in worker processes and yield the results in key order
+
+    :param uri: a file path URI of the store (ex. file:///xxx/xxx)
+    :param fn: a picklable function of a KeyValueStoreIterator of a sub-range to a picklable result
+    :param store_type: one of STORE_TYPE_XXX except STORE_TYPE_DICT. settings.DEFAULT_KEY_VALUE_STORE_TYPE if None.
+    :param start_key: a start key (inclusive)
+    :param stop_key: a stop key (inclusive)
+    :param include_value: iterators return (key, value) if True, keys only if False
+    :param workers: the number of worker processes. os.cpu_count() if None.
+    :param parts: the number of sub-ranges. workers if None. More parts than workers balance skewed ranges better.
+    :param mp_context: a multiprocessing context of the workers
+    :param kwargs: options of the store. read_only=True is added.
+    """
+    if store_type is None:
+        store_type = settings.DEFAULT_KEY_VALUE_STORE_TYPE
+    if store_type == KeyValueStore.STORE_TYPE_DICT:
+        raise ValueError("An in-memory store can't be opened by worker processes")
+    workers = workers or os.cpu_count() or 1
+    parts = parts or workers
+    if workers <= 0 or parts <= 0:
+        raise ValueError(f"workers and parts must be positive. workers={workers}, parts={parts}")
+
+    # Arguments are validated above before the generator starts.
+    return _parallel_scan(uri, fn, store_type, start_key, stop_key, include_value, workers, parts, mp_context, kwargs)
+
+
+def _parallel_scan(
+    uri: str,
+    fn: Callable[[KeyValueStoreIterator], Any],
+    store_type: str,
+    start_key: Optional[bytes],
+    stop_key: Optional[bytes],
+    include_value: bool,
+    workers: int,
+    parts: int,
+    mp_context: Optional[multiprocessing.context.BaseContext],
+    kwargs: dict,
+) -> Iterator[Any]:
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+        # The range is split in a worker too, so that this process never opens the store.
+        boundaries = executor.submit(_split_key_range, uri, store_type, kwargs, start_key, stop_key, parts).result()
+        lowers = [start_key] + boundaries
+        uppers = boundaries + [stop_key]
+        futures = [
+            executor.submit(_scan_range, uri, store_type, kwargs, fn, lower, upper, i == len(lowers) - 1, include_value)
+            for i, (lower, upper) in enumerate(zip(lowers, uppers))
+        ]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
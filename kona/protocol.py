@@ -0,0 +1,115 @@
+"""Binary protocol of the kona server (see kona.server and kona.key_value_store_client)
+
+Requests and responses are frames:
+
+    payload length (u32), request id (u32), opcode of a request or status of a response (u8), payload
+
+A payload is a sequence of fields: length (u32) and bytes, or NONE_LENGTH for None. Integers and flags are
+fields too (see pack_int). All integers are little endian.
+
+A client may send requests without waiting for responses. The server answers the requests of a connection in order,
+and its requests see the writes of the requests sent before them.
+"""
+
+import struct
+from typing import List, Optional, Sequence
+
+from kona.key_value_store import KeyValueStoreError
+
+HEADER = struct.Struct("<IIB")
+_FIELD_LENGTH = struct.Struct("<I")
+_INT = struct.Struct("<q")
+
+NONE_LENGTH = 0xFFFFFFFF
+# Frames larger than this are refused, since a broken frame would make the peer allocate its length.
+MAX_PAYLOAD_SIZE = 256 * 1024 * 1024
+
+# Opcodes
+OP_GET = 1  # key -> value (STATUS_MISSING if it doesn't exist)
+OP_MULTI_GET = 2  # keys -> values or None
+OP_WRITE = 3  # sync, (WRITE_PUT, key, value | WRITE_DELETE, key | WRITE_DELETE_RANGE, start, stop)* -> nothing
+OP_DELETE_RANGE = 4  # start, stop -> count
+OP_KEY_MAY_EXIST = 5  # key -> flag, value (nothing if the store can't answer)
+OP_ITER_OPEN = 6  # start, stop, include_value, reverse -> cursor
+OP_ITER_NEXT = 7  # cursor, n -> done, (key, value)*
+OP_ITER_CLOSE = 8  # cursor -> nothing
+OP_SNAPSHOT = 9  # path -> nothing. A checkpoint of the store (KeyValueStore.checkpoint)
+OP_ENGINE_STATS = 10  # -> JSON
+OP_COMPACT_RANGE = 11  # start, stop -> JSON
+
+# Operations of OP_WRITE
+WRITE_PUT = b"p"
+WRITE_DELETE = b"d"
+WRITE_DELETE_RANGE = b"r"
+
+# Statuses
+STATUS_OK = 0
+STATUS_MISSING = 1
+STATUS_VALUE_ERROR = 2
+STATUS_ERROR = 3
+
+
+class ProtocolError(KeyValueStoreError):
+    pass
+
+
+def pack_int(value: int) -> bytes:
+    return _INT.pack(value)
+
+
+def unpack_int(field: Optional[bytes]) -> int:
+    if field is None or len(field) != _INT.size:
+        raise ProtocolError(f"An integer field is broken. field={field!r}")
+    return _INT.unpack(field)[0]
+
+
+def pack_flag(value: bool) -> bytes:
+    return b"\x01" if value else b"\x00"
+
+
+def unpack_flag(field: Optional[bytes]) -> bool:
+    return field == b"\x01"
+
+
+def pack_fields(fields: Sequence[Optional[bytes]]) -> bytes:
+    chunks = []
+    for field in fields:
+        if field is None:
+            chunks.append(_FIELD_LENGTH.pack(NONE_LENGTH))
+        else:
+            chunks.append(_FIELD_LENGTH.pack(len(field)))
+            chunks.append(field)
+    return b"".join(chunks)
+
+
+def unpack_fields(payload: bytes) -> List[Optional[bytes]]:
+    fields, offset = [], 0
+    view = memoryview(payload)
+    while offset < len(payload):
+        if offset + _FIELD_LENGTH.size > len(payload):
+            raise ProtocolError("A field length is truncated")
+        (length,) = _FIELD_LENGTH.unpack_from(payload, offset)
+        offset += _FIELD_LENGTH.size
+        if length == NONE_LENGTH:
+            fields.append(None)
+            continue
+        if offset + length > len(payload):
+            raise ProtocolError("A field is truncated")
+        fields.append(bytes(view[offset : offset + length]))
+        offset += length
+    return fields
+
+
+def pack_frame(request_id: int, code: int, fields: Sequence[Optional[bytes]] = ()) -> bytes:
+    payload = pack_fields(fields)
+    if len(payload) > MAX_PAYLOAD_SIZE:
+        raise ProtocolError(f"The frame is too large. size={len(payload)}")
+    return HEADER.pack(len(payload), request_id, code) + payload
+
+
+def unpack_header(header: bytes):
+    """Return (payload length, request id, code) of a frame header"""
+    length, request_id, code = HEADER.unpack(header)
+    if length > MAX_PAYLOAD_SIZE:
+        raise ProtocolError(f"The frame is too large. size={length}")
+    return length, request_id, code
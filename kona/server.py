@@ -0,0 +1,374 @@
+"""KonaServer shares one KeyValueStore with processes of a host over a Unix domain socket.
+
+RocksDB and LMDB allow one writer process, so worker processes connect to the server which owns the store,
+with KeyValueStoreClient (store_type="client"). Requests of a connection are pipelined (see kona.protocol):
+
+- Reads in a row run concurrently in worker threads.
+- Writes of all connections which arrive while a group is being written are coalesced into the next WriteBatch.
+- A read waits for the writes sent before it, and a write waits for the reads sent before it.
+
+Run it with `kona serve` (see kona.__main__).
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import signal
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from kona import protocol
+from kona.key_value_store import KeyValueStore, KeyValueStoreIterator
+
+DEFAULT_MAX_WORKERS = 4
+
+# Requests which wait for all requests sent before them, and which the next requests wait for
+_EXCLUSIVE_OPS = {protocol.OP_DELETE_RANGE, protocol.OP_SNAPSHOT, protocol.OP_COMPACT_RANGE}
+
+
+class _Cursor:
+    __slots__ = ("iterator", "include_value", "lock")
+
+    def __init__(self, iterator: KeyValueStoreIterator, include_value: bool):
+        self.iterator = iterator
+        self.include_value = include_value
+        self.lock = threading.Lock()
+
+
+class _WriteRequest:
+    __slots__ = ("operations", "sync", "future")
+
+    def __init__(self, operations: List[tuple], sync: bool, future: asyncio.Future):
+        self.operations = operations
+        self.sync = sync
+        self.future = future
+
+
+def _parse_write(fields: List[Optional[bytes]]) -> Tuple[List[tuple], bool]:
+    if not fields:
+        raise ValueError("A write request has no sync flag")
+    sync = protocol.unpack_flag(fields[0])
+    operations, index = [], 1
+    while index < len(fields):
+        kind = fields[index]
+        if kind == protocol.WRITE_PUT:
+            operation, index = (kind, fields[index + 1], fields[index + 2]), index + 3
+        elif kind == protocol.WRITE_DELETE:
+            operation, index = (kind, fields[index + 1]), index + 2
+        elif kind == protocol.WRITE_DELETE_RANGE:
+            operation, index = (kind, fields[index + 1], fields[index + 2]), index + 3
+        else:
+            raise ValueError(f"Unknown write operation. operation={kind!r}")
+        if index > len(fields) or (kind != protocol.WRITE_DELETE_RANGE and None in operation[1:]):
+            raise ValueError("A write operation is broken")
+        operations.append(operation)
+    return operations, sync
+
+
+class KonaServer:
+    """Serve a KeyValueStore over a Unix domain socket
+
+    :param store: the served store. The server doesn't close it.
+    :param path: the path of the socket. A socket file left at the path is replaced.
+    :param max_workers: the number of worker threads running calls of the store
+    """
+
+    def __init__(self, store: KeyValueStore, path: str, *, max_workers: int = DEFAULT_MAX_WORKERS):
+        if max_workers <= 0:
+            raise ValueError(f"max_workers must be positive. max_workers={max_workers}")
+        self._store = store
+        self._path = str(path)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kona-server")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._write_requests: List[_WriteRequest] = []
+        self._write_event: Optional[asyncio.Event] = None
+        self._closing = False
+        self._cursor_ids = itertools.count(1)
+        self._connections = set()
+        self._stats = {"connections": 0, "requests": 0, "write_groups": 0, "write_requests": 0, "max_group_size": 0}
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def stats(self) -> dict:
+        """Return numbers of connections, requests and coalesced write groups"""
+        stats = dict(self._stats)
+        stats["open_connections"] = len(self._connections)
+        return stats
+
+    async def start(self):
+        if os.path.exists(self._path) and stat.S_ISSOCK(os.stat(self._path).st_mode):
+            os.unlink(self._path)
+        self._write_event = asyncio.Event()
+        self._writer_task = asyncio.ensure_future(self._run_writer())
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=self._path)
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self):
+        """Stop accepting connections, close connections and write pending writes"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in list(self._connections):
+            task.cancel()
+        if self._connections:
+            await asyncio.wait(list(self._connections))
+        if self._writer_task is not None:
+            self._closing = True
+            self._write_event.set()
+            await self._writer_task
+            self._writer_task = None
+        self._executor.shutdown(wait=True)
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _run(self, func, *args) -> asyncio.Future:
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _run_writer(self):
+        # A group is written while the next one is gathered, so writes are coalesced without waiting for a window.
+        while True:
+            await self._write_event.wait()
+            if self._closing and not self._write_requests:
+                return
+            await self._write_pending()
+
+    async def _write_pending(self):
+        self._write_event.clear()
+        requests, self._write_requests = self._write_requests, []
+        if not requests:
+            return
+        errors = await self._run(self._write_group, requests)
+        self._stats["write_groups"] += 1
+        self._stats["write_requests"] += len(requests)
+        self._stats["max_group_size"] = max(self._stats["max_group_size"], len(requests))
+        for request, error in zip(requests, errors):
+            if request.future.done():
+                continue
+            if error is None:
+                request.future.set_result((protocol.STATUS_OK, []))
+            else:
+                request.future.set_exception(error)
+
+    def _write_group(self, requests: List[_WriteRequest]) -> List[Optional[BaseException]]:
+        try:
+            self._write(requests)
+            return [None] * len(requests)
+        except Exception:
+            # Write the requests one by one, so that a broken request fails alone.
+            pass
+        errors = []
+        for request in requests:
+            try:
+                self._write([request])
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+        return errors
+
+    def _write(self, requests: List[_WriteRequest]):
+        batch = self._store.WriteBatch(sync=any(request.sync for request in requests))
+        for request in requests:
+            for operation in request.operations:
+                if operation[0] == protocol.WRITE_PUT:
+                    batch.put(operation[1], operation[2])
+                elif operation[0] == protocol.WRITE_DELETE:
+                    batch.delete(operation[1])
+                else:
+                    batch.delete_range(operation[1], operation[2])
+        batch.write()
+
+    def _submit_write(self, fields: List[Optional[bytes]]) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        try:
+            operations, sync = _parse_write(fields)
+        except (ValueError, IndexError) as e:
+            future.set_exception(ValueError(str(e)))
+            return future
+        self._write_requests.append(_WriteRequest(operations, sync, future))
+        self._write_event.set()
+        return future
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        self._stats["connections"] += 1
+        cursors: Dict[int, _Cursor] = {}
+        responses: asyncio.Queue = asyncio.Queue()
+        responder = asyncio.ensure_future(self._respond(responses, writer))
+        try:
+            await self._read_requests(reader, responses, cursors)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except protocol.ProtocolError as e:
+            logger.warning(f"A connection sent a broken frame. e={e}")
+        finally:
+            self._connections.discard(task)
+            await responses.put(None)
+            await asyncio.gather(responder, return_exceptions=True)
+            if cursors:
+                await self._run(self._close_cursors, list(cursors.values()))
+            writer.close()
+
+    async def _read_requests(self, reader: asyncio.StreamReader, responses: asyncio.Queue, cursors: Dict[int, _Cursor]):
+        reads: List[asyncio.Future] = []
+        last_write: Optional[asyncio.Future] = None
+        last_exclusive = False
+        while True:
+            length, request_id, op = protocol.unpack_header(await reader.readexactly(protocol.HEADER.size))
+            fields = protocol.unpack_fields(await reader.readexactly(length))
+            self._stats["requests"] += 1
+
+            if op == protocol.OP_WRITE or op in _EXCLUSIVE_OPS:
+                if reads:
+                    await asyncio.wait(reads)
+                    reads = []
+            # Writes are ordered by the writer. Others wait for the last write, and all wait for an exclusive request.
+            if last_write is not None and (op != protocol.OP_WRITE or last_exclusive):
+                await asyncio.wait([last_write])
+                last_write = None
+
+            if op == protocol.OP_WRITE:
+                future = last_write = self._submit_write(fields)
+            else:
+                future = self._run(self._call, op, fields, cursors)
+                if op in _EXCLUSIVE_OPS:
+                    last_write = future
+                else:
+                    reads.append(future)
+            last_exclusive = op in _EXCLUSIVE_OPS
+            await responses.put((request_id, future))
+
+    async def _respond(self, responses: asyncio.Queue, writer: asyncio.StreamWriter):
+        while True:
+            item = await responses.get()
+            if item is None:
+                return
+            request_id, future = item
+            try:
+                status, fields = await asyncio.shield(future)
+            except KeyError:
+                status, fields = protocol.STATUS_MISSING, []
+            except ValueError as e:
+                status, fields = protocol.STATUS_VALUE_ERROR, [str(e).encode()]
+            except Exception as e:
+                status, fields = protocol.STATUS_ERROR, [f"{type(e).__name__}: {e}".encode()]
+            try:
+                writer.write(protocol.pack_frame(request_id, status, fields))
+            except protocol.ProtocolError as e:
+                writer.write(protocol.pack_frame(request_id, protocol.STATUS_ERROR, [str(e).encode()]))
+            if responses.empty():
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    return
+
+    def _call(self, op: int, fields: List[Optional[bytes]], cursors: Dict[int, _Cursor]) -> Tuple[int, list]:
+        """Run a request in a worker thread and return (status, response fields)"""
+        store = self._store
+        try:
+            if op == protocol.OP_GET:
+                return protocol.STATUS_OK, [store.get(fields[0])]
+            if op == protocol.OP_MULTI_GET:
+                return protocol.STATUS_OK, store.multi_get(fields)
+            if op == protocol.OP_DELETE_RANGE:
+                return protocol.STATUS_OK, [protocol.pack_int(store.delete_range(fields[0], fields[1]))]
+            if op == protocol.OP_KEY_MAY_EXIST:
+                result = store.key_may_exist(fields[0])
+                if result is NotImplemented:
+                    return protocol.STATUS_OK, []
+                return protocol.STATUS_OK, [protocol.pack_flag(result[0]), result[1]]
+            if op == protocol.OP_ITER_OPEN:
+                return protocol.STATUS_OK, [protocol.pack_int(self._open_cursor(fields, cursors))]
+            if op == protocol.OP_ITER_NEXT:
+                return protocol.STATUS_OK, self._next_rows(fields, cursors)
+            if op == protocol.OP_ITER_CLOSE:
+                cursor = cursors.pop(protocol.unpack_int(fields[0]), None)
+                if cursor is not None:
+                    self._close_cursors([cursor])
+                return protocol.STATUS_OK, []
+            if op == protocol.OP_SNAPSHOT:
+                store.checkpoint(fields[0].decode())
+                return protocol.STATUS_OK, []
+            if op == protocol.OP_ENGINE_STATS:
+                return protocol.STATUS_OK, [json.dumps(store.engine_stats(), default=str).encode()]
+            if op == protocol.OP_COMPACT_RANGE:
+                stats = store.compact_range(fields[0], fields[1])
+                return protocol.STATUS_OK, [json.dumps(stats, default=str).encode()]
+        except IndexError:
+            raise ValueError(f"A request has too few fields. op={op}")
+        raise ValueError(f"Unknown opcode. op={op}")
+
+    def _open_cursor(self, fields: List[Optional[bytes]], cursors: Dict[int, _Cursor]) -> int:
+        start_key, stop_key = fields[0], fields[1]
+        include_value, reverse = protocol.unpack_flag(fields[2]), protocol.unpack_flag(fields[3])
+        iterator = self._store.Iterator(start_key, stop_key, include_value, reverse=reverse)
+        cursor_id = next(self._cursor_ids)
+        cursors[cursor_id] = _Cursor(iterator, include_value)
+        return cursor_id
+
+    def _next_rows(self, fields: List[Optional[bytes]], cursors: Dict[int, _Cursor]) -> list:
+        cursor = cursors.get(protocol.unpack_int(fields[0]))
+        if cursor is None:
+            raise ValueError("The cursor is not open")
+        count = protocol.unpack_int(fields[1])
+        with cursor.lock:
+            rows = cursor.iterator.next_n(count)
+        result = [protocol.pack_flag(len(rows) < count)]
+        for row in rows:
+            if cursor.include_value:
+                result.extend(row)
+            else:
+                result.extend((row, None))
+        return result
+
+    @staticmethod
+    def _close_cursors(cursors: List[_Cursor]):
+        for cursor in cursors:
+            with cursor.lock:
+                cursor.iterator.close()
+
+
+def serve(uri: str, store_type: str, path: str, *, max_workers: int = DEFAULT_MAX_WORKERS, **kwargs):
+    """Open a store and serve it at the socket path until SIGINT or SIGTERM
+
+    :param uri: the URI of the served store
+    :param store_type: the type of the served store
+    :param path: the path of the socket
+    :param max_workers: the number of worker threads running calls of the store
+    :param kwargs: options of KeyValueStore.new()
+    """
+    store = KeyValueStore.new(uri, store_type, **kwargs)
+
+    async def _serve():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        async with KonaServer(store, path, max_workers=max_workers) as server:
+            logger.info(f"Serving {uri} ({store_type}) at {server.path}")
+            await stop.wait()
+
+    try:
+        asyncio.run(_serve())
+    finally:
+        store.close()
@@ -0,0 +1,53 @@
+"""Test kona.benchmark"""
+import json
+
+import pytest
+
+from kona.benchmark import (
+    WORKLOADS,
+    compare_reports,
+    main,
+    make_key,
+    percentile,
+    run_benchmark,
+)
+
+
+class TestBenchmark:
+    def test_make_key(self):
+        assert make_key(1, "sequential") < make_key(2, "sequential")
+        assert make_key(1, "random") != make_key(1, "sequential")
+        assert len(make_key(1, "random")) == len(make_key(2, "random"))
+        with pytest.raises(ValueError):
+            make_key(1, "unknown")
+
+    def test_percentile(self):
+        latencies = [float(i) for i in range(1, 1001)]
+        assert percentile(latencies, 0.5) == 500.0
+        assert percentile(latencies, 0.99) == 990.0
+        assert percentile(latencies, 0.999) == 999.0
+        assert percentile([], 0.5) == 0.0
+
+    @pytest.mark.parametrize("workload", list(WORKLOADS))
+    def test_run_benchmark(self, workload):
+        result = run_benchmark(
+            "dict", workload, value_size=16, key_order="random", record_count=100, operation_count=50, batch_size=10
+        )
+        assert result["operations"] == 50
+        assert sum(result["operation_counts"].values()) == 50
+        assert result["p50_us"] <= result["p99_us"] <= result["p999_us"] <= result["max_us"]
+
+    def test_main_output_and_baseline(self, tmp_path):
+        output = tmp_path / "report.json"
+        argv = ["--store-types", "dict", "--workloads", "C", "--value-sizes", "16", "--key-orders", "sequential"]
+        argv += ["--record-count", "100", "--operation-count", "50"]
+        assert main(argv + ["--output", str(output)]) == 0
+
+        report = json.loads(output.read_text())
+        assert len(report["results"]) == 1
+
+        slower = json.loads(output.read_text())
+        slower["results"][0]["ops_per_sec"] /= 2
+        slower["results"][0]["p99_us"] *= 2
+        assert compare_reports(report, slower)
+        assert not compare_reports(slower, report)
@@ -0,0 +1,25 @@
+"""Test BloomFilter"""
+import pytest
+
+from kona.bloom_filter import BloomFilter
+
+
+class TestBloomFilter:
+    def test_bloom_filter(self):
+        bloom_filter = BloomFilter(1000, bits_per_key=10)
+        keys = [f"test_key_{i}".encode() for i in range(1000)]
+        bloom_filter.update(keys)
+
+        assert all(key in bloom_filter for key in keys)
+        false_positives = sum(1 for i in range(10000) if bloom_filter.may_contain(f"unknown_key_{i}".encode()))
+        assert false_positives < 300
+        assert bloom_filter.info()["false_positive_rate"] < 0.02
+
+        restored = BloomFilter.from_bytes(bloom_filter.to_bytes())
+        assert restored.count == 1000
+        assert all(restored.may_contain(key) for key in keys)
+
+        with pytest.raises(ValueError):
+            BloomFilter.from_bytes(b"not a bloom filter" * 4)
+        with pytest.raises(ValueError):
+            BloomFilter(0)
@@ -0,0 +1,108 @@
+"""Test checkpoint(), export() and import_()"""
+import io
+import shutil
+import struct
+import threading
+
+import pytest
+
+from kona.export import ExportFormatError, read_records, write_records
+from kona.key_value_store import KeyValueStore
+
+
+class TestExport:
+    store_types = ["rocksdb", "lmdb"]
+
+    def _get_test_items(self, count: int):
+        return {f"test_key_{i:05}".encode(): f"test_value_{i}".encode() * (i % 7 + 1) for i in range(count)}
+
+    def test_records_format(self):
+        items = list(self._get_test_items(2000).items()) + [(b"empty_value_key", b"")]
+        stream = io.BytesIO()
+        stats = write_records(stream, items, block_size=4096)
+        assert stats == {"count": len(items), "bytes": len(stream.getvalue())}
+
+        assert list(read_records(io.BytesIO(stream.getvalue()))) == items
+        # The total count is an u64 after the end block, so exports of more than 2^32 - 1 records can be written.
+        assert struct.unpack("<Q", stream.getvalue()[-8:]) == (len(items),)
+
+        # A stream of the first version ends with the total count in the end block
+        v1 = stream.getvalue()[:-20].replace(b"KONAEXP2", b"KONAEXP1", 1) + struct.pack("<III", 0, len(items), 0)
+        assert list(read_records(io.BytesIO(v1))) == items
+
+        empty = io.BytesIO()
+        write_records(empty, [])
+        assert list(read_records(io.BytesIO(empty.getvalue()))) == []
+
+        # Truncated in a block and before the end block
+        for size in (len(stream.getvalue()) // 2, len(stream.getvalue()) - 1):
+            with pytest.raises(ExportFormatError):
+                list(read_records(io.BytesIO(stream.getvalue()[:size])))
+
+        # A flipped byte in a payload
+        corrupted = bytearray(stream.getvalue())
+        corrupted[100] ^= 0xFF
+        with pytest.raises(ExportFormatError):
+            list(read_records(io.BytesIO(bytes(corrupted))))
+
+        with pytest.raises(ExportFormatError):
+            list(read_records(io.BytesIO(b"not an export stream")))
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_export_import(self, store_type):
+        items = self._get_test_items(3000)
+        store = KeyValueStore.new("file://./key_value_store_test_export", store_type=store_type, create_if_missing=True)
+        copy = KeyValueStore.new("file://./key_value_store_test_import", store_type="dict")
+        try:
+            store.bulk_load(items.items())
+
+            stream = io.BytesIO()
+            assert store.export(stream)["count"] == len(items)
+            stream.seek(0)
+            assert copy.import_(stream, chunk_size=500)["count"] == len(items)
+            with copy.Iterator() as it:
+                assert dict(it) == items
+
+            stream = io.BytesIO()
+            assert store.export(stream, b"test_key_00010", b"test_key_00019")["count"] == 10
+            stream.seek(0)
+            assert [key for key, _ in read_records(stream)] == [f"test_key_{i:05}".encode() for i in range(10, 20)]
+        finally:
+            store.destroy_store()
+            copy.destroy_store()
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_checkpoint(self, store_type):
+        items = self._get_test_items(3000)
+        store = KeyValueStore.new(
+            "file://./key_value_store_test_checkpoint", store_type=store_type, create_if_missing=True
+        )
+        shutil.rmtree("./key_value_store_test_checkpoint_copy", ignore_errors=True)
+        stop = threading.Event()
+
+        def _write():
+            i = 0
+            while not stop.is_set():
+                store.put(f"writing_key_{i}".encode(), b"writing_value")
+                i += 1
+
+        try:
+            store.bulk_load(items.items())
+            writer = threading.Thread(target=_write)
+            writer.start()
+            try:
+                store.checkpoint("./key_value_store_test_checkpoint_copy")
+            finally:
+                stop.set()
+                writer.join()
+            store.put(b"test_key_00000", b"test_value_after_checkpoint")
+
+            copy = KeyValueStore.new("file://./key_value_store_test_checkpoint_copy", store_type=store_type)
+            try:
+                assert copy.get(b"test_key_00000") == items[b"test_key_00000"]
+                with copy.Iterator(stop_key=b"test_key_99999") as it:
+                    assert dict(it) == items
+            finally:
+                copy.destroy_store()
+        finally:
+            store.destroy_store()
@@ -96,6 +96,143 @@ class TestKeyValueStore:
 
         store.destroy_store()
 
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_key_value_store_multi_get(self, store_type):
+        test_items = self._get_test_items(5)
+
+        store = self._new_store("file://./key_value_store_test_multi_get", store_type=store_type)
+
+        for key, value in test_items.items():
+            store.put(key, value)
+
+        keys = [b"test_key_3", b"unknown_key", b"test_key_1", b"test_key_3"]
+        assert store.multi_get(keys) == [b"test_value_3", None, b"test_value_1", b"test_value_3"]
+        assert store.multi_get(keys, default=b"test_default_value") == [
+            b"test_value_3",
+            b"test_default_value",
+            b"test_value_1",
+            b"test_value_3",
+        ]
+        assert store.multi_get(key for key in test_items) == list(test_items.values())
+        assert store.multi_get([]) == []
+
+        with pytest.raises(ValueError):
+            store.multi_get([b"test_key_1", "test_key_2"])
+
+        store.destroy_store()
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_key_value_store_iterator(self, store_type):
+        test_items = self._get_test_items(9)
+        test_items[b"other_key"] = b"other_value"
+
+        store = self._new_store("file://./key_value_store_test_iterator", store_type=store_type)
+        for key, value in test_items.items():
+            store.put(key, value)
+
+        def keys_of(iterator):
+            return [bytes(row[0]) for row in iterator]
+
+        # Bounds don't need to exist in the store.
+        assert keys_of(store.Iterator(start_key=b"test_key_2a", stop_key=b"test_key_4a")) == [
+            b"test_key_3",
+            b"test_key_4",
+        ]
+        assert keys_of(store.Iterator(start_key=b"test_key_2", stop_key=b"test_key_4")) == [
+            b"test_key_2",
+            b"test_key_3",
+            b"test_key_4",
+        ]
+        assert keys_of(
+            store.Iterator(start_key=b"test_key_2", stop_key=b"test_key_4", include_start=False, include_stop=False)
+        ) == [b"test_key_3"]
+        assert keys_of(store.Iterator(stop_key=b"test_key_1")) == [b"other_key", b"test_key_1"]
+
+        # Reverse
+        assert keys_of(store.Iterator(start_key=b"test_key_7", reverse=True)) == [
+            b"test_key_9",
+            b"test_key_8",
+            b"test_key_7",
+        ]
+        assert keys_of(store.Iterator(stop_key=b"test_key_2a", reverse=True)) == [
+            b"test_key_2",
+            b"test_key_1",
+            b"other_key",
+        ]
+        assert keys_of(
+            store.Iterator(start_key=b"test_key_1", stop_key=b"test_key_3", include_stop=False, reverse=True)
+        ) == [b"test_key_2", b"test_key_1"]
+
+        # Prefix
+        assert keys_of(store.Iterator(prefix=b"test_")) == [key for key in sorted(test_items) if key != b"other_key"]
+        assert keys_of(store.Iterator(prefix=b"other", reverse=True)) == [b"other_key"]
+        assert keys_of(store.Iterator(prefix=b"unknown")) == []
+
+        # Keys only
+        assert [bytes(key) for key in store.Iterator(prefix=b"test_key_1", include_value=False)] == [b"test_key_1"]
+
+        # Chunked fetch and resume tokens
+        iterator = store.Iterator(prefix=b"test_")
+        assert [bytes(key) for key, _ in iterator.next_n(4)] == [
+            b"test_key_1",
+            b"test_key_2",
+            b"test_key_3",
+            b"test_key_4",
+        ]
+        resume_token = iterator.resume_token
+        assert resume_token == b"test_key_4"
+        iterator.close()
+        assert iterator.next_n(4) == []
+
+        iterator = store.Iterator(prefix=b"test_", resume_token=resume_token)
+        assert [bytes(key) for key, _ in iterator.next_n(4)] == [
+            b"test_key_5",
+            b"test_key_6",
+            b"test_key_7",
+            b"test_key_8",
+        ]
+        assert [bytes(key) for key, _ in iterator.next_n(4)] == [b"test_key_9"]
+        assert iterator.next_n(4) == []
+
+        iterator = store.Iterator(reverse=True, resume_token=b"test_key_3")
+        assert keys_of(iterator.next_n(2)) == [b"test_key_2", b"test_key_1"]
+
+        # Seek
+        with store.Iterator(start_key=b"test_key_2", stop_key=b"test_key_8") as iterator:
+            iterator.seek(b"test_key_6")
+            assert keys_of(iterator) == [b"test_key_6", b"test_key_7", b"test_key_8"]
+
+        store.destroy_store()
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_key_value_store_bulk_load(self, store_type):
+        store = self._new_store("file://./key_value_store_test_bulk_load", store_type=store_type)
+        store.put(b"test_key_0500", b"existing_value")
+
+        sorted_items = [(f"test_key_{i:04}".encode(), f"test_value_{i:04}".encode()) for i in range(1000)]
+        progresses = []
+        stats = store.bulk_load(sorted_items, chunk_size=300, progress=progresses.append)
+        assert stats["count"] == 1000
+        assert stats["sorted_count"] == 1000
+        assert stats["bytes"] == sum(len(key) + len(value) for key, value in sorted_items)
+        assert [progress["count"] for progress in progresses] == [300, 600, 900, 1000]
+
+        unsorted_items = [(f"test_key_{i:04}".encode(), b"reloaded_value") for i in (1500, 1200, 1300, 1200)]
+        stats = store.bulk_load(iter(unsorted_items))
+        assert stats["count"] == 4
+        assert stats["sorted_count"] == 0
+
+        assert store.get(b"test_key_0500") == b"test_value_0500"
+        assert store.get(b"test_key_1200") == b"reloaded_value"
+        assert [bytes(key) for key, _ in store.Iterator()] == sorted(
+            [key for key, _ in sorted_items] + [b"test_key_1200", b"test_key_1300", b"test_key_1500"]
+        )
+
+        with pytest.raises(ValueError):
+            store.bulk_load([(b"test_key", "test_value")])
+
+        store.destroy_store()
+
     @pytest.mark.parametrize("store_type", store_types, ids=store_types)
     def test_key_value_store_write_batch(self, store_type):
         store = self._new_store("file://./key_value_store_test_write_batch", store_type=store_type)
@@ -103,6 +240,9 @@ class TestKeyValueStore:
         batch = store.WriteBatch()
         batch.put(b"test_key_1", b"test_value_1")
         batch.put(b"test_key_2", b"test_value_2")
+        batch.delete(b"test_key_3")
+        assert batch.count() == 3
+        assert batch.size() == 22 + 22 + 10
 
         with pytest.raises(KeyError):
             store.get(b"test_key_1")
@@ -113,6 +253,10 @@ class TestKeyValueStore:
         assert store.get(b"test_key_1") == b"test_value_1"
         assert store.get(b"test_key_2") == b"test_value_2"
 
+        batch.clear()
+        assert batch.count() == 0
+        assert batch.size() == 0
+
         store.destroy_store()
 
     @pytest.mark.parametrize("store_type", store_types, ids=store_types)
@@ -158,3 +302,249 @@ class TestKeyValueStore:
         assert count == len(test_items)
 
         store.destroy_store()
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_key_value_store_cancelable_write_batch_savepoint(self, store_type):
+        test_items = self._get_test_items(5)
+        store = self._new_store("file://./key_value_store_test_cancelable_savepoint", store_type=store_type)
+        for key, value in test_items.items():
+            store.put(key, value)
+
+        batch = store.CancelableWriteBatch()
+        batch.put(b"test_key_1", b"edited_value_1")
+        batch.delete(b"test_key_2")
+        batch.write()
+
+        savepoint1 = batch.savepoint()
+        batch.put(b"test_key_1", b"edited_value_1_2")
+        batch.put(b"new_key_1", b"new_value_1")
+        batch.write()
+        savepoint2 = batch.savepoint()
+        batch.put(b"test_key_3", b"edited_value_3")
+        batch.delete(b"new_key_1")
+        assert batch.count() == 6
+
+        # Unwritten operations are dropped
+        batch.rollback_to(savepoint2)
+        assert batch.count() == 4
+        batch.write()
+        assert store.get(b"test_key_3") == test_items[b"test_key_3"]
+        assert store.get(b"new_key_1") == b"new_value_1"
+
+        # Written operations are undone in the store
+        batch.rollback_to(savepoint1)
+        assert batch.count() == 2
+        assert store.get(b"test_key_1") == b"edited_value_1"
+        assert store.get(b"new_key_1", default=b"none") == b"none"
+        assert store.get(b"test_key_2", default=b"none") == b"none"
+        with pytest.raises(KeyValueStoreError):
+            batch.rollback_to(savepoint2)
+
+        batch.put(b"new_key_2", b"new_value_2")
+        batch.write()
+        batch.cancel()
+        assert dict(store.Iterator()) == test_items
+
+        batch.close()
+        store.destroy_store()
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_key_value_store_cancelable_write_batch_originals(self, store_type):
+        store = self._new_store("file://./key_value_store_test_cancelable_originals", store_type=store_type)
+        store.put(b"test_key_1", b"test_value_1")
+        store.put(b"test_key_2", b"test_value_2")
+
+        batch = store.CancelableWriteBatch()
+        batch.put(b"test_key_1", b"edited_value_1")
+        batch.delete(b"test_key_2")
+        # Writes before write() of the batch are restored by cancel(), and those after it are overwritten.
+        store.put(b"test_key_2", b"other_value_2")
+        batch.write()
+        store.put(b"test_key_1", b"other_value_1")
+
+        batch.cancel()
+        assert store.multi_get([b"test_key_1", b"test_key_2"]) == [b"test_value_1", b"other_value_2"]
+
+        batch.close()
+        store.destroy_store()
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_key_value_store_engine_stats(self, store_type):
+        store = self._new_store("file://./key_value_store_test_engine_stats", store_type=store_type)
+        for key, value in self._get_test_items(100).items():
+            store.put(key, value)
+
+        stats = store.engine_stats()
+        assert stats["engine"] == store_type
+        assert stats["estimated_num_keys"] == 100
+        assert stats["data_size"] > 0
+        assert store_type in stats
+
+        store.destroy_store()
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_key_value_store_split_key_range(self, store_type):
+        store = self._new_store("file://./key_value_store_test_split_key_range", store_type=store_type)
+        test_items = self._get_test_items(100)
+        for key, value in test_items.items():
+            store.put(key, value)
+        keys = sorted(test_items)
+
+        assert store.split_key_range(parts=4) == [keys[25], keys[50], keys[75]]
+        assert store.split_key_range(keys[10], keys[19], parts=2) == [keys[15]]
+        assert store.split_key_range(parts=1) == []
+        assert store.split_key_range(keys[10], keys[11], parts=4) == [keys[11]]
+        with pytest.raises(ValueError):
+            store.split_key_range(parts=0)
+
+        store.destroy_store()
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_key_value_store_delete_range(self, store_type):
+        store = self._new_store("file://./key_value_store_test_delete_range", store_type=store_type)
+        test_items = self._get_test_items(100)
+        store.bulk_load(sorted(test_items.items()))
+        keys = sorted(test_items)
+
+        def remaining_keys():
+            with store.Iterator(include_value=False) as it:
+                return list(it)
+
+        assert store.delete_range(keys[10], keys[29], chunk_size=7) == 20
+        assert remaining_keys() == keys[:10] + keys[30:]
+        assert store.delete_range(keys[10], keys[29]) == 0
+        assert store.delete_range(stop_key=keys[4]) == 5
+        assert remaining_keys() == keys[5:10] + keys[30:]
+
+        # Records put before the range in the batch are deleted, and records put after it are kept.
+        with store.WriteBatch() as batch:
+            batch.put(b"test_key_50_before", b"test_value")
+            batch.delete_range(keys[40], keys[59])
+            batch.put(keys[45], b"test_value_after")
+            batch.write()
+        assert store.get(keys[45]) == b"test_value_after"
+        assert store.get(b"test_key_50_before", default=b"") == b""
+        assert remaining_keys() == keys[5:10] + keys[30:40] + [keys[45]] + keys[60:]
+
+        with pytest.raises(ValueError):
+            store.delete_range(keys[0], keys[1], chunk_size=0)
+        with pytest.raises(ValueError):
+            store.delete_range("test_key_1")
+
+        count = len(remaining_keys())
+        assert store.delete_range() == count
+        assert remaining_keys() == []
+
+        store.destroy_store()
+
+    def test_rocksdb_split_by_files(self):
+        from kona.key_value_store_rocksdb import _split_by_files
+
+        files = [
+            {"size": 100, "smallestkey": b"a", "largestkey": b"c"},
+            {"size": 100, "smallestkey": b"d", "largestkey": b"f"},
+            {"size": 100, "smallestkey": b"g", "largestkey": b"i"},
+            {"size": 100, "smallestkey": b"j", "largestkey": b"l"},
+        ]
+        assert _split_by_files(files, None, None, 4) == [b"d", b"g", b"j"]
+        assert _split_by_files(files, b"d", b"i", 2) == [b"g"]
+        assert _split_by_files(files[:1], None, None, 4) is None
+
+    def test_rocksdb_engine_stats(self):
+        store = self._new_store("file://./key_value_store_test_rocksdb_engine_stats", store_type="rocksdb")
+        store.put(b"test_key", b"test_value")
+
+        assert store.get_property("rocksdb.estimate-num-keys") == "1"
+        assert store.get_property(b"rocksdb.unknown-property") is None
+
+        rocksdb_stats = store.engine_stats()["rocksdb"]
+        assert rocksdb_stats["writes"] == 1
+        assert rocksdb_stats["block_cache_capacity"] > 0
+        assert rocksdb_stats["stall_counts"]["memtable_slowdown"] == 0
+        assert "total_count" not in rocksdb_stats["stall_counts"]
+
+        store.destroy_store()
+
+    def test_rocksdb_bloom_filter(self):
+        store = KeyValueStore.new(
+            "file://./key_value_store_test_rocksdb_bloom_filter",
+            store_type="rocksdb",
+            create_if_missing=True,
+            bloom_bits_per_key=10,
+        )
+        namespace = store.namespace("test_namespace")
+        for i in range(100):
+            store.put(f"test_key_{i}".encode(), b"test_value")
+            namespace.put(f"test_key_{i}".encode(), b"test_value")
+        # Flush the records to SST files which have the filters
+        store._db.compact_range()
+        store._db.compact_range(column_family=namespace._cf)
+
+        assert store.key_may_exist(b"test_key_1")[0]
+        assert namespace.key_may_exist(b"test_key_1")[0]
+        misses = sum(1 for i in range(100) if store.key_may_exist(f"unknown_key_{i}".encode())[0])
+        assert misses < 10
+
+        store.destroy_store()
+
+    def test_dict_key_may_exist(self):
+        store = self._new_store("", store_type="dict")
+        store.put(b"test_key", b"test_value")
+        assert store.key_may_exist(b"test_key") == (True, b"test_value")
+        assert store.key_may_exist(b"unknown_key") == (False, None)
+        store.destroy_store()
+
+    def test_lmdb_engine_stats(self):
+        store = self._new_store("file://./key_value_store_test_lmdb_engine_stats", store_type="lmdb")
+        store.put(b"test_key", b"test_value")
+
+        with store.Iterator() as it:
+            it.next_n(1)
+            lmdb_stats = store.engine_stats()["lmdb"]
+        assert lmdb_stats["stat"]["entries"] == 1
+        assert lmdb_stats["info"]["max_readers"] > 0
+        assert len(lmdb_stats["readers"]) >= 1
+        assert 0 < lmdb_stats["map_usage"] <= 1
+
+        store.destroy_store()
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_key_value_store_namespace(self, store_type):
+        options = {"lmdb": {"max_dbs": 4}, "rocksdb": {"create_if_missing": True}}.get(store_type, {})
+        uri = "file://./key_value_store_test_namespace"
+        store = KeyValueStore.new(uri, store_type=store_type, **options)
+        store.put(b"test_key", b"default_value")
+
+        blocks = store.namespace("blocks")
+        assert store.namespace("blocks") is blocks
+        assert blocks.namespace(KeyValueStore.DEFAULT_NAMESPACE) is store
+        with pytest.raises(KeyError):
+            blocks.get(b"test_key")
+
+        batch = store.WriteBatch()
+        batch.put(b"test_key_1", b"default_value_1")
+        blocks_batch = batch.namespace("blocks")
+        blocks_batch.put(b"test_key_1", b"block_value_1")
+        blocks_batch.namespace("receipts").put(b"test_key_1", b"receipt_value_1")
+        assert batch.count() == blocks_batch.count() == 3
+        with pytest.raises(KeyError):
+            blocks.get(b"test_key_1")
+        blocks_batch.write()
+
+        assert list(store.Iterator()) == [(b"test_key", b"default_value"), (b"test_key_1", b"default_value_1")]
+        assert list(blocks.Iterator(include_value=False)) == [b"test_key_1"]
+        assert blocks.multi_get([b"test_key", b"test_key_1"]) == [None, b"block_value_1"]
+        assert store.namespace("receipts").get(b"test_key_1") == b"receipt_value_1"
+
+        blocks.delete(b"test_key_1")
+        assert store.get(b"test_key_1") == b"default_value_1"
+
+        if store_type != "dict":
+            store.close()
+            store = KeyValueStore.new(uri, store_type=store_type, **options)
+            assert store.namespace("receipts").get(b"test_key_1") == b"receipt_value_1"
+
+        store.namespace("receipts").destroy_store()
+        assert list(store.namespace("receipts").Iterator()) == []
+
+        store.destroy_store()
@@ -0,0 +1,158 @@
+"""Test AsyncKeyValueStore"""
+import pytest
+
+from kona.key_value_store import KeyValueStore, KeyValueStoreError
+from kona.key_value_store_async import AsyncKeyValueStore
+
+
+@pytest.fixture(params=["asyncio", "trio"])
+def anyio_backend(request):
+    return request.param
+
+
+@pytest.mark.anyio
+class TestAsyncKeyValueStore:
+    store_types = ["dict", "rocksdb", "lmdb"]
+
+    def _get_test_items(self, count: int = 5):
+        test_items = dict()
+        for i in range(1, count + 1):
+            key = bytes(f"test_key_{i}", encoding="utf-8")
+            value = bytes(f"test_value_{i}", encoding="utf-8")
+            test_items[key] = value
+        return test_items
+
+    async def _new_store(self, uri, store_type):
+        if store_type == KeyValueStore.STORE_TYPE_DICT:
+            from kona.key_value_store_dict import KeyValueStoreDict
+
+            return AsyncKeyValueStore(KeyValueStoreDict())
+
+        return await AsyncKeyValueStore.new(uri, store_type=store_type, max_workers=2, create_if_missing=True)
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    async def test_async_key_value_store_basic(self, store_type):
+        test_items = self._get_test_items(5)
+
+        store = await self._new_store("file://./key_value_store_test_async_basic", store_type)
+
+        for key, value in test_items.items():
+            await store.put(key, value)
+            assert await store.get(key) == value
+
+        with pytest.raises(KeyError):
+            await store.get(b"unknown_key")
+        assert await store.get(b"unknown_key", default=b"test_default_value") == b"test_default_value"
+        assert await store.multi_get([b"test_key_1", b"unknown_key"]) == [b"test_value_1", None]
+
+        await store.delete(b"test_key_2")
+        del test_items[b"test_key_2"]
+        with pytest.raises(KeyError):
+            await store.get(b"test_key_2")
+
+        items = {}
+        async for key, value in store.Iterator(chunk_size=2):
+            items[bytes(key)] = value
+        assert items == test_items
+
+        await store.destroy_store()
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    async def test_async_key_value_store_write_batch(self, store_type):
+        store = await self._new_store("file://./key_value_store_test_async_write_batch", store_type)
+
+        batch = store.WriteBatch()
+        batch.put(b"test_key_1", b"test_value_1")
+        batch.put(b"test_key_2", b"test_value_2")
+        batch.delete(b"test_key_2")
+
+        with pytest.raises(KeyError):
+            await store.get(b"test_key_1")
+
+        await batch.write()
+        assert await store.get(b"test_key_1") == b"test_value_1"
+        with pytest.raises(KeyError):
+            await store.get(b"test_key_2")
+
+        await store.destroy_store()
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    async def test_async_key_value_store_cancelable_write_batch(self, store_type):
+        test_items = self._get_test_items(3)
+
+        store = await self._new_store("file://./key_value_store_test_async_cancelable_write_batch", store_type)
+        for key, value in test_items.items():
+            await store.put(key, value)
+
+        cancelable_batch = store.CancelableWriteBatch()
+        cancelable_batch.put(b"cancelable_key_1", b"cancelable_value_1")
+        cancelable_batch.put(b"test_key_2", b"edited_test_value_2")
+        await cancelable_batch.write()
+        assert await store.get(b"test_key_2") == b"edited_test_value_2"
+
+        await cancelable_batch.cancel()
+        assert await store.get(b"test_key_2") == b"test_value_2"
+        with pytest.raises(KeyError):
+            await store.get(b"cancelable_key_1")
+        await cancelable_batch.close()
+
+        await store.destroy_store()
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    async def test_async_key_value_store_cancelable_write_batch_savepoint(self, store_type):
+        store = await self._new_store("file://./key_value_store_test_async_cancelable_savepoint", store_type)
+        await store.put(b"test_key_1", b"test_value_1")
+
+        batch = store.CancelableWriteBatch()
+        batch.put(b"test_key_1", b"first_value_1")
+        await batch.write()
+        # The second write() writes only its own operations
+        await store.put(b"test_key_1", b"other_value_1")
+        batch.put(b"test_key_2", b"second_value_2")
+        await batch.write()
+        assert await store.multi_get([b"test_key_1", b"test_key_2"]) == [b"other_value_1", b"second_value_2"]
+        assert batch.savepoint() == 2
+
+        savepoint = batch.savepoint()
+        batch.put(b"test_key_3", b"third_value_3")
+        inner = batch.savepoint()
+        batch.delete(b"test_key_2")
+        await batch.rollback_to(inner)
+        await batch.write()
+        assert await store.multi_get([b"test_key_2", b"test_key_3"]) == [b"second_value_2", b"third_value_3"]
+
+        batch.put(b"test_key_4", b"fourth_value_4")
+        await batch.rollback_to(savepoint)
+        await batch.write()
+        assert await store.multi_get([b"test_key_3", b"test_key_4"]) == [None, None]
+        with pytest.raises(KeyValueStoreError):
+            await batch.rollback_to(inner)
+
+        await batch.cancel()
+        assert await store.multi_get([b"test_key_1", b"test_key_2"]) == [b"test_value_1", None]
+        await batch.close()
+
+        await store.destroy_store()
+
+    @pytest.mark.parametrize("store_type", ["rocksdb", "lmdb"])
+    async def test_async_key_value_store_iterator_range(self, store_type):
+        test_items = self._get_test_items(9)
+
+        store = await self._new_store("file://./key_value_store_test_async_iterator", store_type)
+        batch = store.WriteBatch()
+        for key, value in test_items.items():
+            batch.put(key, value)
+        await batch.write()
+
+        keys = []
+        async for key, value in store.Iterator(start_key=b"test_key_2", stop_key=b"test_key_6", chunk_size=3):
+            keys.append(bytes(key))
+        assert keys == [b"test_key_2", b"test_key_3", b"test_key_4", b"test_key_5", b"test_key_6"]
+
+        iterator = store.Iterator(chunk_size=4)
+        assert (await iterator.__anext__())[0] == b"test_key_1"
+        await iterator.aclose()
+        with pytest.raises(StopAsyncIteration):
+            await iterator.__anext__()
+
+        await store.destroy_store()
@@ -0,0 +1,180 @@
+"""Test KeyValueStoreCache"""
+import threading
+
+import pytest
+
+from kona.key_value_store import KeyValueStore
+from kona.key_value_store_cache import KeyValueStoreCache
+
+
+class TestKeyValueStoreCache:
+    store_types = ["dict", "rocksdb", "lmdb"]
+
+    def _new_store(self, uri, store_type, cache_size=1024 * 1024):
+        if store_type == KeyValueStore.STORE_TYPE_DICT:
+            from kona.key_value_store_dict import KeyValueStoreDict
+
+            return KeyValueStoreCache(KeyValueStoreDict(), cache_size)
+
+        return KeyValueStore.new(uri, store_type=store_type, cache_size=cache_size, create_if_missing=True)
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_cache_hit_and_miss(self, store_type):
+        store = self._new_store("file://./key_value_store_test_cache", store_type)
+        cache = store if store_type == KeyValueStore.STORE_TYPE_DICT else store.store
+        assert isinstance(cache, KeyValueStoreCache)
+
+        cache.store.put(b"test_key_1", b"test_value_1")
+
+        assert store.get(b"test_key_1") == b"test_value_1"
+        assert store.get(b"test_key_1") == b"test_value_1"
+        with pytest.raises(KeyError):
+            store.get(b"unknown_key")
+        assert store.get(b"unknown_key", default=b"test_default_value") == b"test_default_value"
+        assert store.key_may_exist(b"unknown_key") == (False, None)
+
+        cache_info = store.cache_info()
+        assert cache_info["hits"] == 3
+        assert cache_info["misses"] == 2
+        assert cache_info["entries"] == 2
+
+        assert store.multi_get([b"test_key_1", b"test_key_2", b"unknown_key"]) == [b"test_value_1", None, None]
+        cache_info = store.cache_info()
+        assert cache_info["hits"] == 5
+        assert cache_info["misses"] == 3
+
+        store.destroy_store()
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_cache_coherence(self, store_type):
+        store = self._new_store("file://./key_value_store_test_cache_coherence", store_type)
+        cache = store if store_type == KeyValueStore.STORE_TYPE_DICT else store.store
+
+        for key in (b"test_key_1", b"test_key_2", b"test_key_3"):
+            with pytest.raises(KeyError):
+                store.get(key)
+
+        store.put(b"test_key_1", b"test_value_1")
+        assert store.get(b"test_key_1") == b"test_value_1"
+        store.delete(b"test_key_1")
+        with pytest.raises(KeyError):
+            store.get(b"test_key_1")
+
+        batch = store.WriteBatch()
+        batch.put(b"test_key_2", b"test_value_2")
+        batch.put(b"test_key_3", b"test_value_3")
+        with pytest.raises(KeyError):
+            store.get(b"test_key_2")
+        batch.write()
+        assert store.get(b"test_key_2") == b"test_value_2"
+        assert store.get(b"test_key_3") == b"test_value_3"
+
+        cancelable_batch = store.CancelableWriteBatch()
+        cancelable_batch.put(b"test_key_1", b"cancelable_value_1")
+        cancelable_batch.put(b"test_key_2", b"edited_test_value_2")
+        cancelable_batch.delete(b"test_key_3")
+        cancelable_batch.write()
+        assert store.get(b"test_key_1") == b"cancelable_value_1"
+        assert store.get(b"test_key_2") == b"edited_test_value_2"
+        with pytest.raises(KeyError):
+            store.get(b"test_key_3")
+
+        cancelable_batch.cancel()
+        with pytest.raises(KeyError):
+            store.get(b"test_key_1")
+        assert store.get(b"test_key_2") == b"test_value_2"
+        assert store.get(b"test_key_3") == b"test_value_3"
+
+        assert cache.store.multi_get([b"test_key_1", b"test_key_2", b"test_key_3"]) == [
+            None,
+            b"test_value_2",
+            b"test_value_3",
+        ]
+
+        assert store.delete_range(b"test_key_2", b"test_key_2") == 1
+        with pytest.raises(KeyError):
+            store.get(b"test_key_2")
+        batch = store.WriteBatch()
+        batch.put(b"test_key_4", b"test_value_4")
+        batch.delete_range(b"test_key_3", b"test_key_4")
+        batch.write()
+        assert store.multi_get([b"test_key_3", b"test_key_4"]) == [None, None]
+
+        store.destroy_store()
+
+    def test_cache_size_bound(self):
+        from kona.key_value_store_dict import KeyValueStoreDict
+
+        store = KeyValueStoreCache(KeyValueStoreDict(), cache_size=4096)
+
+        for i in range(100):
+            store.put(f"test_key_{i}".encode(), b"v" * 100)
+            store.get(f"test_key_{i}".encode())
+
+        cache_info = store.cache_info()
+        assert cache_info["size"] <= 4096
+        assert cache_info["evictions"] > 0
+        assert cache_info["entries"] < 100
+
+        # The least recently used keys are evicted first
+        assert store.multi_get([b"test_key_99"]) == [b"v" * 100]
+        assert store.cache_info()["hits"] == 1
+        assert store.multi_get([b"test_key_0"]) == [b"v" * 100]
+        assert store.cache_info()["misses"] == 101
+
+    def test_concurrent_writes_of_a_key(self):
+        from kona.key_value_store_dict import KeyValueStoreDict
+
+        first_written, second_done = threading.Event(), threading.Event()
+
+        class _SlowStore(KeyValueStoreDict):
+            def put(self, key: bytes, value: bytes, **kwargs):
+                super().put(key, value, **kwargs)
+                if value == b"first_value":
+                    # The second writer writes the store and the cache before the first one returns.
+                    first_written.set()
+                    second_done.wait(10)
+
+        store = KeyValueStoreCache(_SlowStore(), cache_size=4096)
+        first = threading.Thread(target=store.put, args=(b"test_key", b"first_value"))
+        first.start()
+        first_written.wait(10)
+        store.put(b"test_key", b"second_value")
+        assert store.get(b"test_key") == b"second_value"
+        second_done.set()
+        first.join()
+
+        assert store.store.get(b"test_key") == b"second_value"
+        assert store.get(b"test_key") == b"second_value"
+
+    @pytest.mark.parametrize("store_type", ["dict", "rocksdb"], ids=["dict", "rocksdb"])
+    def test_cache_namespace(self, store_type):
+        store = self._new_store("file://./key_value_store_test_cache_namespace", store_type)
+        store.put(b"test_key", b"default_value")
+
+        blocks = store.namespace("blocks")
+        blocks_cache = blocks if store_type == KeyValueStore.STORE_TYPE_DICT else blocks.store
+        assert isinstance(blocks_cache, KeyValueStoreCache)
+        assert store.namespace("blocks") is blocks
+        assert blocks.namespace(KeyValueStore.DEFAULT_NAMESPACE) is store
+        assert blocks.get(b"test_key", default=b"") == b""
+        assert blocks.cache_info()["misses"] == 1
+
+        blocks.put(b"test_key", b"block_value")
+        assert blocks.get(b"test_key") == b"block_value"
+        assert blocks.get(b"test_key") == b"block_value"
+        assert store.get(b"test_key") == b"default_value"
+        assert blocks.cache_info()["hits"] == 1
+
+        batch = store.WriteBatch()
+        batch.put(b"test_key", b"default_value_1")
+        blocks_batch = batch.namespace("blocks")
+        blocks_batch.delete(b"test_key")
+        blocks_batch.namespace("receipts").put(b"test_key", b"receipt_value")
+        blocks_batch.write()
+        assert store.get(b"test_key") == b"default_value_1"
+        assert blocks.get(b"test_key", default=b"") == b""
+        assert store.namespace("receipts").get(b"test_key") == b"receipt_value"
+        assert blocks_cache.store.get(b"test_key", default=b"") == b""
+
+        store.destroy_store()
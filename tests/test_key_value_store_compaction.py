@@ -0,0 +1,150 @@
+"""Test compact_range() and KeyValueStoreCompaction"""
+import time
+
+import pytest
+
+from kona.key_value_store import KeyValueStore, KeyValueStoreError
+from kona.key_value_store_compaction import KeyValueStoreCompaction
+from kona.key_value_store_dict import KeyValueStoreDict
+
+
+def _wait_for(condition, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("The condition has not been met")
+        time.sleep(0.01)
+
+
+class TestKeyValueStoreCompaction:
+    store_types = ["rocksdb", "lmdb"]
+
+    def _new_store(self, uri, store_type, **kwargs):
+        if store_type == KeyValueStore.STORE_TYPE_LMDB:
+            kwargs.update(compactable=True, max_dbs=2)
+        return KeyValueStore.new(uri, store_type=store_type, create_if_missing=True, **kwargs)
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_compact_range(self, store_type):
+        store = self._new_store("file://./key_value_store_test_compact_range", store_type)
+        namespace = store.namespace("test_namespace")
+        namespace.put(b"test_key", b"test_value")
+        store.bulk_load((f"test_key_{i:06}".encode(), b"v" * 200) for i in range(20000))
+        assert store.delete_range(stop_key=b"test_key_014999") == 15000
+
+        progress = []
+        stats = store.compact_range(progress=progress.append)
+        assert stats["compacted_slices"] == stats["slices"] == len(progress) > 0
+        assert stats["data_size_after"] < stats["data_size_before"]
+
+        assert namespace.get(b"test_key") == b"test_value"
+        with store.Iterator(include_value=False) as it:
+            assert list(it) == [f"test_key_{i:06}".encode() for i in range(15000, 20000)]
+        store.put(b"test_key_after_compaction", b"test_value")
+        assert store.get(b"test_key_after_compaction") == b"test_value"
+
+        store.destroy_store()
+
+    def test_compact_range_needs_compactable_lmdb(self):
+        store = KeyValueStore.new("file://./key_value_store_test_compact_range_lmdb", store_type="lmdb")
+        with pytest.raises(KeyValueStoreError):
+            store.compact_range()
+        store.destroy_store()
+
+    def test_compact_range_dict(self):
+        stats = KeyValueStoreDict().compact_range()
+        assert stats["slices"] == 0
+        assert stats["data_size_after"] is None
+
+    def test_compaction_after_deletes(self):
+        store = KeyValueStore.new(
+            "file://./key_value_store_test_compaction_scheduler",
+            store_type="rocksdb",
+            create_if_missing=True,
+            compaction_threshold=100,
+        )
+        assert isinstance(store.store, KeyValueStoreCompaction)
+
+        for i in range(150):
+            store.put(f"test_key_{i:03}".encode(), b"test_value")
+        batch = store.WriteBatch()
+        for i in range(50):
+            batch.delete(f"test_key_{i:03}".encode())
+        batch.write()
+        assert store.compaction_info()["pending_deletes"] == 50
+        assert store.compaction_info()["compactions"] == 0
+
+        assert store.delete_range(b"test_key_050", b"test_key_099") == 50
+        _wait_for(lambda: store.compaction_info()["compactions"] == 1)
+        compaction_info = store.compaction_info()
+        assert compaction_info["last"]["reason"] == "deletes"
+        assert compaction_info["last"]["error"] is None
+        assert compaction_info["pending_deletes"] == 0
+        assert store.engine_stats()["compaction"]["compactions"] == 1
+
+        stats = store.compact_range()
+        assert store.compaction_info()["last"]["reason"] == "manual"
+        assert store.compaction_info()["last"]["slices"] == stats["slices"]
+
+        store.destroy_store()
+
+    def test_compaction_in_idle_window(self):
+        store = KeyValueStoreCompaction(KeyValueStoreDict(), idle_seconds=0.05, check_interval=0.01)
+        store.put(b"test_key", b"test_value")
+        assert store.compaction_info()["compactions"] == 0
+
+        store.delete(b"test_key")
+        _wait_for(lambda: store.compaction_info()["compactions"] == 1)
+        assert store.compaction_info()["last"]["reason"] == "idle"
+
+        with pytest.raises(ValueError):
+            KeyValueStoreCompaction(KeyValueStoreDict(), delete_threshold=0)
+
+        store.close()
+
+    def test_compaction_of_namespaces(self, monkeypatch):
+        compacted = []
+        compact_range = KeyValueStoreDict.compact_range
+
+        def _compact_range(self, *args, **kwargs):
+            compacted.append(self)
+            return compact_range(self, *args, **kwargs)
+
+        monkeypatch.setattr(KeyValueStoreDict, "compact_range", _compact_range)
+        store = KeyValueStoreCompaction(KeyValueStoreDict(), delete_threshold=10, check_interval=0.01)
+        blocks = store.namespace("blocks")
+        assert isinstance(blocks, KeyValueStoreCompaction)
+        assert store.namespace(KeyValueStore.DEFAULT_NAMESPACE) is store
+        assert blocks.namespace(KeyValueStore.DEFAULT_NAMESPACE) is store
+
+        for i in range(10):
+            blocks.put(f"test_key_{i}".encode(), b"test_value")
+        batch = store.WriteBatch()
+        batch.delete(b"test_key_0")
+        blocks_batch = batch.namespace("blocks")
+        for i in range(4):
+            blocks_batch.delete(f"test_key_{i}".encode())
+        batch.write()
+        assert blocks.compaction_info()["pending_deletes"] == 5
+
+        # A manual compaction keeps the deletes of what it has not compacted
+        blocks.compact_range(b"test_key_0", b"test_key_1")
+        store.namespace("receipts").compact_range()
+        assert compacted == [blocks.store, store.store.namespace("receipts")]
+        assert store.compaction_info()["pending_deletes"] == 5
+
+        blocks.delete_range(b"test_key_5", b"test_key_9")
+        _wait_for(lambda: store.compaction_info()["compactions"] == 3)
+        assert compacted[2:] == [store.store, blocks.store]
+        assert store.compaction_info()["pending_deletes"] == 0
+        assert store.compaction_info()["last"]["reason"] == "deletes"
+
+        blocks.delete(b"test_key_4")
+        store.delete(b"test_key_1")
+        blocks.compact_range()
+        assert compacted[-1] is blocks.store
+        assert blocks.compaction_info()["last"]["reason"] == "manual"
+        assert store.compaction_info()["pending_deletes"] == 1
+        assert list(blocks.Iterator()) == []
+
+        store.close()
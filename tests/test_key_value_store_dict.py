@@ -0,0 +1,87 @@
+"""Test KeyValueStoreDict"""
+import pytest
+
+from kona.key_value_store import KeyValueStore
+from kona.key_value_store_dict import KeyValueStoreDict
+
+
+class TestKeyValueStoreDict:
+    def _put_test_items(self, store, count: int):
+        for i in range(count):
+            store.put(f"test_key_{i:04}".encode(), f"test_value_{i:04}".encode())
+
+    def test_new_dict_store(self):
+        store = KeyValueStore.new("file://./key_value_store_test_dict", store_type="dict", create_if_missing=True)
+        assert isinstance(store, KeyValueStoreDict)
+
+        self._put_test_items(store, 300)
+        assert [key for key in store.Iterator(start_key=b"test_key_0297", include_value=False)] == [
+            b"test_key_0297",
+            b"test_key_0298",
+            b"test_key_0299",
+        ]
+        assert len(list(store.Iterator(reverse=True))) == 300
+
+        store.destroy_store()
+        assert store.memory_info()["records"] == 0
+
+    def test_snapshot(self):
+        store = KeyValueStoreDict()
+        self._put_test_items(store, 3)
+
+        with store.snapshot() as snapshot:
+            store.put(b"test_key_0000", b"edited_test_value_0000")
+            store.delete(b"test_key_0001")
+            store.put(b"test_key_0003", b"test_value_0003")
+
+            assert snapshot.get(b"test_key_0000") == b"test_value_0000"
+            assert snapshot.multi_get([b"test_key_0001", b"test_key_0003"]) == [b"test_value_0001", None]
+            assert list(snapshot.Iterator()) == [
+                (b"test_key_0000", b"test_value_0000"),
+                (b"test_key_0001", b"test_value_0001"),
+                (b"test_key_0002", b"test_value_0002"),
+            ]
+
+        assert list(store.Iterator()) == [
+            (b"test_key_0000", b"edited_test_value_0000"),
+            (b"test_key_0002", b"test_value_0002"),
+            (b"test_key_0003", b"test_value_0003"),
+        ]
+
+    def test_iterator_isolation(self):
+        store = KeyValueStoreDict()
+        self._put_test_items(store, 500)
+
+        iterator = store.Iterator(include_value=False)
+        assert iterator.next_n(200)[-1] == b"test_key_0199"
+        for i in range(500):
+            store.delete(f"test_key_{i:04}".encode())
+        store.put(b"test_key_0250a", b"test_value_0250a")
+        assert len(iterator.next_n(1000)) == 300
+
+        assert list(store.Iterator()) == [(b"test_key_0250a", b"test_value_0250a")]
+
+    def test_memory_accounting_and_spill(self):
+        store = KeyValueStoreDict("file://./key_value_store_test_dict_spill", memory_limit=16 * 1024)
+
+        value = b"v" * 1024
+        for i in range(64):
+            store.put(f"test_key_{i:04}".encode(), value)
+
+        memory_info = store.memory_info()
+        assert memory_info["records"] == 64
+        # Keys are always kept in memory, values beyond the limit are spilled.
+        assert memory_info["memory_size"] < 32 * 1024
+        assert memory_info["spilled_size"] >= 48 * 1024
+
+        assert store.get(b"test_key_0063") == value
+        assert all(row_value == value for _, row_value in store.Iterator())
+
+        store.delete(b"test_key_0063")
+        assert store.memory_info()["records"] == 63
+
+        store.destroy_store()
+
+    def test_spill_needs_file_uri(self):
+        with pytest.raises(ValueError):
+            KeyValueStoreDict(memory_limit=1024)
@@ -0,0 +1,94 @@
+"""Test KeyValueStoreGroupCommit"""
+import threading
+
+import pytest
+
+from kona.key_value_store import KeyValueStore, KeyValueStoreError
+from kona.key_value_store_dict import KeyValueStoreDict
+from kona.key_value_store_group_commit import KeyValueStoreGroupCommit
+
+
+class TestKeyValueStoreGroupCommit:
+    def test_new_with_group_commit_window(self):
+        store = KeyValueStore.new(
+            "file://./key_value_store_test_group_commit", store_type="lmdb", group_commit_window=0.001
+        )
+        assert isinstance(store.store, KeyValueStoreGroupCommit)
+
+        store.put(b"test_key_0", b"test_value_0", sync=True)
+        assert store.get(b"test_key_0") == b"test_value_0"
+        store.delete(b"test_key_0")
+        with pytest.raises(KeyError):
+            store.get(b"test_key_0")
+
+        store.destroy_store()
+
+    def test_concurrent_writes_are_grouped(self):
+        store = KeyValueStoreGroupCommit(KeyValueStoreDict(), window=0.05)
+
+        def _put(i: int):
+            store.put(f"test_key_{i:02}".encode(), f"test_value_{i:02}".encode(), sync=(i == 0))
+
+        threads = [threading.Thread(target=_put, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(list(store.Iterator())) == 20
+        stats = store.group_commit_stats()
+        assert stats["operations"] == 20
+        assert stats["groups"] < 20
+        assert stats["sync_groups"] >= 1
+        assert stats["max_group_size"] > 1
+
+        store.close()
+
+    def test_max_group_size(self):
+        store = KeyValueStoreGroupCommit(KeyValueStoreDict(), window=10.0, max_group_size=1)
+        store.put(b"test_key", b"test_value")
+        assert store.group_commit_stats()["max_latency"] < 10.0
+        store.close()
+
+    def test_error_is_raised_to_callers(self):
+        class _FailingWriteBatchStore(KeyValueStoreDict):
+            def WriteBatch(self, sync=False):
+                raise KeyValueStoreError("failed to write")
+
+        store = KeyValueStoreGroupCommit(_FailingWriteBatchStore(), window=0)
+        with pytest.raises(KeyValueStoreError):
+            store.put(b"test_key", b"test_value")
+
+        store.close()
+        with pytest.raises(KeyValueStoreError):
+            store.put(b"test_key", b"test_value")
+
+    def test_namespace(self):
+        store = KeyValueStoreGroupCommit(KeyValueStoreDict(), window=0.05)
+        blocks = store.namespace("blocks")
+        assert isinstance(blocks, KeyValueStoreGroupCommit)
+        assert store.namespace(KeyValueStore.DEFAULT_NAMESPACE) is store
+        assert blocks.namespace(KeyValueStore.DEFAULT_NAMESPACE) is store
+
+        def _put(i: int):
+            target = blocks if i % 2 else store
+            target.put(f"test_key_{i:02}".encode(), f"test_value_{i:02}".encode())
+
+        threads = [threading.Thread(target=_put, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(list(store.Iterator())) == 10
+        assert len(list(blocks.Iterator())) == 10
+        assert blocks.get(b"test_key_01") == b"test_value_01"
+        assert blocks.get(b"test_key_00", default=b"") == b""
+        blocks.delete(b"test_key_01")
+        assert blocks.get(b"test_key_01", default=b"") == b""
+
+        stats = store.group_commit_stats()
+        assert stats["operations"] == 21
+        assert blocks.group_commit_stats() == stats
+
+        store.close()
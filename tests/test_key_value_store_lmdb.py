@@ -1,5 +1,11 @@
 """Test KeyValueStoreLMDB"""
-from kona.key_value_store import KeyValueStore
+import io
+import shutil
+import threading
+
+import pytest
+
+from kona.key_value_store import KeyValueStore, KeyValueStoreError
 
 
 class TestKeyValueStoreLMDB:
@@ -16,3 +22,195 @@ class TestKeyValueStoreLMDB:
         assert 999 == lmdb_store._db.info()["max_readers"]
 
         lmdb_store.destroy_store()
+
+    def test_lmdb_map_size_auto_grow(self):
+        lmdb_store = KeyValueStore.new(
+            "file://./key_value_store_test_lmdb_auto_grow",
+            store_type="lmdb",
+            map_size=64 * 1024,
+            max_map_size=64 * 1024 * 1024,
+        )
+
+        value = b"v" * 1024
+        for i in range(100):
+            lmdb_store.put(f"test_put_key_{i}".encode(), value)
+
+        batch = lmdb_store.WriteBatch()
+        for i in range(1000):
+            batch.put(f"test_batch_key_{i}".encode(), value)
+        batch.write()
+
+        lmdb_store.bulk_load((f"test_bulk_key_{i:04}".encode(), value) for i in range(2000))
+
+        map_size_info = lmdb_store.map_size_info()
+        assert map_size_info["resize_count"] > 0
+        assert map_size_info["map_size"] > 64 * 1024
+        assert map_size_info["last_resize"]["new_map_size"] == map_size_info["map_size"]
+
+        assert lmdb_store.get(b"test_put_key_99") == value
+        assert lmdb_store.get(b"test_batch_key_999") == value
+        assert lmdb_store.get(b"test_bulk_key_1999") == value
+
+        lmdb_store.destroy_store()
+
+    def test_lmdb_map_size_ceiling(self):
+        lmdb_store = KeyValueStore.new(
+            "file://./key_value_store_test_lmdb_ceiling",
+            store_type="lmdb",
+            map_size=64 * 1024,
+            max_map_size=256 * 1024,
+        )
+
+        with pytest.raises(KeyValueStoreError):
+            for i in range(1000):
+                lmdb_store.put(f"test_key_{i}".encode(), b"v" * 1024)
+        assert lmdb_store.map_size_info()["map_size"] == 256 * 1024
+
+        lmdb_store.destroy_store()
+
+    def test_lmdb_map_grows_during_checkpoint(self):
+        lmdb_store = KeyValueStore.new(
+            "file://./key_value_store_test_lmdb_checkpoint_grow",
+            store_type="lmdb",
+            map_size=1024 * 1024,
+            max_map_size=256 * 1024 * 1024,
+            map_resize_timeout=0.1,
+            shared=False,
+        )
+        copy_path = "./key_value_store_test_lmdb_checkpoint_grow_copy"
+        shutil.rmtree(copy_path, ignore_errors=True)
+        value = b"v" * 1024
+        lmdb_store.bulk_load((f"test_key_{i:05}".encode(), value) for i in range(500))
+        resize_count = lmdb_store.map_size_info()["resize_count"]
+
+        errors = []
+        checkpoint = threading.Thread(target=lambda: errors.append(lmdb_store.checkpoint(copy_path)))
+        checkpoint.start()
+        i = 0
+        while checkpoint.is_alive() or i < 2000:
+            # The map grows while the copy is made. A resize never waits for the copy.
+            lmdb_store.put(f"writing_key_{i:05}".encode(), value)
+            i += 1
+        checkpoint.join()
+        assert errors == [None]
+        assert lmdb_store.map_size_info()["resize_count"] > resize_count
+
+        copy = KeyValueStore.new(f"file://{copy_path}", store_type="lmdb", shared=False)
+        assert copy.get(b"test_key_00499") == value
+        copy.destroy_store()
+
+        # An export blocked by a slow reader doesn't block the map growth either
+        export_started, resized = threading.Event(), threading.Event()
+
+        class _SlowFile(io.BytesIO):
+            def write(self, data):
+                export_started.set()
+                resized.wait(10)
+                return super().write(data)
+
+        stream = _SlowFile()
+        exporter = threading.Thread(target=lambda: errors.append(lmdb_store.export(stream, stop_key=b"test_key_99999")))
+        exporter.start()
+        assert export_started.wait(30)
+        map_size = lmdb_store.map_size_info()["map_size"]
+        while lmdb_store.map_size_info()["map_size"] == map_size:
+            lmdb_store.put(f"writing_key_{i:05}".encode(), value)
+            i += 1
+        resized.set()
+        exporter.join()
+        assert errors[-1]["count"] == 500
+
+        lmdb_store.destroy_store()
+
+    def test_lmdb_write_batch_is_lazy(self):
+        lmdb_store = KeyValueStore.new("file://./key_value_store_test_lmdb_lazy_batch", store_type="lmdb")
+
+        batch = lmdb_store.WriteBatch()
+        batch.put(b"test_key_1", b"test_value_1")
+        batch.put(b"test_key_2", b"test_value_2")
+        batch.delete(b"test_key_3")
+
+        # The writer lock is not held until write(), so other writes are not blocked.
+        lmdb_store.put(b"test_key_3", b"test_value_3")
+        other_batch = lmdb_store.WriteBatch()
+        other_batch.put(b"test_key_4", b"test_value_4")
+        other_batch.write()
+
+        batch.write()
+        assert lmdb_store.multi_get([b"test_key_1", b"test_key_2", b"test_key_3", b"test_key_4"]) == [
+            b"test_value_1",
+            b"test_value_2",
+            None,
+            b"test_value_4",
+        ]
+
+        lmdb_store.destroy_store()
+
+    def test_lmdb_delete_range_keeps_namespaces(self):
+        lmdb_store = KeyValueStore.new("file://./key_value_store_test_lmdb_delete_range", store_type="lmdb", max_dbs=2)
+        namespace = lmdb_store.namespace("test_namespace")
+        namespace.put(b"test_key_1", b"test_value_1")
+        lmdb_store.put(b"test_key_1", b"test_value_1")
+
+        # The name of a namespace is a key of the main database.
+        assert lmdb_store.delete_range() == 1
+        with lmdb_store.WriteBatch() as batch:
+            batch.delete_range()
+            batch.write()
+        assert namespace.get(b"test_key_1") == b"test_value_1"
+        assert namespace.delete_range() == 1
+        assert namespace.get(b"test_key_1", default=b"") == b""
+
+        lmdb_store.destroy_store()
+
+    def test_lmdb_bloom_filter(self):
+        uri = "file://./key_value_store_test_lmdb_bloom_filter"
+        lmdb_store = KeyValueStore.new(uri, store_type="lmdb")
+        lmdb_store.put(b"test_key_0", b"test_value_0")
+        assert lmdb_store.key_may_exist(b"test_key_0") is NotImplemented
+        lmdb_store.close()
+
+        # The filter is built from a scan of the store
+        lmdb_store = KeyValueStore.new(uri, store_type="lmdb", bloom_bits_per_key=10)
+        assert lmdb_store.key_may_exist(b"test_key_0") == (True, None)
+        assert lmdb_store.bloom_filter_info()["capacity"] == 1024
+
+        lmdb_store.bulk_load((f"test_key_{i}".encode(), f"test_value_{i}".encode()) for i in range(1, 1500))
+        batch = lmdb_store.WriteBatch()
+        batch.put(b"batch_key", b"batch_value")
+        batch.write()
+        # The filter has been rebuilt with a larger capacity when it was full.
+        assert lmdb_store.bloom_filter_info()["capacity"] >= 2048
+        assert all(lmdb_store.key_may_exist(f"test_key_{i}".encode())[0] for i in range(1500))
+        assert lmdb_store.get(b"batch_key") == b"batch_value"
+
+        misses = sum(1 for i in range(1000) if lmdb_store.key_may_exist(f"unknown_key_{i}".encode())[0])
+        assert misses < 50
+        assert lmdb_store.get(b"unknown_key", default=b"none") == b"none"
+        assert lmdb_store.multi_get([b"unknown_key", b"test_key_1"]) == [None, b"test_value_1"]
+        with pytest.raises(KeyError):
+            lmdb_store.get(b"unknown_key")
+        lmdb_store.close()
+
+        # The saved filter is loaded
+        lmdb_store = KeyValueStore.new(uri, store_type="lmdb", bloom_bits_per_key=10)
+        assert lmdb_store.bloom_filter_info()["count"] >= 1501
+        lmdb_store.close()
+
+        # The filter is stale after writes without it
+        lmdb_store = KeyValueStore.new(uri, store_type="lmdb")
+        lmdb_store.put(b"new_key", b"new_value")
+        lmdb_store.close()
+        lmdb_store = KeyValueStore.new(uri, store_type="lmdb", bloom_bits_per_key=10)
+        assert lmdb_store.get(b"new_key") == b"new_value"
+
+        lmdb_store.destroy_store()
+
+    def test_lmdb_bloom_filter_read_only(self):
+        with pytest.raises(ValueError):
+            KeyValueStore.new(
+                "file://./key_value_store_test_lmdb_bloom_filter",
+                store_type="lmdb",
+                read_only=True,
+                bloom_bits_per_key=10,
+            )
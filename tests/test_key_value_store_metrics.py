@@ -0,0 +1,74 @@
+"""Test KeyValueStoreMetrics"""
+import pytest
+
+from kona.key_value_store import KeyValueStore, KeyValueStoreError
+from kona.key_value_store_dict import KeyValueStoreDict
+from kona.key_value_store_metrics import KeyValueStoreInstrumented, KeyValueStoreMetrics
+
+
+class TestKeyValueStoreMetrics:
+    def test_new_with_metrics(self):
+        store = KeyValueStore.new("file://./key_value_store_test_metrics", store_type="lmdb", metrics=True)
+        assert isinstance(store.store, KeyValueStoreInstrumented)
+
+        store.put(b"test_key_0", b"test_value_0")
+        assert store.get(b"test_key_0") == b"test_value_0"
+        with pytest.raises(KeyError):
+            store.get(b"test_key_1")
+
+        operations = store.stats()["operations"]
+        assert operations["put"]["count"] == 1
+        assert operations["put"]["bytes"] == 22
+        assert operations["get"]["count"] == 2
+        assert operations["get"]["errors"] == 0
+        assert operations["get"]["bytes"] == 12
+        assert 0 < operations["get"]["latency_p50"] <= operations["get"]["latency_p999"]
+        assert sum(operations["get"]["latency_histogram"]) == 2
+
+        store.destroy_store()
+
+    def test_batch_and_iterator(self):
+        store = KeyValueStoreInstrumented(KeyValueStoreDict())
+
+        batch = store.WriteBatch()
+        for i in range(10):
+            batch.put(f"test_key_{i}".encode(), f"test_value_{i}".encode())
+        batch.write()
+
+        batch = store.CancelableWriteBatch()
+        batch.delete(b"test_key_0")
+        batch.write()
+        batch.cancel()
+        batch.close()
+
+        assert len(store.Iterator(include_value=False).next_n(3)) == 3
+        with store.Iterator() as it:
+            assert len(it.next_n(3)) == 3
+        assert len(list(store.Iterator())) == 10
+        assert store.multi_get([b"test_key_0", b"test_key_x"]) == [b"test_value_0", None]
+
+        operations = store.stats(reset=True)["operations"]
+        assert operations["write_batch"]["items"] == 10
+        assert operations["write_batch"]["bytes"] == 10 * 22
+        assert operations["write_batch"]["item_histogram"][4] == 1
+        assert operations["cancelable_write_batch"]["items"] == 1
+        assert operations["cancel_write_batch"]["count"] == 1
+        assert operations["iterator"]["count"] == 2
+        assert operations["iterator"]["items"] == 13
+        assert operations["multi_get"]["items"] == 2
+        assert store.stats()["operations"] == {}
+
+    def test_callback_and_errors(self):
+        class _FailingStore(KeyValueStoreDict):
+            def put(self, key: bytes, value: bytes, *, sync=False, **kwargs):
+                raise KeyValueStoreError("failed to put")
+
+        events = []
+        store = KeyValueStoreInstrumented(_FailingStore(), KeyValueStoreMetrics(callbacks=[events.append]))
+        with pytest.raises(KeyValueStoreError):
+            store.put(b"test_key", b"test_value")
+
+        assert len(events) == 1
+        assert events[0].op == "put"
+        assert isinstance(events[0].error, KeyValueStoreError)
+        assert store.stats()["operations"]["put"]["errors"] == 1
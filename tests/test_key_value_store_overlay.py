@@ -0,0 +1,90 @@
+"""Test KeyValueStoreOverlay"""
+import pytest
+
+from kona.key_value_store import KeyValueStore
+from kona.key_value_store_overlay import KeyValueStoreOverlay
+
+
+class TestKeyValueStoreOverlay:
+    store_types = ["dict", "rocksdb", "lmdb"]
+
+    def _new_base_store(self, store_type) -> KeyValueStore:
+        store = KeyValueStore.new(
+            "file://./key_value_store_test_overlay", store_type=store_type, create_if_missing=True
+        )
+        for i in range(10):
+            store.put(f"test_key_{i}".encode(), f"test_value_{i}".encode())
+        return store
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_overlay_read_write(self, store_type):
+        base = self._new_base_store(store_type)
+        overlay = KeyValueStoreOverlay(base)
+
+        overlay.put(b"test_key_1", b"overlay_value_1")
+        overlay.delete(b"test_key_2")
+        overlay.put(b"overlay_key", b"overlay_value")
+        batch = overlay.WriteBatch()
+        batch.put(b"test_key_3", b"overlay_value_3")
+        batch.delete(b"test_key_4")
+        batch.write()
+
+        assert overlay.get(b"test_key_1") == b"overlay_value_1"
+        assert overlay.get(b"test_key_0") == b"test_value_0"
+        with pytest.raises(KeyError):
+            overlay.get(b"test_key_2")
+        assert overlay.get(b"test_key_2", default=b"none") == b"none"
+        assert overlay.multi_get([b"test_key_3", b"test_key_4", b"test_key_5"]) == [
+            b"overlay_value_3",
+            None,
+            b"test_value_5",
+        ]
+        assert overlay.key_may_exist(b"test_key_4") == (False, None)
+        assert base.get(b"test_key_1") == b"test_value_1"
+        assert overlay.overlay_info() == {"records": 3, "tombstones": 2, "size": 94}
+
+        expected = {f"test_key_{i}".encode(): f"test_value_{i}".encode() for i in range(10)}
+        expected.update({b"test_key_1": b"overlay_value_1", b"test_key_3": b"overlay_value_3"})
+        expected.update({b"overlay_key": b"overlay_value"})
+        del expected[b"test_key_2"], expected[b"test_key_4"]
+        assert list(overlay.Iterator()) == sorted(expected.items())
+        assert list(overlay.Iterator(reverse=True, include_value=False)) == sorted(expected, reverse=True)
+        it = overlay.Iterator(start_key=b"test_key_1", stop_key=b"test_key_5", include_stop=False)
+        assert it.next_n(2) == [(b"test_key_1", b"overlay_value_1"), (b"test_key_3", b"overlay_value_3")]
+        it = overlay.Iterator(stop_key=b"test_key_5", include_stop=False, resume_token=it.resume_token)
+        assert list(it) == []
+        assert list(overlay.Iterator(prefix=b"overlay_")) == [(b"overlay_key", b"overlay_value")]
+
+        overlay.discard()
+        assert overlay.get(b"test_key_1") == b"test_value_1"
+        assert list(overlay.Iterator()) == list(base.Iterator())
+
+        base.destroy_store()
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_overlay_commit(self, store_type):
+        base = self._new_base_store(store_type)
+        block_layer = KeyValueStoreOverlay(base)
+        block_layer.put(b"test_key_0", b"block_value_0")
+
+        tx_layer = block_layer.overlay()
+        tx_layer.put(b"test_key_1", b"tx_value_1")
+        tx_layer.delete(b"test_key_2")
+        assert block_layer.get(b"test_key_1") == b"test_value_1"
+        tx_layer.commit()
+        assert tx_layer.overlay_info()["records"] == 0
+        assert block_layer.get(b"test_key_1") == b"tx_value_1"
+        assert base.get(b"test_key_1") == b"test_value_1"
+
+        failed_tx_layer = block_layer.overlay()
+        failed_tx_layer.put(b"test_key_3", b"failed_value_3")
+        failed_tx_layer.discard()
+
+        block_layer.commit(sync=True)
+        assert base.get(b"test_key_0") == b"block_value_0"
+        assert base.get(b"test_key_1") == b"tx_value_1"
+        assert base.get(b"test_key_2", default=b"none") == b"none"
+        assert base.get(b"test_key_3") == b"test_value_3"
+
+        block_layer.close()
+        base.destroy_store()
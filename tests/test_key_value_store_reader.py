@@ -0,0 +1,87 @@
+"""Test read-only and secondary reader instances"""
+from multiprocessing import Process
+
+import pytest
+
+from kona.key_value_store import KeyValueStore, KeyValueStoreError
+
+
+def lmdb_writer(uri: str):
+    store = KeyValueStore.new(uri, store_type="lmdb")
+    for i in range(100):
+        store.put(f"writer_key_{i:03}".encode(), f"writer_value_{i:03}".encode())
+    store.close()
+
+
+class TestKeyValueStoreReader:
+    def test_rocksdb_secondary(self):
+        uri = "file://./key_value_store_test_primary"
+        primary = KeyValueStore.new(uri, store_type="rocksdb", create_if_missing=True)
+        primary.put(b"key0", b"value0")
+
+        secondary = KeyValueStore.new(
+            uri, store_type="rocksdb", secondary_path="./key_value_store_test_secondary", metrics=True
+        )
+        assert secondary.get(b"key0") == b"value0"
+
+        primary.put(b"key1", b"value1")
+        batch = primary.WriteBatch()
+        batch.put(b"key2", b"value2")
+        batch.delete(b"key0")
+        batch.write()
+
+        secondary.catch_up()
+        assert secondary.get(b"key1") == b"value1"
+        assert secondary.get(b"key2") == b"value2"
+        assert secondary.get(b"key0", default=b"none") == b"none"
+        with pytest.raises(KeyValueStoreError):
+            secondary.put(b"key3", b"value3")
+
+        secondary.destroy_store()
+        assert primary.get(b"key1") == b"value1"
+        primary.destroy_store()
+
+    def test_rocksdb_read_only(self):
+        uri = "file://./key_value_store_test_read_only"
+        store = KeyValueStore.new(uri, store_type="rocksdb", create_if_missing=True)
+        store.put(b"key0", b"value0")
+        store.close()
+
+        reader = KeyValueStore.new(uri, store_type="rocksdb", read_only=True)
+        assert reader.get(b"key0") == b"value0"
+        assert list(reader.Iterator()) == [(b"key0", b"value0")]
+        reader.catch_up()
+        with pytest.raises(KeyValueStoreError):
+            reader.put(b"key1", b"value1")
+        reader.destroy_store()
+
+        store = KeyValueStore.new(uri, store_type="rocksdb")
+        assert store.get(b"key0") == b"value0"
+        store.destroy_store()
+
+    def test_rocksdb_catch_up_interval_needs_secondary_path(self):
+        with pytest.raises(ValueError):
+            KeyValueStore.new("file://./key_value_store_test_reader", store_type="rocksdb", catch_up_interval=1)
+
+    def test_lmdb_read_only(self):
+        uri = "file://./key_value_store_test_lmdb_reader"
+        KeyValueStore.new(uri, store_type="lmdb").close()
+        # An environment must not be opened twice in one process, so the writer runs in another process.
+        reader = KeyValueStore.new(uri, store_type="lmdb", read_only=True, cache_size=1024)
+        assert list(reader.Iterator()) == []
+
+        process = Process(target=lmdb_writer, args=(uri,))
+        process.start()
+        process.join()
+        assert process.exitcode == 0
+
+        reader.catch_up()
+        assert reader.get(b"writer_key_042") == b"writer_value_042"
+        assert len(list(reader.Iterator())) == 100
+        with pytest.raises(KeyValueStoreError):
+            reader.put(b"key", b"value")
+
+        reader.destroy_store()
+        store = KeyValueStore.new(uri, store_type="lmdb")
+        assert store.get(b"writer_key_099") == b"writer_value_099"
+        store.destroy_store()
@@ -0,0 +1,129 @@
+"""Test KeyValueStoreRegistry"""
+import gc
+import os
+
+import pytest
+
+from kona.key_value_store import KeyValueStore, KeyValueStoreError
+from kona.key_value_store_cache import KeyValueStoreCache
+from kona.key_value_store_registry import KeyValueStoreHandle, registry
+
+
+def _registry_info(uri: str) -> list:
+    path = os.path.realpath(uri[len("file://") :])
+    return [info for info in registry.info() if info["path"] == path]
+
+
+class TestKeyValueStoreRegistry:
+    store_types = ["rocksdb", "lmdb"]
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_shared_handles(self, store_type):
+        uri = "file://./key_value_store_test_registry"
+        first = KeyValueStore.new(uri, store_type=store_type, create_if_missing=True)
+        # The same path through the parent directory
+        second = KeyValueStore.new(
+            f"file://./../{os.path.basename(os.getcwd())}/key_value_store_test_registry",
+            store_type,
+            create_if_missing=True,
+        )
+        assert isinstance(first, KeyValueStoreHandle)
+        assert first is not second
+        assert _registry_info(uri) == [
+            {
+                "store_type": store_type,
+                "path": os.path.realpath("key_value_store_test_registry"),
+                "handles": 2,
+                "opens": 2,
+            }
+        ]
+
+        first.put(b"test_key", b"test_value")
+        assert second.get(b"test_key") == b"test_value"
+        assert first.engine_stats()["engine"] == store_type
+
+        first.close()
+        first.close()
+        with pytest.raises(KeyValueStoreError):
+            first.get(b"test_key")
+        assert second.get(b"test_key") == b"test_value"
+
+        third = KeyValueStore.new(uri, store_type=store_type, create_if_missing=True)
+        with pytest.raises(KeyValueStoreError):
+            third.destroy_store()
+        assert third.get(b"test_key") == b"test_value"
+        del third
+        gc.collect()
+        assert _registry_info(uri)[0]["handles"] == 1
+
+        second.destroy_store()
+        assert _registry_info(uri) == []
+        store = KeyValueStore.new(uri, store_type=store_type, create_if_missing=True)
+        assert store.get(b"test_key", default=b"") == b""
+        store.destroy_store()
+
+    def test_options_and_wrappers(self):
+        uri = "file://./key_value_store_test_registry_options"
+        store = KeyValueStore.new(uri, store_type="lmdb", cache_size=1024 * 1024, max_dbs=2)
+        assert isinstance(store, KeyValueStoreHandle)
+        assert isinstance(store.store, KeyValueStoreCache)
+        assert store.namespace(KeyValueStore.DEFAULT_NAMESPACE) is store
+        assert store.cache_info()["entries"] == 0
+
+        # Other options of an open store are refused, since the store can't be opened twice
+        with pytest.raises(KeyValueStoreError, match="max_dbs=3"):
+            KeyValueStore.new(uri, store_type="lmdb", cache_size=1024 * 1024, max_dbs=3)
+        # create_if_missing only matters to the first open
+        same = KeyValueStore.new(uri, store_type="lmdb", cache_size=1024 * 1024, max_dbs=2, create_if_missing=True)
+        assert _registry_info(uri)[0]["handles"] == 2
+
+        blocks = store.namespace("blocks")
+        assert store.namespace("blocks") is blocks
+        assert isinstance(blocks.store, KeyValueStoreCache)
+        assert blocks.namespace(KeyValueStore.DEFAULT_NAMESPACE) is store
+        blocks.put(b"test_key", b"test_value")
+        assert same.namespace("blocks").get(b"test_key") == b"test_value"
+        same.close()
+
+        # A read-only open of the writable store reads through it and refuses writes
+        reader = KeyValueStore.new(uri, store_type="lmdb", cache_size=1024 * 1024, max_dbs=2, read_only=True)
+        assert reader.store is store.store
+        assert reader.namespace("blocks").get(b"test_key") == b"test_value"
+        with pytest.raises(KeyValueStoreError, match="read-only"):
+            reader.put(b"test_key", b"test_value")
+        with pytest.raises(KeyValueStoreError, match="read-only"):
+            reader.namespace("blocks").WriteBatch()
+        reader.close()
+
+        dict_store = KeyValueStore.new(uri, store_type="dict")
+        assert not isinstance(dict_store, KeyValueStoreHandle)
+
+        store.destroy_store()
+        with pytest.raises(KeyValueStoreError):
+            blocks.get(b"test_key")
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_iterators_and_batches_keep_handles(self, store_type):
+        uri = "file://./key_value_store_test_registry_keep"
+        batch = KeyValueStore.new(uri, store_type=store_type, create_if_missing=True).WriteBatch()
+        gc.collect()
+        batch.put(b"test_key", b"test_value")
+        batch.write()
+        del batch
+        gc.collect()
+        assert _registry_info(uri) == []
+
+        # The handle of an inline iteration is released only after the iteration
+        items = []
+        for key, value in KeyValueStore.new(uri, store_type=store_type).Iterator():
+            gc.collect()
+            items.append((key, value))
+        assert items == [(b"test_key", b"test_value")]
+        gc.collect()
+        assert _registry_info(uri) == []
+
+        reader = KeyValueStore.new(uri, store_type=store_type, read_only=True)
+        with pytest.raises(KeyValueStoreError, match="read_only=False"):
+            KeyValueStore.new(uri, store_type=store_type)
+        reader.close()
+        KeyValueStore.new(uri, store_type=store_type).destroy_store()
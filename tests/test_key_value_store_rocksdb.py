@@ -0,0 +1,99 @@
+"""Test KeyValueStoreRocksDB"""
+import pytest
+
+from kona import key_value_store_rocksdb
+from kona.key_value_store import KeyValueStore, KeyValueStoreError
+from kona.key_value_store_rocksdb import (
+    ROCKSDB_PROFILES,
+    RocksDBSharedMemory,
+    set_shared_memory,
+)
+
+
+class TestKeyValueStoreRocksDB:
+    def _new_store(self, uri: str, **kwargs):
+        return KeyValueStore.new(uri, store_type="rocksdb", create_if_missing=True, **kwargs)
+
+    def test_rocksdb_batch_delete_range_in_chunks(self, monkeypatch):
+        monkeypatch.setattr(key_value_store_rocksdb, "_DELETE_RANGE_CHUNK_SIZE", 3)
+        store = self._new_store("file://./key_value_store_test_rocksdb_batch_delete_range", shared=False)
+        namespace = store.namespace("test_namespace")
+        keys = [f"test_key_{i:02}".encode() for i in range(20)]
+        for key in keys:
+            store.put(key, b"test_value")
+            namespace.put(key, b"test_value")
+
+        batch = store.WriteBatch()
+        batch.put(b"test_key_05_before", b"test_value")
+        batch.delete_range(keys[2], keys[12])
+        batch.put(keys[7], b"test_value_after")
+        batch.namespace("test_namespace").delete_range(keys[15])
+        # Keys are read in write(), so the range is not loaded when delete_range() is called.
+        assert batch.count() == 4
+        store.put(b"test_key_06_written", b"test_value")
+        batch.write()
+        batch.write()
+
+        with store.Iterator(include_value=False) as it:
+            assert list(it) == keys[:2] + [keys[7]] + keys[13:]
+        assert store.get(keys[7]) == b"test_value_after"
+        with namespace.Iterator(include_value=False) as it:
+            assert list(it) == keys[:15]
+        store.destroy_store()
+
+    @pytest.mark.parametrize("profile", list(ROCKSDB_PROFILES))
+    def test_rocksdb_profile(self, profile):
+        store = self._new_store("file://./key_value_store_test_rocksdb_profile", profile=profile)
+        namespace = store.namespace("test_namespace")
+        store.put(b"test_key", b"test_value")
+        namespace.put(b"test_key", b"test_namespace_value")
+
+        assert store.get(b"test_key") == b"test_value"
+        assert namespace.get(b"test_key") == b"test_namespace_value"
+        assert store.engine_stats()["rocksdb"]["profile"] == profile
+        assert store._db.options.write_buffer_size == ROCKSDB_PROFILES[profile]["write_buffer_size"]
+        store.destroy_store()
+
+        with pytest.raises(ValueError):
+            self._new_store("file://./key_value_store_test_rocksdb_profile", profile="unknown_profile")
+
+        # Options given to the store override the profile
+        store = self._new_store(
+            "file://./key_value_store_test_rocksdb_profile", profile=profile, write_buffer_size=8 * 1024 * 1024
+        )
+        assert store._db.options.write_buffer_size == 8 * 1024 * 1024
+        store.destroy_store()
+
+    def test_rocksdb_shared_memory(self):
+        shared_memory = RocksDBSharedMemory(16 * 1024 * 1024, write_buffer_size=32 * 1024 * 1024, max_stores=2)
+        set_shared_memory(shared_memory)
+        try:
+            stores = [
+                self._new_store(f"file://./key_value_store_test_rocksdb_shared_{i}", profile="write_heavy")
+                for i in range(2)
+            ]
+            for store in stores:
+                rocksdb_stats = store.engine_stats()["rocksdb"]
+                assert rocksdb_stats["block_cache_capacity"] == 16 * 1024 * 1024
+                assert rocksdb_stats["shared_memory"]["stores"] == 2
+                assert store._db.options.db_write_buffer_size == 16 * 1024 * 1024
+                assert store._db.options.write_buffer_size * store._db.options.max_write_buffer_number <= (
+                    16 * 1024 * 1024
+                )
+
+            with pytest.raises(KeyValueStoreError):
+                self._new_store("file://./key_value_store_test_rocksdb_shared_2")
+
+            # A store which doesn't use the shared memory has its own block cache
+            store = self._new_store("file://./key_value_store_test_rocksdb_shared_2", use_shared_memory=False)
+            assert store.engine_stats()["rocksdb"]["shared_memory"] is None
+            store.destroy_store()
+
+            stores.pop().destroy_store()
+            assert shared_memory.info()["stores"] == 1
+            stores.append(self._new_store("file://./key_value_store_test_rocksdb_shared_1"))
+            for store in stores:
+                store.destroy_store()
+            assert shared_memory.info()["stores"] == 0
+        finally:
+            set_shared_memory(None)
@@ -0,0 +1,100 @@
+"""Test KeyValueStoreSharded"""
+import pytest
+
+from kona.key_value_store import KeyValueStore
+from kona.key_value_store_dict import KeyValueStoreDict
+from kona.key_value_store_sharded import KeyValueStoreSharded
+
+
+class TestKeyValueStoreSharded:
+    shard_store_types = ["dict", "rocksdb", "lmdb"]
+
+    def _test_items(self, count: int) -> dict:
+        return {f"test_key_{i:04}".encode(): f"test_value_{i:04}".encode() for i in range(count)}
+
+    @pytest.mark.parametrize("shard_store_type", shard_store_types, ids=shard_store_types)
+    def test_new_sharded_store(self, shard_store_type):
+        uri = "file://./key_value_store_test_sharded"
+        store = KeyValueStore.new(
+            uri, store_type="sharded", shards=4, shard_store_type=shard_store_type, create_if_missing=True
+        )
+        assert isinstance(store.store, KeyValueStoreSharded)
+
+        test_items = self._test_items(200)
+        batch = store.WriteBatch()
+        for key, value in test_items.items():
+            batch.put(key, value)
+        assert batch.count() == 200
+        batch.write()
+
+        assert all(len(list(shard.Iterator())) > 0 for shard in store.shards)
+        assert store.get(b"test_key_0001") == b"test_value_0001"
+        keys = [b"test_key_0199", b"unknown_key", b"test_key_0000"]
+        assert store.multi_get(keys) == [b"test_value_0199", None, b"test_value_0000"]
+
+        assert list(store.Iterator()) == sorted(test_items.items())
+        assert list(store.Iterator(reverse=True, include_value=False)) == sorted(test_items, reverse=True)
+        it = store.Iterator(start_key=b"test_key_0010", stop_key=b"test_key_0020", include_stop=False)
+        assert [key for key, _ in it.next_n(5)] == [f"test_key_{i:04}".encode() for i in range(10, 15)]
+        it = store.Iterator(stop_key=b"test_key_0020", include_stop=False, resume_token=it.resume_token)
+        assert [key for key, _ in it] == [f"test_key_{i:04}".encode() for i in range(15, 20)]
+        assert len(list(store.Iterator(prefix=b"test_key_01"))) == 100
+
+        if shard_store_type != "dict":
+            store.close()
+            with pytest.raises(ValueError):
+                KeyValueStore.new(uri, store_type="sharded", shards=2, create_if_missing=True)
+            store = KeyValueStore.new(uri, store_type="sharded", create_if_missing=True)
+            assert len(store.shards) == 4
+            assert store.get(b"test_key_0199") == b"test_value_0199"
+
+        store.destroy_store()
+
+    def test_bulk_load_through_shared_shards(self, monkeypatch):
+        from kona.key_value_store_lmdb import KeyValueStoreLMDB
+        from kona.key_value_store_registry import KeyValueStoreHandle
+
+        calls = []
+        putmulti = KeyValueStoreLMDB._putmulti
+
+        def _putmulti(self, chunk, is_sorted):
+            calls.append(is_sorted)
+            return putmulti(self, chunk, is_sorted)
+
+        monkeypatch.setattr(KeyValueStoreLMDB, "_putmulti", _putmulti)
+        store = KeyValueStore.new(
+            "file://./key_value_store_test_sharded_bulk_load", store_type="sharded", shards=2, shard_store_type="lmdb"
+        )
+        assert all(type(shard) is KeyValueStoreHandle for shard in store.shards)
+
+        stats = store.bulk_load(sorted(self._test_items(100).items()), chunk_size=50)
+        assert stats["sorted_count"] == 100
+        # Every shard takes the fast path of LMDB through its handle
+        assert calls == [True] * 4
+        assert store.get(b"test_key_0099") == b"test_value_0099"
+
+        store.destroy_store()
+
+    def test_custom_shard_fn(self):
+        store = KeyValueStoreSharded(
+            [KeyValueStoreDict(), KeyValueStoreDict()], shard_fn=lambda key, shards: key[-1] % shards
+        )
+        store.put(b"a\x00", b"even")
+        store.put(b"a\x01", b"odd")
+        assert store.shards[0].get(b"a\x00") == b"even"
+        assert store.shards[1].get(b"a\x01") == b"odd"
+
+        stats = store.bulk_load([(b"b\x00", b"0"), (b"b\x01", b"1"), (b"b\x02", b"2")])
+        assert stats["count"] == 3
+        assert [key for key, _ in store.shards[0].Iterator(prefix=b"b")] == [b"b\x00", b"b\x02"]
+
+        batch = store.CancelableWriteBatch()
+        batch.put(b"a\x00", b"changed")
+        batch.delete(b"a\x01")
+        batch.write()
+        assert store.multi_get([b"a\x00", b"a\x01"]) == [b"changed", None]
+        batch.cancel()
+        assert store.multi_get([b"a\x00", b"a\x01"]) == [b"even", b"odd"]
+
+        assert store.engine_stats()["estimated_num_keys"] == 5
+        store.close()
@@ -0,0 +1,40 @@
+"""Test parallel_scan"""
+import pytest
+
+from kona.key_value_store import KeyValueStore
+from kona.parallel_scan import parallel_scan
+
+
+def collect_keys(it) -> list:
+    return list(it)
+
+
+class TestParallelScan:
+    store_types = ["rocksdb", "lmdb"]
+
+    def _test_items(self, count: int) -> dict:
+        return {f"test_key_{i:04}".encode(): f"test_value_{i:04}".encode() for i in range(count)}
+
+    @pytest.mark.parametrize("store_type", store_types, ids=store_types)
+    def test_parallel_scan(self, store_type):
+        uri = "file://./key_value_store_test_parallel_scan"
+        store = KeyValueStore.new(uri, store_type=store_type, create_if_missing=True)
+        test_items = self._test_items(1000)
+        store.bulk_load(sorted(test_items.items()))
+
+        results = list(parallel_scan(uri, collect_keys, store_type, include_value=False, workers=2, parts=4))
+        assert len(results) == 4
+        assert all(results)
+        assert [key for keys in results for key in keys] == sorted(test_items)
+
+        results = parallel_scan(
+            uri, collect_keys, store_type, start_key=b"test_key_0100", stop_key=b"test_key_0199", workers=2, parts=3
+        )
+        rows = [row for rows in results for row in rows]
+        assert rows == [(key, test_items[key]) for key in sorted(test_items)[100:200]]
+
+        store.destroy_store()
+
+    def test_parallel_scan_dict(self):
+        with pytest.raises(ValueError):
+            parallel_scan("file://./key_value_store_test_parallel_scan", collect_keys, "dict")
@@ -0,0 +1,162 @@
+"""Test KonaServer and KeyValueStoreClient"""
+import asyncio
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from kona.__main__ import _option
+from kona.key_value_store import KeyValueStore, KeyValueStoreError
+from kona.key_value_store_client import KeyValueStoreClient
+from kona.server import KonaServer
+
+SOCKET_PATH = "./kona_test_server.sock"
+
+
+class _ServerThread:
+    def __init__(self, store: KeyValueStore, path: str):
+        self.loop = asyncio.new_event_loop()
+        self.server = KonaServer(store, path)
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.start(), self.loop).result(10)
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.server.close(), self.loop).result(10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+class TestKonaServer:
+    store_types = ["rocksdb", "lmdb"]
+
+    @pytest.fixture(params=store_types, ids=store_types)
+    def served(self, request):
+        uri = "file://./key_value_store_test_server"
+        store = KeyValueStore.new(uri, store_type=request.param, create_if_missing=True, shared=False)
+        server = _ServerThread(store, SOCKET_PATH)
+        client = KeyValueStore.new(f"unix://{os.path.abspath(SOCKET_PATH)}", store_type="client")
+        yield store, server, client
+        client.close()
+        server.stop()
+        store.destroy_store()
+
+    def test_get_put(self, served):
+        store, _, client = served
+        client.put(b"test_key", b"test_value")
+        assert client.get(b"test_key") == b"test_value"
+        assert store.get(b"test_key") == b"test_value"
+        assert client.get(b"missing", default=b"") == b""
+        with pytest.raises(KeyError):
+            client.get(b"missing")
+        assert client.multi_get([b"test_key", b"missing"]) == [b"test_value", None]
+        assert client.key_may_exist(b"test_key") == store.key_may_exist(b"test_key")
+
+        client.delete(b"test_key")
+        assert client.get(b"test_key", default=b"") == b""
+        assert client.engine_stats()["engine"] == store.engine_stats()["engine"]
+        with pytest.raises(KeyValueStoreError):
+            client.destroy_store()
+
+    def test_batch_and_delete_range(self, served):
+        _, _, client = served
+        batch = client.WriteBatch()
+        for i in range(10):
+            batch.put(f"test_key_{i}".encode(), f"test_value_{i}".encode())
+        batch.delete(b"test_key_9")
+        assert batch.count() == 11
+        batch.write()
+        assert client.get(b"test_key_0") == b"test_value_0"
+        assert client.get(b"test_key_9", default=b"") == b""
+
+        cancelable = client.CancelableWriteBatch()
+        cancelable.put(b"test_key_0", b"edited")
+        cancelable.write()
+        assert client.get(b"test_key_0") == b"edited"
+        cancelable.cancel()
+        assert client.get(b"test_key_0") == b"test_value_0"
+
+        assert client.delete_range(b"test_key_0", b"test_key_5") == 6
+        assert list(client.Iterator(include_value=False)) == [b"test_key_6", b"test_key_7", b"test_key_8"]
+
+        with pytest.raises(ValueError):
+            client.delete_range("test_key_6")
+
+    def test_iterator(self, served):
+        _, _, client = served
+        keys = [f"test_key_{i:03}".encode() for i in range(100)]
+        batch = client.WriteBatch()
+        for key in keys:
+            batch.put(key, key + b"_value")
+        batch.put(b"other", b"other_value")
+        batch.write()
+
+        assert list(client.Iterator(prefix=b"test_key_", chunk_size=7)) == [(key, key + b"_value") for key in keys]
+        assert list(client.Iterator(prefix=b"test_key_", include_value=False, reverse=True)) == keys[::-1]
+        assert list(client.Iterator(keys[10], keys[20], include_value=False, include_start=False, chunk_size=3)) == (
+            keys[11:21]
+        )
+
+        it = client.Iterator(prefix=b"test_key_", include_value=False, chunk_size=4)
+        assert it.next_n(10) == keys[:10]
+        it.seek(keys[50])
+        assert it.next_n(2) == keys[50:52]
+        token = it.resume_token
+        it.close()
+        assert client.Iterator(prefix=b"test_key_", include_value=False, resume_token=token).next_n(1) == [keys[52]]
+
+    def test_pipelining_and_coalescing(self, served):
+        _, server, client = served
+
+        def _work(worker: int):
+            for i in range(50):
+                key = f"test_key_{worker}_{i}".encode()
+                client.put(key, key)
+                assert client.get(key) == key
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(_work, range(8)))
+
+        assert len(list(client.Iterator(prefix=b"test_key_"))) == 400
+        stats = server.server.stats()
+        assert stats["write_requests"] == 400
+        assert stats["write_groups"] <= 400
+        assert stats["open_connections"] == 1
+
+    def test_snapshot(self, served):
+        store, _, client = served
+        client.put(b"test_key", b"test_value")
+        path = "./key_value_store_test_server_snapshot"
+        shutil.rmtree(path, ignore_errors=True)
+        try:
+            client.checkpoint(path)
+            snapshot = KeyValueStore.new(f"file://{path}", store_type=store.engine_stats()["engine"], shared=False)
+            assert snapshot.get(b"test_key") == b"test_value"
+            snapshot.close()
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def test_closed_connection(self):
+        store = KeyValueStore.new("unused", store_type="dict")
+        server = _ServerThread(store, SOCKET_PATH)
+        client = KeyValueStoreClient(f"unix://{os.path.abspath(SOCKET_PATH)}")
+        client.put(b"test_key", b"test_value")
+        server.stop()
+        with pytest.raises(KeyValueStoreError):
+            client.get(b"test_key")
+        client.close()
+        assert not os.path.exists(SOCKET_PATH)
+
+        with pytest.raises(KeyValueStoreError):
+            KeyValueStoreClient(f"unix://{os.path.abspath(SOCKET_PATH)}")
+        with pytest.raises(ValueError):
+            KeyValueStoreClient("file://./kona.sock")
+
+
+def test_option():
+    assert _option("create_if_missing=true") == ("create_if_missing", True)
+    assert _option("map_size=1024") == ("map_size", 1024)
+    assert _option("profile=scan_heavy") == ("profile", "scan_heavy")